@@ -1,13 +1,17 @@
 from __future__ import annotations
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 
 from core.calculator import run_calc_window, Opportunity
 from core.settings import load_settings
 from core.logger import log_info, log_success, log_warning, log_error
-from core.telegram import send_opportunity
-from core.opps import persist_opportunity, legs_signature_for_telegram
+from core.telegram import send_opportunity, queue_digest
+from core.opps import persist_opportunity, delete_opportunity, legs_signature_for_telegram
 from core.db import resolve_sport_id
+from core.lifecycle import OpportunityLifecycle, ArbObservation, LifecycleKey
+
+# One tracker per scanned sport so a scan of one sport never "closes" another's arbs
+_LIFECYCLES: Dict[int, OpportunityLifecycle] = {}
 
 
 def _event_fp(opp: Opportunity) -> str:
@@ -24,6 +28,71 @@ def _event_fp(opp: Opportunity) -> str:
     return f"{opp.arb_event_id}:{ko.strftime('%Y%m%dT%H%M%SZ')}"
 
 
+def _lifecycle_key(opp: Opportunity) -> LifecycleKey:
+    return (_event_fp(opp), str(opp.market_name), str(opp.line) if opp.line is not None else None)
+
+
+def _observation(opp: Opportunity) -> ArbObservation:
+    return ArbObservation(
+        arb_event_id=int(opp.arb_event_id),
+        legs_hash=legs_signature_for_telegram(opp.legs),
+        profit_pct=float(opp.margin),
+    )
+
+
+def _tracker(sport_id: int) -> OpportunityLifecycle:
+    tracker = _LIFECYCLES.get(sport_id)
+    if tracker is None:
+        tracker = _LIFECYCLES[sport_id] = OpportunityLifecycle()
+    return tracker
+
+
+def _track_lifecycle(sport_id: int, opps: List[Opportunity]) -> None:
+    """Diff this scan against the open set and queue transitions for batched persistence."""
+    tracker = _tracker(sport_id)
+    snapshot = {}
+    for opp in opps:
+        try:
+            snapshot[_lifecycle_key(opp)] = _observation(opp)
+        except Exception as e:
+            log_warning(f"lifecycle: skipped arb_event_id={getattr(opp, 'arb_event_id', '?')}: {e}")
+    try:
+        changes = tracker.sync(snapshot)
+        tracker.flush()
+    except Exception as e:
+        log_warning(f"lifecycle tracking failed: {e}")
+        return
+    if changes:
+        st = tracker.stats()
+        log_info(
+            f"lifecycle: {len(changes)} transition(s); open={st['open']} closed={st['closed']} "
+            f"flaps={st['flaps']} p50_life={st['lifespan_p50_sec']}s"
+        )
+
+
+def _amend_lifecycle(sport_id: int, changes: Dict[LifecycleKey, Optional[ArbObservation]]) -> None:
+    """Incremental correction from verification (O(changed)): None closes a vanished arb."""
+    if not changes:
+        return
+    try:
+        tracker = _tracker(sport_id)
+        tracker.apply(changes)
+        tracker.flush()
+    except Exception as e:
+        log_warning(f"lifecycle update from verification failed: {e}")
+
+
+def lifecycle_stats() -> Dict[int, Dict[str, object]]:
+    return {sid: t.stats() for sid, t in _LIFECYCLES.items()}
+
+
+def flush_lifecycle(force: bool = True) -> int:
+    n = 0
+    for t in _LIFECYCLES.values():
+        n += t.flush(force=force)
+    return n
+
+
 def _resolve_sport_id(sport_id: Optional[int], sport_name: Optional[str]) -> int:
     """
     Prefer explicit sport_id. Otherwise resolve from name.
@@ -36,20 +105,109 @@ def _resolve_sport_id(sport_id: Optional[int], sport_name: Optional[str]) -> int
     return resolve_sport_id("Soccer")
 
 
+def _persist(opp: Opportunity, sport_id: int) -> Optional[int]:
+    """Insert with DB uniqueness (event_fingerprint, market_key, line, legs_hash); new id or falsy if known."""
+    return persist_opportunity(
+        arb_event_id=opp.arb_event_id,
+        sport_id=sport_id,
+        event_fingerprint=_event_fp(opp),
+        market_key=str(opp.market_name),  # keep consistent with markets.name
+        line=str(opp.line) if opp.line is not None else None,
+        profit_pct=float(opp.margin),     # storing margin as "profit_pct"
+        legs=opp.legs,
+    )
+
+
+def _forget(row_id: int) -> None:
+    try:
+        delete_opportunity(row_id)
+    except Exception as e:
+        log_warning(f"delete_opportunity failed for id={row_id}: {e}")
+
+
+def _persist_new(pending: Iterator[Opportunity], sport_id: int, limit: Optional[int]) -> List[Tuple[Opportunity, int]]:
+    """Persist from `pending` until `limit` legs-combos were NEWLY inserted (or it runs out)."""
+    batch: List[Tuple[Opportunity, int]] = []
+    for opp in pending:
+        try:
+            row_id = _persist(opp, sport_id)
+        except Exception as e:
+            log_warning(
+                f"persist_opportunity failed for arb_event_id={getattr(opp, 'arb_event_id', '?')}: {e}"
+            )
+            continue
+        if row_id:  # expect int new id; falsy if duplicate/no-op
+            batch.append((opp, row_id))
+            if limit is not None and len(batch) >= limit:
+                break
+    return batch
+
+
+def _verify_new(verifier, batch: List[Tuple[Opportunity, int]], sport_id: int) -> List[Opportunity]:
+    """
+    Re-check newly persisted arbs against fresh leg prices. A vanished arb's row is
+    deleted so the same legs alert if they come back; a repriced arb is re-keyed on
+    its fresh legs (and dropped if those were already known). Both verdicts also go
+    to the lifecycle tracker incrementally (closed / updated).
+    """
+    opps = [opp for opp, _ in batch]
+    if verifier is None:
+        return opps
+    try:
+        checked = verifier.verify_each(opps)
+    except Exception as e:
+        log_warning(f"leg verification failed; alerting on DB prices: {e}")
+        return opps
+
+    kept: List[Opportunity] = []
+    amend: Dict[LifecycleKey, Optional[ArbObservation]] = {}
+    for (opp, row_id), again in zip(batch, checked):
+        if again is not opp:
+            try:
+                amend[_lifecycle_key(opp)] = None if again is None else _observation(again)
+            except Exception as e:
+                log_warning(f"lifecycle: skipped arb_event_id={getattr(opp, 'arb_event_id', '?')}: {e}")
+        if again is None:
+            _forget(row_id)
+            continue
+        if again is not opp and legs_signature_for_telegram(again.legs) != legs_signature_for_telegram(opp.legs):
+            _forget(row_id)
+            try:
+                if not _persist(again, sport_id):
+                    continue
+            except Exception as e:
+                log_warning(f"persist_opportunity failed for repriced arb_event_id={again.arb_event_id}: {e}")
+                continue
+        kept.append(again)
+    _amend_lifecycle(sport_id, amend)
+    return kept
+
+
 def scan_and_alert_db(
     sport_id: Optional[int] = None,
     hours: int = 48,
     market_names: Optional[List[str]] = None,
     max_send: int = 20,
     sport_name: Optional[str] = None,
+    verifier=None,
+    partition: Optional[Tuple[int, int]] = None,
 ) -> int:
     """
     DB-backed scan: compute opportunities, persist new legs-combos,
     send alerts for NEW ONLY (unique by legs signature).
     - sport_id: your internal DB id (preferred if known).
     - sport_name: canonical name in your sports table (e.g., "Soccer").
+    In settings.alert_mode == "digest", new arbs are packed ROI-ordered into as few
+    messages as possible (only arbs at/above digest_priority_roi go out alone);
+    max_send then only caps a cycle in single mode. Returns alerts actually delivered
+    (in digest mode: by this cycle's flush; buffered arbs count when flushed).
+    - verifier: optional core.verify.LegVerifier; new arbs are re-checked against a
+      targeted re-fetch of their legs and dropped/repriced before alerting.
+    - partition: (index, replicas) — scan only this replica's share of events, so
+      replicas split the work; the shared de-dup store still guards resizes.
     """
-    _ = load_settings()  # thresholds & stake used inside run_calc_window
+    s = load_settings()  # thresholds & stake used inside run_calc_window
+    digest = s.alert_mode == "digest"
 
     # Canonicalize sport
     resolved_sport_id = _resolve_sport_id(sport_id, sport_name)
@@ -59,51 +217,67 @@ def scan_and_alert_db(
             sport_id=resolved_sport_id,
             hours=hours,
             market_names=market_names or ["1X2"],
+            partition=partition,
         )
     except Exception as e:
         log_error(f"arbitrage.scan_and_alert_db: calculator failed: {e}")
         return 0
 
+    # Diff even an empty result: that is how arbs get closed
+    _track_lifecycle(resolved_sport_id, opps or [])
+
     if not opps:
+        sent = 0
+        if digest:
+            # still deliver arbs held from earlier cycles once their window closes
+            try:
+                sent = queue_digest([], s.digest_interval_sec, s.digest_priority_roi)
+            except Exception as e:
+                log_warning(f"digest delivery failed: {e}")
         log_info("arbitrage.scan_and_alert_db: no opportunities found.")
-        return 0
-
-    sent = 0
-    for opp in opps:
-        try:
-            # Persist with DB uniqueness (event_fingerprint, market_key, line, legs_hash)
-            fp = _event_fp(opp)
-            row_id = persist_opportunity(
-                arb_event_id=opp.arb_event_id,
-                sport_id=resolved_sport_id,
-                event_fingerprint=fp,
-                market_key=str(opp.market_name),  # keep consistent with markets.name
-                line=str(opp.line) if opp.line is not None else None,
-                profit_pct=float(opp.margin),     # storing margin as "profit_pct"
-                legs=opp.legs,
-            )
+        return sent
 
-            # Only alert if this exact legs combo was NEWLY inserted
-            if row_id:  # expect int new id; falsy if duplicate/no-op
-                # Hand the same legs signature to Telegram de-dup for cross-run throttling
-                try:
-                    opp._legs_sig = legs_signature_for_telegram(opp.legs)
-                except Exception:
-                    # non-fatal: in-memory dedup will fall back to local hash
-                    pass
+    # Persist → verify in batches until max_send survivors (digest: all at once), so arbs
+    # that vanish on re-fetch neither keep their row nor use up the send quota
+    fresh: List[Opportunity] = []
+    pending = iter(opps)
+    while True:
+        room = None if digest else max_send - len(fresh)
+        if room is not None and room <= 0:
+            break
+        batch = _persist_new(pending, resolved_sport_id, room)
+        if not batch:
+            break
+        fresh.extend(_verify_new(verifier, batch, resolved_sport_id))
 
-                if send_opportunity(opp):
-                    sent += 1
+    for opp in fresh:
+        # Hand the same legs signature to Telegram de-dup for cross-run throttling
+        try:
+            opp._legs_sig = legs_signature_for_telegram(opp.legs)
+        except Exception:
+            # non-fatal: in-memory dedup will fall back to local hash
+            pass
 
+    sent = 0
+    if digest:
+        try:
+            sent = queue_digest(fresh, s.digest_interval_sec, s.digest_priority_roi)
+        except Exception as e:
+            log_warning(f"digest delivery failed: {e}")
+    else:
+        for opp in fresh:
             if sent >= max_send:
                 break
+            try:
+                if send_opportunity(opp):
+                    sent += 1
+            except Exception as e:
+                log_warning(
+                    f"send_opportunity failed for arb_event_id={getattr(opp, 'arb_event_id', '?')}: {e}"
+                )
 
-        except Exception as e:
-            log_warning(
-                f"send_opportunity failed for arb_event_id={getattr(opp, 'arb_event_id', '?')}: {e}"
-            )
-
-    log_success(f"arbitrage.scan_and_alert_db: sent {sent} alert(s).")
+    log_success(f"arbitrage.scan_and_alert_db: sent {sent} alert(s)"
+                + (f" ({len(fresh)} new arb(s) into the digest)." if digest else "."))
     return sent
 
 
@@ -0,0 +1,190 @@
+# core/bot_process.py
+"""
+Telegram bot in its own supervised process.
+
+The scanner never runs python-telegram-bot itself; it talks to a child process
+over two multiprocessing queues:
+
+  scanner → bot   ("alert",    (message, chat_ids, alert_id))   delivered by the child
+                  ("status",   {...})                           shown by /status
+                  ("settings", {...})                           current settings snapshot
+                  ("stop",     None)
+  bot → scanner   ("settings", {...})                           e.g. after /stake
+                  ("alert_result", (alert_id, delivered))       for id'd alerts; a failure
+                                                                releases the de-dup claims
+
+Settings changes are pushed (core.settings.push_settings) instead of the scanner
+re-reading settings.json. The supervisor restarts a dead child with exponential
+backoff and logs its exit code; alerts queued while it is down are kept.
+"""
+from __future__ import annotations
+import multiprocessing as mp
+import queue
+import signal
+import threading
+import time
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_RESTART_BACKOFF_MIN = 2.0
+_RESTART_BACKOFF_MAX = 60.0
+_HEALTHY_AFTER_SEC = 60.0      # a child that lived this long resets the backoff
+
+
+# ===============================
+# child process
+# ===============================
+def _bot_main(inbox, outbox) -> None:
+    """Entry point of the bot process (must stay importable for the spawn start method)."""
+    # Ctrl-C reaches the whole process group; the scanner sends "stop" so queued alerts drain first.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from core import telegram as tg
+    from core.settings import Settings, push_settings
+
+    def _on_settings(s) -> None:
+        try:
+            outbox.put_nowait(("settings", asdict(s)))
+        except Exception as e:
+            logger.warning(f"bot: settings push to scanner failed: {e}")
+
+    tg.set_settings_listener(_on_settings)
+    updater = tg.run_bot()
+
+    try:
+        while True:
+            try:
+                kind, payload = inbox.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            if kind == "stop":
+                break
+            try:
+                if kind == "alert":
+                    message, chat_ids, alert_id = payload
+                    try:
+                        delivered = tg.send_telegram_alert(message, chat_ids=chat_ids)
+                    except Exception as e:
+                        logger.error(f"⚠️ bot: alert send failed: {e}")
+                        delivered = False
+                    if alert_id is not None:
+                        outbox.put_nowait(("alert_result", (alert_id, bool(delivered))))
+                elif kind == "status":
+                    tg.update_scanner_status(payload)
+                elif kind == "settings":
+                    push_settings(Settings.validate(payload))
+            except Exception as e:
+                logger.error(f"⚠️ bot: failed to handle {kind!r}: {e}")
+    finally:
+        if updater is not None:
+            try:
+                updater.stop()
+            except Exception:
+                pass
+
+
+# ===============================
+# scanner side
+# ===============================
+class BotSupervisor:
+    def __init__(self, start_method: str = "spawn"):
+        self._ctx = mp.get_context(start_method)
+        self._inbox = self._ctx.Queue()    # scanner → bot
+        self._outbox = self._ctx.Queue()   # bot → scanner
+        self._proc: Optional[mp.process.BaseProcess] = None
+        self._started_at = 0.0
+        self._backoff = _RESTART_BACKOFF_MIN
+        self._next_restart = 0.0
+        self._lock = threading.Lock()
+        self.restarts = 0
+
+    # ---------------------------
+    # process control
+    # ---------------------------
+    def start(self) -> "BotSupervisor":
+        from core.settings import load_settings
+        self._spawn()
+        self.push_settings(load_settings())
+        return self
+
+    def _spawn(self) -> None:
+        self._proc = self._ctx.Process(
+            target=_bot_main, args=(self._inbox, self._outbox), name="telegram-bot", daemon=True,
+        )
+        self._proc.start()
+        self._started_at = time.monotonic()
+        logger.info(f"🤖 Telegram bot process started (pid={self._proc.pid}).")
+
+    def alive(self) -> bool:
+        return bool(self._proc and self._proc.is_alive())
+
+    def _supervise(self) -> None:
+        with self._lock:
+            if self._proc is None or self._proc.is_alive():
+                return
+            now = time.monotonic()
+            if self._next_restart == 0.0:
+                lived = now - self._started_at
+                logger.error(f"⚠️ Telegram bot process exited (code={self._proc.exitcode}) after {lived:.0f}s.")
+                if lived >= _HEALTHY_AFTER_SEC:
+                    self._backoff = _RESTART_BACKOFF_MIN
+                self._next_restart = now + self._backoff
+                self._backoff = min(_RESTART_BACKOFF_MAX, self._backoff * 2)
+                return
+            if now < self._next_restart:
+                return
+            self._next_restart = 0.0
+            self.restarts += 1
+            self._spawn()
+
+    def stop(self, timeout: float = 15.0) -> None:
+        """Ask the child to drain pending alerts and exit; terminate if it does not."""
+        if self._proc is None:
+            return
+        if self._proc.is_alive():
+            self._inbox.put(("stop", None))
+            self._proc.join(timeout)
+            if self._proc.is_alive():
+                logger.warning("⚠️ Telegram bot process did not stop in time; terminating.")
+                self._proc.terminate()
+                self._proc.join(5)
+        self._proc = None
+
+    # ---------------------------
+    # scanner → bot
+    # ---------------------------
+    def send_alert(self, message: str, chat_ids: Optional[List[str]] = None,
+                   alert_id: Optional[str] = None) -> None:
+        self._inbox.put(("alert", (message, chat_ids, alert_id)))
+
+    def push_status(self, status: Dict[str, Any]) -> None:
+        self._inbox.put(("status", dict(status)))
+
+    def push_settings(self, s) -> None:
+        self._inbox.put(("settings", asdict(s)))
+
+    # ---------------------------
+    # bot → scanner
+    # ---------------------------
+    def poll(self) -> int:
+        """Apply settings and alert verdicts pushed by the bot and restart it if it died; cheap, call often."""
+        from core.settings import Settings, push_settings
+        from core.telegram import settle_alert
+        n = 0
+        while True:
+            try:
+                kind, payload = self._outbox.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "settings":
+                push_settings(Settings.validate(payload))
+                logger.info(f"⚙️ Settings pushed from bot (stake={payload.get('stake')}).")
+            elif kind == "alert_result":
+                alert_id, delivered = payload
+                settle_alert(alert_id, delivered)
+            n += 1
+        self._supervise()
+        return n
@@ -16,6 +16,7 @@ from typing import Dict, Tuple, Optional, List, Any, Iterable
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
+import hashlib
 
 from core.db import get_latest_odds_for_window
 from core.settings import load_settings
@@ -410,6 +411,54 @@ def _enumerate_opportunities_for_event(
 
     return opps
 
+def _cross_settings(s) -> Tuple[List[List[str]], bool]:
+    # Cross 2-leg pairs like [["ah:0|Home","dc|X2"], ["ah:0|Away","dc|1X"]]
+    cross_pairs = list(getattr(s, "cross_bundles", [])) or [["ah:0|Home","dc|X2"], ["ah:0|Away","dc|1X"]]
+    # Enable 3-leg closed-form (AH0+X+2 and symmetric)
+    enable_three_leg = bool(getattr(s, "cross_three_leg_enable", True))
+    return cross_pairs, enable_three_leg
+
+# ---------------- public re-pricing helpers ----------------
+
+def best_per_market(rows: List[Dict[str, Any]], ms: MarketSpec) -> Dict[str, Leg]:
+    """
+    Best odds per canonical outcome for one normalized market.
+    rows need outcome, value, bookmaker_id (+ home_team/away_team for name-labelled outcomes).
+    """
+    return _best_per_market(rows, ms)
+
+def recompute_event(
+    event_id: int,
+    start_time: datetime,
+    sibling_bests: Dict[tuple, Dict[str, Leg]],
+) -> List[Opportunity]:
+    """
+    Enumerate one event's opportunities from (market_key,line)->best_map with the same
+    stake, thresholds and cross-market settings as run_calc_window.
+    """
+    s = load_settings()
+    cross_pairs, enable_three_leg = _cross_settings(s)
+    return _enumerate_opportunities_for_event(
+        event_id=event_id,
+        start_time=start_time,
+        sibling_bests=sibling_bests,
+        total_stake=float(getattr(s, "stake", 10000.0)),
+        min_profit_abs=float(getattr(s, "min_profit_absolute", 50.0)),
+        min_margin_pct=float(getattr(s, "min_profit_percent", 0.5)),
+        enabled_cross_pairs=cross_pairs,
+        enable_three_leg=enable_three_leg,
+    )
+
+# ---------------- replica partitioning ----------------
+
+def owns_event(event_id: int, partition: Optional[Tuple[int, int]]) -> bool:
+    """partition=(index, replicas): True if this replica scans `event_id` (None = owns everything)."""
+    if not partition or partition[1] <= 1:
+        return True
+    index, replicas = partition
+    h = int.from_bytes(hashlib.blake2b(str(int(event_id)).encode(), digest_size=8).digest(), "big")
+    return h % replicas == index
+
 # ---------------- main window scan ----------------
 
 def run_calc_window(
@@ -419,10 +468,12 @@ def run_calc_window(
     min_profit_percent: Optional[float] = None,
     min_profit_absolute: Optional[float] = None,
     stake: Optional[float] = None,
+    partition: Optional[Tuple[int, int]] = None,
 ) -> List[Opportunity]:
     """
     Scan next `hours` for arbitrage opportunities using latest DB odds.
     Uses normalized market keys. Cross-market combos are controlled by settings.
+    partition=(index, replicas) limits the scan to this replica's share of events.
     """
     s = load_settings()
     stake = float(stake if stake is not None else getattr(s, "stake", 10000.0))
@@ -432,11 +483,7 @@ def run_calc_window(
     # Which markets to pull (DB labels), fallback to 1X2/OU/AH0 common labels via normalizer
     markets_cfg = list(getattr(s, "markets", [])) or ["1X2", "Match Winner", "Double Chance", "Over/Under", "Handicap 0"]
 
-    # Cross 2-leg pairs like [["ah:0|Home","dc|X2"], ["ah:0|Away","dc|1X"]]
-    cross_pairs = list(getattr(s, "cross_bundles", [])) or [["ah:0|Home","dc|X2"], ["ah:0|Away","dc|1X"]]
-
-    # Enable 3-leg closed-form (AH0+X+2 and symmetric)
-    enable_three_leg = bool(getattr(s, "cross_three_leg_enable", True))
+    cross_pairs, enable_three_leg = _cross_settings(s)
 
     now = _now_utc()
     end = now + timedelta(hours=hours)
@@ -452,7 +499,9 @@ def run_calc_window(
     # group by event then by normalized market key
     by_event = defaultdict(list)
     for r in rows:
-        by_event[int(r["arb_event_id"])].append(r)
+        eid = int(r["arb_event_id"])
+        if owns_event(eid, partition):
+            by_event[eid].append(r)
 
     opps: List[Opportunity] = []
 
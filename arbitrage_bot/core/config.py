@@ -54,6 +54,17 @@ class EnvConfig:
     PROXY_BLACKLIST_COOLDOWN: int = _int("PROXY_BLACKLIST_COOLDOWN", 1800)
     METRICS_PREFIX: str = _env("METRICS_PREFIX", "scraper:metrics")
 
+    # Alert de-dup shared across scanner replicas (memory | sqlite | redis)
+    ALERT_DEDUP_BACKEND: str = _env("ALERT_DEDUP_BACKEND", "memory")
+    ALERT_DEDUP_PATH: Path = Path(_env("ALERT_DEDUP_PATH", "data/alert_dedup.db"))
+
+    # Scanner replicas split the events between them (stable hash of arb_event_id)
+    SCANNER_REPLICAS: int = _int("SCANNER_REPLICAS", 1)
+    SCANNER_REPLICA_INDEX: int = _int("SCANNER_REPLICA_INDEX", 0)
+
+    # Pre-alert leg re-verification (core.verify)
+    VERIFY_TIMEOUT_MS: int = _int("VERIFY_TIMEOUT_MS", 4000)
+
     # Settings file path (used by core.settings)
     SETTINGS_FILE: Path = Path(_env("SETTINGS_FILE", "data/settings.json"))
 
@@ -70,5 +81,5 @@ def describe_env() -> str:
     return (
         f"[env={ENVCFG.ENV}] DB={'URL' if bool(ENVCFG.DB_URL) else 'BUILT'} | "
         f"Redis='{ENVCFG.REDIS_URL}' | Broker='{ENVCFG.CELERY_BROKER_URL}' | "
-        f"Settings='{ENVCFG.SETTINGS_FILE}'"
+        f"Settings='{ENVCFG.SETTINGS_FILE}' | Dedup='{ENVCFG.ALERT_DEDUP_BACKEND}'"
     )
@@ -68,6 +68,11 @@ def _ph() -> str:
     return "?" if _is_sqlite() else "%s"
 
 
+def placeholder() -> str:
+    """Parameter marker of the active backend: "?" (SQLite) or "%s" (MySQL)."""
+    return _ph()
+
+
 def _utcnow() -> datetime:
     return datetime.now(tz=timezone.utc)
 
@@ -169,6 +174,22 @@ def init_db() -> None:
             created_at {ts} NOT NULL DEFAULT (CURRENT_TIMESTAMP),
             FOREIGN KEY(arb_event_id) REFERENCES arb_events(id) ON DELETE CASCADE
         )""",
+        # open/update/close transitions written by core.lifecycle (batched)
+        f"""CREATE TABLE IF NOT EXISTS opportunity_lifecycle (
+            id {pk},
+            event_fingerprint VARCHAR(255) NOT NULL,
+            market_key VARCHAR(128) NOT NULL,
+            line VARCHAR(64),
+            arb_event_id INT NOT NULL,
+            transition VARCHAR(16) NOT NULL,
+            legs_hash VARCHAR(64),
+            profit_pct DOUBLE,
+            opened_at {ts} NOT NULL,
+            recorded_at {ts} NOT NULL,
+            lifespan_sec DOUBLE,
+            flap_count INT NOT NULL DEFAULT 0,
+            FOREIGN KEY(arb_event_id) REFERENCES arb_events(id) ON DELETE CASCADE
+        )""",
     ]
 
     with get_cursor() as cur:
@@ -214,6 +235,8 @@ def init_db() -> None:
             cur.execute("CREATE INDEX IF NOT EXISTS idx_odds_bm ON odds(bookmaker_id)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_hist_market_time ON odds_history(market_id, recorded_at)")
             cur.execute("CREATE INDEX IF NOT EXISTS idx_opps_created ON opportunities(created_at)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_lifecycle_key ON opportunity_lifecycle(event_fingerprint, market_key, line)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_lifecycle_recorded ON opportunity_lifecycle(recorded_at)")
             cur.execute(
                 "CREATE UNIQUE INDEX IF NOT EXISTS uniq_opps_event_market_line_legs "
                 "ON opportunities(event_fingerprint, market_key, line, legs_hash)"
@@ -245,6 +268,10 @@ def init_db() -> None:
                          "CREATE INDEX idx_hist_market_time ON odds_history(market_id, recorded_at)")
             ensure_index("idx_opps_created", "opportunities",
                          "CREATE INDEX idx_opps_created ON opportunities(created_at)")
+            ensure_index("idx_lifecycle_key", "opportunity_lifecycle",
+                         "CREATE INDEX idx_lifecycle_key ON opportunity_lifecycle(event_fingerprint, market_key, line)")
+            ensure_index("idx_lifecycle_recorded", "opportunity_lifecycle",
+                         "CREATE INDEX idx_lifecycle_recorded ON opportunity_lifecycle(recorded_at)")
 
             # Best-effort: drop old unique on (event_fingerprint, market_key, created_at) if present
             try:
@@ -545,6 +572,26 @@ def get_latest_odds_for_window(
         return out
 
 
+def get_event_refs(arb_event_id: int) -> List[Dict[str, Any]]:
+    """
+    Per-bookmaker ids for one canonical event (for targeted re-fetches):
+    rows [bookmaker_id, bookmaker_event_id, home_team, away_team, start_time].
+    """
+    ph = _ph()
+    with get_cursor(commit=False) as cur:
+        cur.execute(
+            f"SELECT bem.bookmaker_id, bem.bookmaker_event_id, "
+            f"       th.name AS home_team, ta.name AS away_team, ae.start_time "
+            f"FROM bookmaker_event_map bem "
+            f"JOIN arb_events ae ON ae.id = bem.arb_event_id "
+            f"JOIN teams th ON th.id = ae.home_team_id "
+            f"JOIN teams ta ON ta.id = ae.away_team_id "
+            f"WHERE bem.arb_event_id = {ph}",
+            (arb_event_id,),
+        )
+        return [dict(r) if isinstance(r, sqlite3.Row) else r for r in cur.fetchall()]
+
+
 # =========================================================
 # MISC HELPERS
 # =========================================================
@@ -0,0 +1,200 @@
+# core/dedup.py
+"""
+Alert de-dup store shared across scanner processes.
+
+Every backend implements the same atomic primitive:
+
+    claim(key, ttl) -> True   the caller owns `key` for `ttl` seconds and may send
+                    -> False  someone (this or another process) already claimed it
+
+Backends:
+  • memory  – process-local dict (single scanner, tests)
+  • sqlite  – local file, safe for several scanners on one host
+  • redis   – SET NX EX, safe for scanners on different hosts
+"""
+from __future__ import annotations
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config import ENVCFG
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+_KEY_PREFIX = "alert:dedup:"
+
+
+class DedupStore(ABC):
+    """Base contract for alert claim backends (a backend missing claim/release cannot be constructed)."""
+
+    shared: bool = False  # True if other processes see the same claims
+
+    @abstractmethod
+    def claim(self, key: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    def release(self, key: str) -> None:
+        ...
+
+    def purge(self) -> int:
+        """Drop expired claims; returns number removed (best-effort)."""
+        return 0
+
+
+# ===============================
+# memory (local stand-in)
+# ===============================
+class MemoryDedupStore(DedupStore):
+    def __init__(self) -> None:
+        self._claims: Dict[str, float] = {}  # key -> expires_at
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            exp = self._claims.get(key)
+            if exp is not None and exp > now:
+                return False
+            self._claims[key] = now + float(ttl)
+            return True
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._claims.pop(key, None)
+
+    def purge(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, exp in self._claims.items() if exp <= now]
+            for k in expired:
+                self._claims.pop(k, None)
+        return len(expired)
+
+
+# ===============================
+# sqlite (one host, many processes)
+# ===============================
+class SqliteDedupStore(DedupStore):
+    shared = True
+
+    _PURGE_EVERY_SEC = 300
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._owner = f"{os.getpid()}"
+        self._last_purge = 0.0
+        with self._conn() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS alert_claims ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS idx_alert_claims_exp ON alert_claims(expires_at)")
+
+    def _conn(self) -> sqlite3.Connection:
+        con = sqlite3.connect(str(self.path), timeout=10.0, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL;")
+        con.execute("PRAGMA synchronous=NORMAL;")
+        return con
+
+    def claim(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        con = self._conn()
+        try:
+            # Single statement = atomic across processes: insert, or take over an expired claim.
+            cur = con.execute(
+                "INSERT INTO alert_claims(key, owner, expires_at) VALUES(?,?,?) "
+                "ON CONFLICT(key) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at "
+                "WHERE alert_claims.expires_at <= ?",
+                (key, self._owner, now + float(ttl), now),
+            )
+            won = cur.rowcount == 1
+        finally:
+            con.close()
+        if now - self._last_purge > self._PURGE_EVERY_SEC:
+            self.purge()
+        return won
+
+    def release(self, key: str) -> None:
+        con = self._conn()
+        try:
+            con.execute("DELETE FROM alert_claims WHERE key=?", (key,))
+        finally:
+            con.close()
+
+    def purge(self) -> int:
+        self._last_purge = time.time()
+        con = self._conn()
+        try:
+            cur = con.execute("DELETE FROM alert_claims WHERE expires_at <= ?", (self._last_purge,))
+            return int(cur.rowcount or 0)
+        except Exception as e:
+            logger.warning(f"dedup purge failed: {e}")
+            return 0
+        finally:
+            con.close()
+
+
+# ===============================
+# redis (many hosts)
+# ===============================
+class RedisDedupStore(DedupStore):
+    shared = True
+
+    def __init__(self, url: str) -> None:
+        import redis  # optional dependency; only needed for this backend
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.redis.ping()  # from_url is lazy: fail here so the factory can fall back
+        self._owner = f"{os.getpid()}"
+
+    def claim(self, key: str, ttl: float) -> bool:
+        ms = max(1, int(float(ttl) * 1000))
+        return bool(self.redis.set(_KEY_PREFIX + key, self._owner, nx=True, px=ms))
+
+    def release(self, key: str) -> None:
+        self.redis.delete(_KEY_PREFIX + key)
+
+
+# ===============================
+# factory
+# ===============================
+_STORE: Optional[DedupStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def build_dedup_store(backend: Optional[str] = None) -> DedupStore:
+    backend = (backend or ENVCFG.ALERT_DEDUP_BACKEND or "memory").strip().lower()
+    if backend == "sqlite":
+        return SqliteDedupStore(ENVCFG.ALERT_DEDUP_PATH)
+    if backend == "redis":
+        try:
+            return RedisDedupStore(ENVCFG.REDIS_URL)
+        except Exception as e:
+            logger.error(f"❌ Redis de-dup unavailable ({e}); falling back to sqlite.")
+            return SqliteDedupStore(ENVCFG.ALERT_DEDUP_PATH)
+    return MemoryDedupStore()
+
+
+def get_dedup_store() -> DedupStore:
+    """Process-wide store, built lazily from ALERT_DEDUP_BACKEND."""
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = build_dedup_store()
+    return _STORE
+
+
+def set_dedup_store(store: Optional[DedupStore]) -> None:
+    """Swap the process-wide store (tests, or explicit wiring from main)."""
+    global _STORE
+    with _STORE_LOCK:
+        _STORE = store
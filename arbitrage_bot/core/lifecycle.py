@@ -0,0 +1,224 @@
+# core/lifecycle.py
+"""
+Opportunity lifecycle tracking (opened → updated → closed).
+
+The `opportunities` table only learns about new legs-combos. This tracker keeps the
+set of currently-open arbs in memory, keyed by (event_fingerprint, market_key, line),
+and diffs it against each scan:
+
+  • sync(snapshot)   – full scan; anything open but absent from the snapshot is closed
+  • apply(changes)   – incremental; cost is O(len(changes)), a None value means "gone"
+                       (core.arbitrage feeds it the verifier's verdicts: vanished → closed,
+                       repriced → updated, without waiting for the next full scan)
+
+Transitions are buffered and written in batches to `opportunity_lifecycle`
+(core.db.init_db). Lifespan / flap statistics are kept in memory for tuning
+scan intervals and scraper cadence.
+"""
+from __future__ import annotations
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
+
+from core.db import bulk_execute, placeholder
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+LifecycleKey = Tuple[str, str, Optional[str]]  # (event_fingerprint, market_key, line)
+
+OPENED, UPDATED, CLOSED = "opened", "updated", "closed"
+
+
+@dataclass(frozen=True)
+class ArbObservation:
+    arb_event_id: int
+    legs_hash: str
+    profit_pct: float
+
+
+@dataclass
+class _OpenArb:
+    obs: ArbObservation
+    opened_at: datetime
+    updates: int = 0
+    flaps: int = 0
+
+
+@dataclass(frozen=True)
+class Transition:
+    kind: str                  # opened | updated | closed
+    key: LifecycleKey
+    arb_event_id: int
+    legs_hash: str
+    profit_pct: float
+    opened_at: datetime
+    at: datetime
+    lifespan_sec: float
+    flaps: int
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class OpportunityLifecycle:
+    def __init__(
+        self,
+        flap_window_sec: float = 15 * 60,
+        batch_size: int = 200,
+        flush_interval_sec: float = 30.0,
+        persist: bool = True,
+        recent_closed_max: int = 5000,
+        lifespan_sample: int = 1000,
+    ):
+        self.flap_window_sec = float(flap_window_sec)
+        self.batch_size = int(batch_size)
+        self.flush_interval_sec = float(flush_interval_sec)
+        self.persist = persist
+
+        self._open: Dict[LifecycleKey, _OpenArb] = {}
+        # key -> (closed_at, flaps so far); bounded so long runs do not grow forever
+        self._recent_closed: "OrderedDict[LifecycleKey, Tuple[datetime, int]]" = OrderedDict()
+        self._recent_closed_max = int(recent_closed_max)
+
+        self._buffer: List[Transition] = []
+        self._last_flush = time.monotonic()
+
+        self._counts = {OPENED: 0, UPDATED: 0, CLOSED: 0, "flaps": 0}
+        self._lifespans: Deque[float] = deque(maxlen=int(lifespan_sample))
+        self._lifespan_sum = 0.0
+        self._lifespan_max = 0.0
+
+    # ---------------------------
+    # diffing
+    # ---------------------------
+    def sync(self, snapshot: Mapping[LifecycleKey, ArbObservation], now: Optional[datetime] = None) -> List[Transition]:
+        """Full-scan diff: O(len(snapshot) + open)."""
+        now = now or _utcnow()
+        out: List[Transition] = []
+        for key, obs in snapshot.items():
+            t = self._observe(key, obs, now)
+            if t:
+                out.append(t)
+        for key in [k for k in self._open if k not in snapshot]:
+            out.append(self._close(key, now))
+        self._buffer.extend(out)
+        return out
+
+    def apply(self, changes: Mapping[LifecycleKey, Optional[ArbObservation]], now: Optional[datetime] = None) -> List[Transition]:
+        """Incremental diff: O(len(changes)). A None observation closes the key."""
+        now = now or _utcnow()
+        out: List[Transition] = []
+        for key, obs in changes.items():
+            if obs is None:
+                if key in self._open:
+                    out.append(self._close(key, now))
+                continue
+            t = self._observe(key, obs, now)
+            if t:
+                out.append(t)
+        self._buffer.extend(out)
+        return out
+
+    def _observe(self, key: LifecycleKey, obs: ArbObservation, now: datetime) -> Optional[Transition]:
+        cur = self._open.get(key)
+        if cur is None:
+            flaps = 0
+            prev = self._recent_closed.pop(key, None)
+            if prev and (now - prev[0]).total_seconds() <= self.flap_window_sec:
+                flaps = prev[1] + 1
+                self._counts["flaps"] += 1
+            self._open[key] = _OpenArb(obs=obs, opened_at=now, flaps=flaps)
+            self._counts[OPENED] += 1
+            return self._transition(OPENED, key, obs, now, now, flaps)
+
+        if obs.legs_hash != cur.obs.legs_hash or round(obs.profit_pct, 4) != round(cur.obs.profit_pct, 4):
+            cur.obs = obs
+            cur.updates += 1
+            self._counts[UPDATED] += 1
+            return self._transition(UPDATED, key, obs, cur.opened_at, now, cur.flaps)
+        return None
+
+    def _close(self, key: LifecycleKey, now: datetime) -> Transition:
+        cur = self._open.pop(key)
+        lifespan = max(0.0, (now - cur.opened_at).total_seconds())
+        self._counts[CLOSED] += 1
+        self._lifespans.append(lifespan)
+        self._lifespan_sum += lifespan
+        self._lifespan_max = max(self._lifespan_max, lifespan)
+
+        self._recent_closed[key] = (now, cur.flaps)
+        while len(self._recent_closed) > self._recent_closed_max:
+            self._recent_closed.popitem(last=False)
+        return self._transition(CLOSED, key, cur.obs, cur.opened_at, now, cur.flaps)
+
+    @staticmethod
+    def _transition(kind, key, obs, opened_at, at, flaps) -> Transition:
+        return Transition(
+            kind=kind, key=key, arb_event_id=int(obs.arb_event_id), legs_hash=obs.legs_hash,
+            profit_pct=float(obs.profit_pct), opened_at=opened_at, at=at,
+            lifespan_sec=max(0.0, (at - opened_at).total_seconds()), flaps=flaps,
+        )
+
+    # ---------------------------
+    # persistence (batched)
+    # ---------------------------
+    def flush(self, force: bool = False) -> int:
+        if not self._buffer:
+            return 0
+        due = force or len(self._buffer) >= self.batch_size or \
+            (time.monotonic() - self._last_flush) >= self.flush_interval_sec
+        if not due:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        if not self.persist:
+            return len(batch)
+
+        ph = placeholder()
+        sql = (
+            f"INSERT INTO opportunity_lifecycle(event_fingerprint, market_key, line, arb_event_id, transition, "
+            f"legs_hash, profit_pct, opened_at, recorded_at, lifespan_sec, flap_count) "
+            f"VALUES({ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph},{ph})"
+        )
+        params = [
+            (t.key[0], t.key[1], t.key[2], t.arb_event_id, t.kind, t.legs_hash, t.profit_pct,
+             t.opened_at, t.at, round(t.lifespan_sec, 3), t.flaps)
+            for t in batch
+        ]
+        try:
+            bulk_execute(sql, params)
+        except Exception as e:
+            logger.warning(f"lifecycle flush failed ({len(batch)} rows kept for retry): {e}")
+            self._buffer = batch + self._buffer
+            return 0
+        return len(batch)
+
+    # ---------------------------
+    # observability
+    # ---------------------------
+    def stats(self) -> Dict[str, object]:
+        spans = sorted(self._lifespans)
+
+        def pct(p: float) -> Optional[float]:
+            if not spans:
+                return None
+            return round(spans[min(len(spans) - 1, int(p * len(spans)))], 1)
+
+        closed = self._counts[CLOSED]
+        return {
+            "open": len(self._open),
+            "opened": self._counts[OPENED],
+            "updated": self._counts[UPDATED],
+            "closed": closed,
+            "flaps": self._counts["flaps"],
+            "lifespan_mean_sec": round(self._lifespan_sum / closed, 1) if closed else None,
+            "lifespan_p50_sec": pct(0.5),
+            "lifespan_p90_sec": pct(0.9),
+            "lifespan_max_sec": round(self._lifespan_max, 1) if closed else None,
+            "pending_writes": len(self._buffer),
+        }
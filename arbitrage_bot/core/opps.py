@@ -56,3 +56,9 @@ def persist_opportunity(
 def legs_signature_for_telegram(legs: Dict[str, Dict[str, Any]]) -> str:
     """Expose the same, rounded signature for bot de-dup."""
     return _legs_hash(legs)
+
+def delete_opportunity(row_id: int) -> None:
+    """Forget a persisted legs-combo (e.g. it vanished on verification) so it can alert if it returns."""
+    ph = _ph()
+    with get_cursor() as cur:
+        cur.execute(f"DELETE FROM opportunities WHERE id = {ph}", (int(row_id),))
@@ -36,6 +36,11 @@ DEFAULTS: Dict[str, Any] = {
 
     # Enable 3-leg closed-form combos like AH0(Home)+X+2 (and symmetric)
     "cross_three_leg_enable": True,
+
+    # Alert delivery: "single" (one message per arb) or "digest" (packed, ROI-ordered)
+    "alert_mode": "single",
+    "digest_interval_sec": 0,       # 0 = one digest per scan cycle; N = hold arbs up to N seconds
+    "digest_priority_roi": 5.0,     # ROI % at/above which an arb still gets its own message
 }
 
 # ----------------------
@@ -101,6 +106,10 @@ def _norm_bundles(bundles: Any) -> List[List[str]]:
                     out.append([a, b])
     return out or DEFAULTS["cross_bundles"]
 
+def _norm_alert_mode(mode: Any) -> str:
+    m = str(mode or "").strip().lower()
+    return m if m in ("single", "digest") else DEFAULTS["alert_mode"]
+
 # -------------
 # Settings type
 # -------------
@@ -123,6 +132,11 @@ class Settings:
     cross_bundles: List[List[str]] = field(default_factory=list)
     cross_three_leg_enable: bool = True
 
+    # Alert delivery
+    alert_mode: str = "single"
+    digest_interval_sec: int = 0
+    digest_priority_roi: float = 5.0
+
     @staticmethod
     def validate(d: Dict[str, Any]) -> "Settings":
         merged = {**DEFAULTS, **(d or {})}
@@ -139,12 +153,25 @@ class Settings:
             markets=_norm_market_keys(list(merged.get("markets", []))),
             cross_bundles=_norm_bundles(merged.get("cross_bundles")),
             cross_three_leg_enable=bool(merged.get("cross_three_leg_enable", DEFAULTS["cross_three_leg_enable"])),
+            alert_mode=_norm_alert_mode(merged.get("alert_mode")),
+            digest_interval_sec=max(0, int(merged["digest_interval_sec"])),
+            digest_priority_roi=float(merged["digest_priority_roi"]),
         )
 
 # -----------------
 # Load / Save API
 # -----------------
+# Settings pushed over IPC (core.bot_process); when set, served instead of re-reading the file
+_PUSHED: Optional[Settings] = None
+
+def push_settings(s: Optional[Settings]) -> None:
+    """Install settings received from another process (None = go back to the file)."""
+    global _PUSHED
+    _PUSHED = Settings.validate(asdict(s)) if s is not None else None
+
 def load_settings() -> Settings:
+    if _PUSHED is not None:
+        return Settings.validate(asdict(_PUSHED))  # copy: callers may mutate
     if SETTINGS_FILE.exists():
         try:
             raw = json.loads(SETTINGS_FILE.read_text())
@@ -159,6 +186,8 @@ def load_settings() -> Settings:
 
 def save_settings(s: Settings) -> None:
     SETTINGS_FILE.write_text(json.dumps(asdict(s), indent=2))
+    if _PUSHED is not None:
+        push_settings(s)
 
 # -----------------
 # Convenience APIs
@@ -4,7 +4,8 @@ import html
 import time
 import requests
 import hashlib
-from typing import Iterable, Optional, Dict, Any, List
+import uuid
+from typing import Callable, Iterable, Optional, Dict, Any, List, Tuple
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
@@ -16,6 +17,7 @@ from core.settings import load_settings, save_settings, get_scan_interval
 from core.logger import get_logger
 from core.db import get_cursor  # for bookmaker & event lookups
 from core.calculator import calculate_stakes  # stake split if not attached
+from core.dedup import get_dedup_store
 
 logger = get_logger(__name__)
 
@@ -107,13 +109,41 @@ def _chunks(texts: List[str], max_len: int = 3500) -> List[str]:
         out.append(cur)
     return out
 
+# ===============================
+# IPC hooks (core.bot_process)
+# ===============================
+# Scanner side: alerts are handed to the bot process instead of posted from here.
+# Called as sink(message, chat_ids) or sink(message, chat_ids, alert_id); the bot
+# reports the outcome of an id'd alert back through settle_alert().
+_ALERT_SINK: Optional[Callable[..., None]] = None
+# Bot side: settings changed by a command are pushed to the scanner.
+_SETTINGS_LISTENER: Optional[Callable[[Any], None]] = None
+# Bot side: last status pushed by the scanner (shown by /status).
+_SCANNER_STATUS: Dict[str, Any] = {}
+
+def set_alert_sink(fn: Optional[Callable[..., None]]) -> None:
+    global _ALERT_SINK
+    _ALERT_SINK = fn
+
+def set_settings_listener(fn: Optional[Callable[[Any], None]]) -> None:
+    global _SETTINGS_LISTENER
+    _SETTINGS_LISTENER = fn
+
+def update_scanner_status(status: Dict[str, Any]) -> None:
+    _SCANNER_STATUS.clear()
+    _SCANNER_STATUS.update(status or {})
+
 def send_telegram_alert(message: str,
                         chat_ids: Optional[Iterable[str]] = None,
                         retries: int = 3,
-                        backoff: float = 2.0) -> None:
+                        backoff: float = 2.0) -> bool:
+    """True if at least one chat received the whole message (or it was handed to the bot process)."""
+    if _ALERT_SINK is not None:
+        _ALERT_SINK(message, list(chat_ids) if chat_ids else None)
+        return True
     if not TOKEN or not (chat_ids or CHAT_IDS):
         logger.error("❌ Missing Telegram credentials or chat IDs.")
-        return
+        return False
 
     url = f"https://api.telegram.org/bot{TOKEN}/sendMessage"
     targets = list(chat_ids or CHAT_IDS)
@@ -122,7 +152,9 @@ def send_telegram_alert(message: str,
     if len(message) > TG_MAX:
         parts = _chunks(message.split("\n\n"), max_len=3500)
 
+    delivered = False
     for chat_id in targets:
+        chat_ok = True
         for part in parts:
             data = {
                 "chat_id": chat_id,
@@ -153,7 +185,10 @@ def send_telegram_alert(message: str,
                 if attempt < retries:
                     time.sleep(backoff * attempt)
             else:
+                chat_ok = False
                 logger.error(f"❌ Failed to send Telegram alert to {chat_id} after retries.")
+        delivered = delivered or chat_ok
+    return delivered
 
 # ===============================
 # Formatting helpers
@@ -271,9 +306,8 @@ def format_opp_pretty(opp) -> str:
     return "\n".join(header + footer)
 
 # ===============================
-# In-memory de-dup (DB-consistent hash)
+# De-dup (DB-consistent hash, claimed in core.dedup store)
 # ===============================
-_seen_hashes: Dict[str, float] = {}
 _DEDUP_TTL_SEC = 30 * 60
 
 def _opp_hash(opp) -> str:
@@ -287,20 +321,79 @@ def _opp_hash(opp) -> str:
         sig = hashlib.sha1(parts.encode("utf-8")).hexdigest()[:16]
     return f"{opp.arb_event_id}|{str(opp.market_name)}|{str(opp.line or '')}|{sig}"
 
+def _claim_opp(opp) -> bool:
+    """Atomically claim this alert across all scanner processes sharing the store."""
+    try:
+        return get_dedup_store().claim(_opp_hash(opp), _DEDUP_TTL_SEC)
+    except Exception as e:
+        # store down → prefer a possible duplicate over a lost alert
+        logger.warning(f"de-dup claim failed ({e}); sending anyway.")
+        return True
+
+def _release_key(key: str) -> None:
+    try:
+        get_dedup_store().release(key)
+    except Exception as e:
+        logger.warning(f"de-dup release failed ({e}); alert held until its claim expires.")
+
+def _release_opp(opp) -> None:
+    """Give a claim back after a failed send so the next scan (or another scanner) can retry it."""
+    _release_key(_opp_hash(opp))
+
+# Alerts handed to the bot process, awaiting its verdict: alert id -> (queued at, claim keys)
+_SINK_PENDING: Dict[str, Tuple[float, List[str]]] = {}
+
+def settle_alert(alert_id: str, delivered: bool) -> None:
+    """Bot process verdict on a queued alert: a failed one gives its claims back."""
+    entry = _SINK_PENDING.pop(alert_id, None)
+    if entry is None or delivered:
+        return
+    logger.warning(f"⚠️ Bot process failed to deliver an alert; releasing {len(entry[1])} claim(s).")
+    for key in entry[1]:
+        _release_key(key)
+
+def _hand_to_sink(message: str, opps: List[Any]) -> bool:
+    """Queue for the bot process; the claims stay pending until it reports back (settle_alert)."""
+    now = time.monotonic()
+    # verdicts never arrive for alerts lost with a crashed child; their claims expire anyway
+    for aid in [a for a, (at, _) in _SINK_PENDING.items() if now - at > _DEDUP_TTL_SEC]:
+        _SINK_PENDING.pop(aid, None)
+    alert_id = uuid.uuid4().hex
+    _SINK_PENDING[alert_id] = (now, [_opp_hash(o) for o in opps])
+    try:
+        _ALERT_SINK(message, None, alert_id)
+    except Exception:
+        _SINK_PENDING.pop(alert_id, None)
+        raise
+    return True
+
+def _send_claimed(message: str, opps: List[Any]) -> bool:
+    """
+    Send one message covering already-claimed opps; their claims are released if it
+    fails. With the bot process this is "queued": a later delivery failure reported
+    by the child releases the claims then.
+    """
+    try:
+        ok = _hand_to_sink(message, opps) if _ALERT_SINK is not None else send_telegram_alert(message)
+    except Exception as e:
+        logger.warning(f"alert send failed: {e}")
+        ok = False
+    if not ok:
+        for o in opps:
+            _release_opp(o)
+    return ok
+
 def send_opportunity(opp) -> bool:
-    h = _opp_hash(opp)
-    now = time.time()
-    for k, ts in list(_seen_hashes.items()):
-        if now - ts > _DEDUP_TTL_SEC:
-            _seen_hashes.pop(k, None)
-    if h in _seen_hashes:
+    if not _claim_opp(opp):
         logger.info("⏭️ Skipping duplicate opportunity alert.")
         return False
-    _seen_hashes[h] = now
 
-    msg = format_opp_pretty(opp)
-    send_telegram_alert(msg)
-    return True
+    try:
+        msg = format_opp_pretty(opp)
+    except Exception:
+        _release_opp(opp)
+        raise
+    return _send_claimed(msg, [opp])
 
 def send_opportunities(opps) -> int:
     sent = 0
@@ -309,6 +402,123 @@ def send_opportunities(opps) -> int:
             sent += 1
     return sent
 
+# ===============================
+# Digest mode (many arbs per message)
+# ===============================
+def format_opp_compact(opp) -> str:
+    """Few-line block for digests: teams/market/KO, legs, profit/ROI."""
+    meta = _event_meta(int(opp.arb_event_id))
+    market_title = str(opp.market_name) + (f" {opp.line}" if opp.line else "")
+    legs = []
+    for o, leg in opp.legs.items():
+        bm = _resolve_bookmaker(int(leg["bookmaker_id"]))
+        bm_name = bm.get("name") or f"Book {bm.get('id')}"
+        legs.append(f"{_esc(o)} ➤ {float(leg['odds']):.2f} ({_esc(bm_name)})")
+    return "\n".join([
+        f"🏟 {_esc(meta['home'])} vs {_esc(meta['away'])} — {_esc(market_title)}",
+        f"📅 {_esc(_fmt_ko(opp.start_time))}",
+        " · ".join(legs),
+        f"🟢 {float(getattr(opp, 'profit', 0.0)):.2f} KES | 📈 {float(getattr(opp, 'roi', 0.0)):.2f}%",
+    ])
+
+def _send_digest(opps: List[Any], priority_roi: Optional[float]) -> int:
+    """Send already-claimed opps: top-priority ones alone, the rest packed ≤ TG_MAX per message."""
+    if not opps:
+        return 0
+    ordered = sorted(opps, key=lambda o: (-float(getattr(o, "roi", 0.0)), o.start_time))
+    top, rest = [], []
+    for o in ordered:
+        if priority_roi is not None and float(getattr(o, "roi", 0.0)) >= float(priority_roi):
+            top.append(o)
+        else:
+            rest.append(o)
+
+    delivered = 0
+    for o in top:
+        if _send_claimed(format_opp_pretty(o), [o]):
+            delivered += 1
+
+    if rest:
+        # (text, opp) blocks packed ≤ TG_MAX per message, tracking which opps each message carries
+        formatted: List[Tuple[str, Optional[Any]]] = []
+        for o in rest:
+            try:
+                formatted.append((format_opp_compact(o), o))
+            except Exception as e:
+                _release_opp(o)
+                logger.warning(f"digest format failed for arb_event_id={getattr(o, 'arb_event_id', '?')}: {e}")
+        if not formatted:
+            return delivered
+        n = len(formatted)
+        blocks = [(f"📦 Arbitrage Digest — {n} opportunit{'y' if n == 1 else 'ies'} (ROI ↓)", None)] + formatted
+        messages: List[Tuple[str, List[Any]]] = []
+        for text, o in blocks:
+            if messages and len(messages[-1][0]) + 2 + len(text) <= TG_MAX:
+                messages[-1] = (messages[-1][0] + "\n\n" + text, messages[-1][1])
+            else:
+                messages.append((text, []))
+            if o is not None:
+                messages[-1][1].append(o)
+        for text, carried in messages:
+            if _send_claimed(text, carried):
+                delivered += len(carried)
+        logger.info(f"📦 Digest: {n} arbs in {len(messages)} message(s), {len(top)} priority single(s).")
+    return delivered
+
+def send_opportunities_digest(opps, priority_roi: Optional[float] = None) -> int:
+    """Claim (de-dup) and deliver in digest form right away. Returns arbs delivered."""
+    claimed = [o for o in opps if _claim_opp(o)]
+    return _send_digest(claimed, priority_roi)
+
+class DigestBuffer:
+    """
+    Holds claimed opportunities for up to `interval_sec`, then sends them as one digest.
+    interval_sec <= 0 means "flush on every call" (per scan cycle).
+    """
+
+    def __init__(self, interval_sec: float = 0.0):
+        self.interval_sec = float(interval_sec)
+        self._pending: List[Any] = []
+        self._opened_at: Optional[float] = None
+
+    def add(self, opps) -> int:
+        n = 0
+        for o in opps:
+            if _claim_opp(o):
+                self._pending.append(o)
+                n += 1
+        if self._pending and self._opened_at is None:
+            self._opened_at = time.time()
+        return n
+
+    def due(self) -> bool:
+        if not self._pending:
+            return False
+        return self.interval_sec <= 0 or (time.time() - (self._opened_at or 0.0)) >= self.interval_sec
+
+    def flush(self, priority_roi: Optional[float] = None, force: bool = False) -> int:
+        if not self._pending or not (force or self.due()):
+            return 0
+        batch, self._pending, self._opened_at = self._pending, [], None
+        return _send_digest(batch, priority_roi)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+_DIGEST = DigestBuffer()
+
+def queue_digest(opps, interval_sec: float, priority_roi: Optional[float] = None) -> int:
+    """
+    Claim + buffer opps in the process-wide digest and flush if its window elapsed.
+    Returns the arbs delivered by that flush (0 while they are still buffered).
+    """
+    _DIGEST.interval_sec = float(interval_sec)
+    _DIGEST.add(opps)
+    return _DIGEST.flush(priority_roi=priority_roi)
+
+def flush_digest(priority_roi: Optional[float] = None) -> int:
+    return _DIGEST.flush(priority_roi=priority_roi, force=True)
+
 # ===============================
 # BOT COMMANDS
 # ===============================
@@ -326,6 +536,8 @@ def stake(update: Update, context: CallbackContext):
         s = load_settings()
         s.stake = new_stake
         save_settings(s)
+        if _SETTINGS_LISTENER is not None:
+            _SETTINGS_LISTENER(s)
         update.message.reply_text(f"✅ Stake updated to {int(new_stake):,} KES.")
         logger.info(f"Stake updated to {new_stake} by user {update.effective_chat.id}")
     except Exception:
@@ -388,12 +600,20 @@ def status_command(update: Update, context: CallbackContext):
         scan_interval = get_scan_interval()
     except Exception:
         scan_interval = s.scan_interval
-    update.message.reply_text(
+    text = (
         "📊 Bot Status:\n"
         f"• Stake: {int(s.stake):,} KES\n"
         f"• Scan interval: {scan_interval} seconds\n"
         f"• Authorized users: {len(CHAT_IDS)}"
     )
+    st = dict(_SCANNER_STATUS)
+    if st:
+        text += (
+            f"\n• Scanner: pid {st.get('pid', '?')}, {st.get('cycles', 0)} cycle(s)\n"
+            f"• Last cycle: {st.get('last_cycle_at', '—')} ({st.get('last_sent', 0)} sent)\n"
+            f"• Alerts sent: {st.get('total_sent', 0)}"
+        )
+    update.message.reply_text(text)
 
 # ===============================
 # RUN BOT / TEST
@@ -409,14 +629,15 @@ def send_welcome_test() -> None:
     send_telegram_alert(msg)
 
 def run_bot():
+    """Start polling (non-blocking in v13); returns the Updater, or None if it could not start."""
     if not TOKEN:
         logger.error("❌ TELEGRAM_BOT_TOKEN missing.")
-        return
+        return None
     try:
         updater = Updater(TOKEN, use_context=True)  # v13 style
     except Exception as e:
         logger.error(f"❌ Failed to init Telegram Updater: {e}")
-        return
+        return None
 
     dp = updater.dispatcher
     dp.add_handler(CommandHandler("start", start))
@@ -426,6 +647,7 @@ def run_bot():
 
     logger.info(f"🤖 Telegram Bot running with {len(CHAT_IDS)} authorized users.")
     updater.start_polling()
+    return updater
 
 if __name__ == "__main__":
     import argparse
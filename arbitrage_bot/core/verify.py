@@ -0,0 +1,224 @@
+# core/verify.py
+"""
+Pre-alert leg re-verification.
+
+Before an opportunity is alerted, re-fetch ONLY the bookmaker markets behind its
+legs (one detail request per bookmaker event, all concurrent, tight timeout),
+recompute the arb on the fresh prices with the calculator's own enumerator, and
+drop it if it vanished (the bookmaker answered without any markets, or the fresh
+prices no longer make an arb). A leg whose market/outcome cannot be found in an
+otherwise non-empty answer (label mapping is heuristic) keeps its DB price.
+
+Scrapers are injected (anything exposing `bookmaker_id`, `supports_event_refresh`
+and `async refresh_event(event_id, stub, timeout)`), entered once on a private
+event loop thread and kept open so every verification reuses the warm httpx client.
+"""
+from __future__ import annotations
+import asyncio
+import threading
+from dataclasses import replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.calculator import Leg, Opportunity, best_per_market, recompute_event
+from core.config import ENVCFG
+from core.db import get_event_refs
+from core.logger import get_logger
+from core.markets import MarketSpec, normalize_market
+
+logger = get_logger(__name__)
+
+# (market_key, sibling line, outcome) as read by calculator.recompute_event
+LegSlot = Tuple[str, Optional[str], str]
+# bookmaker_id -> market_key -> outcome -> odds   (None = fetch failed, keep DB price)
+FreshPrices = Dict[int, Optional[Dict[str, Dict[str, float]]]]
+
+
+def _leg_slot(opp: Opportunity, label: str) -> LegSlot:
+    """Map an Opportunity leg label back to where the enumerator reads it."""
+    name = (opp.market_name or "").strip()
+    if label.startswith("AH0 "):                    # 3-leg: "AH0 Home" + X + 2
+        return ("ah:0", None, label[4:])
+    if " + " in name:
+        if ":" in label:                            # cross pair: "ah:0:Home", "dc:X2"
+            mk, outcome = label.rsplit(":", 1)
+            return (mk, None, outcome)
+        return ("1x2", None, label.upper())         # 3-leg 1X2 legs
+    if label in ("Home", "Away"):                   # AH0 two-way (label text does not round-trip)
+        return ("ah:0", None, label)
+    ms = normalize_market(name)
+    if ms.market_key.startswith("ou:"):
+        return (ms.market_key, ms.line, label)
+    if ms.market_key == "1x2":
+        return ("1x2", None, label.upper())
+    return (ms.market_key, None, label)
+
+
+def _fresh_from_norms(bookmaker_id: int, norms: List[dict], home: str, away: str) -> Dict[str, Dict[str, float]]:
+    """Normalized scraper dicts → market_key -> canonical outcome -> odds (calculator mapping)."""
+    out: Dict[str, Dict[str, float]] = {}
+    for n in norms:
+        mk = n.get("market_key")
+        if not mk:
+            continue
+        ms = MarketSpec(mk, n.get("market_line"), list(n.get("outcomes_norm") or []))
+        rows = [
+            {"outcome": o, "value": v, "bookmaker_id": bookmaker_id, "home_team": home, "away_team": away}
+            for o, v in (n.get("odds") or {}).items()
+        ]
+        for lab, leg in best_per_market(rows, ms).items():
+            out.setdefault(mk, {})[lab] = leg.odds
+    return out
+
+
+class LegVerifier:
+    def __init__(self, scrapers: Iterable[Any], timeout: Optional[float] = None):
+        self.timeout = float(timeout if timeout is not None else ENVCFG.VERIFY_TIMEOUT_MS / 1000.0)
+        self._scrapers: Dict[int, Any] = {}
+        for s in scrapers or []:
+            if getattr(s, "supports_event_refresh", False) and getattr(s, "bookmaker_id", None):
+                self._scrapers[int(s.bookmaker_id)] = s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"checked": 0, "confirmed": 0, "repriced": 0, "suppressed": 0,
+                      "fetch_failed": 0, "unresolved_legs": 0}
+
+    # ---------------------------
+    # lifecycle
+    # ---------------------------
+    def start(self) -> "LegVerifier":
+        if self._loop or not self._scrapers:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="leg-verifier", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._enter_all(), self._loop).result(timeout=60)
+        logger.info(f"🔎 Leg verifier ready for bookmaker ids {sorted(self._scrapers)}.")
+        return self
+
+    async def _enter_all(self) -> None:
+        for bm_id, s in list(self._scrapers.items()):
+            try:
+                await s.__aenter__()
+            except Exception as e:
+                logger.warning(f"leg verifier: {getattr(s, 'bookmaker', bm_id)} unavailable: {e}")
+                self._scrapers.pop(bm_id, None)
+
+    async def _cleanup_all(self) -> None:
+        for s in self._scrapers.values():
+            try:
+                await s.cleanup()
+            except Exception:
+                pass
+
+    def close(self) -> None:
+        if not self._loop:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cleanup_all(), self._loop).result(timeout=30)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._loop.close()
+        self._loop = self._thread = None
+
+    # ---------------------------
+    # verification
+    # ---------------------------
+    def verify(self, opps: List[Opportunity]) -> List[Opportunity]:
+        """Return the opps that still hold on fresh prices (repriced in place of the stale ones)."""
+        return [o for o in self.verify_each(opps) if o is not None]
+
+    def verify_each(self, opps: List[Opportunity]) -> List[Optional[Opportunity]]:
+        """
+        Aligned with `opps`: the same object if confirmed, a repriced copy, or None if it
+        vanished. On timeout/failure every opp comes back unchanged.
+        """
+        if not opps or not self._loop:
+            return list(opps or [])
+        fut = asyncio.run_coroutine_threadsafe(self._verify_all(opps), self._loop)
+        try:
+            return fut.result(timeout=self.timeout + 5.0)
+        except Exception as e:
+            logger.warning(f"leg verification skipped ({e}); alerting on DB prices.")
+            fut.cancel()
+            return list(opps)
+
+    async def _verify_all(self, opps: List[Opportunity]) -> List[Optional[Opportunity]]:
+        # One request per (bookmaker, bookmaker_event) across the whole batch
+        wanted: Dict[Tuple[int, int], Dict[str, Any]] = {}
+        for opp in opps:
+            bms = {int(leg["bookmaker_id"]) for leg in opp.legs.values()}
+            try:
+                refs = await asyncio.to_thread(get_event_refs, int(opp.arb_event_id))
+            except Exception as e:
+                logger.warning(f"leg verifier: refs lookup failed for {opp.arb_event_id}: {e}")
+                continue
+            for r in refs:
+                bm = int(r["bookmaker_id"])
+                if bm in bms and bm in self._scrapers:
+                    wanted[(int(opp.arb_event_id), bm)] = r
+
+        async def _one(key, ref):
+            s = self._scrapers[key[1]]
+            stub = {"home_team": ref.get("home_team") or "", "away_team": ref.get("away_team") or "",
+                    "start_time": ref.get("start_time")}
+            norms = await s.refresh_event(ref["bookmaker_event_id"], stub=stub, timeout=self.timeout)
+            if norms is None:
+                return key, None
+            return key, _fresh_from_norms(key[1], norms, stub["home_team"], stub["away_team"])
+
+        results = await asyncio.gather(*(_one(k, r) for k, r in wanted.items()), return_exceptions=True)
+        fresh: Dict[int, FreshPrices] = {}
+        for res in results:
+            if isinstance(res, Exception):
+                continue
+            (ev, bm), prices = res
+            if prices is None:
+                self.stats["fetch_failed"] += 1
+            fresh.setdefault(ev, {})[bm] = prices
+
+        out: List[Optional[Opportunity]] = []
+        for opp in opps:
+            self.stats["checked"] += 1
+            again = self._recompute(opp, fresh.get(int(opp.arb_event_id), {}))
+            if again is None:
+                self.stats["suppressed"] += 1
+                logger.info(f"🚫 Arb vanished on re-fetch: event={opp.arb_event_id} {opp.market_name} {opp.line or ''}")
+            elif again is opp:
+                self.stats["confirmed"] += 1
+            else:
+                self.stats["repriced"] += 1
+            out.append(again)
+        return out
+
+    def _recompute(self, opp: Opportunity, fresh: FreshPrices) -> Optional[Opportunity]:
+        sibling_bests: Dict[tuple, Dict[str, Leg]] = {}
+        changed = False
+        for label, leg in opp.legs.items():
+            mk, line, outcome = _leg_slot(opp, label)
+            bm = int(leg["bookmaker_id"])
+            odds = float(leg["odds"])
+            if bm in fresh and fresh[bm] is not None:
+                if not fresh[bm]:
+                    return None  # bookmaker answered with no markets at all: the event is off the board
+                price = (fresh[bm].get(mk) or {}).get(outcome)
+                if price is None:
+                    # unresolved slot (suspended market or a label we cannot map): keep the DB price
+                    self.stats["unresolved_legs"] += 1
+                    logger.info(f"leg verifier: no fresh price for event={opp.arb_event_id} bm={bm} "
+                                f"{mk}/{outcome}; keeping DB odds {odds}.")
+                elif abs(price - odds) > 1e-9:
+                    odds, changed = float(price), True
+            sibling_bests.setdefault((mk, line), {})[outcome] = Leg(bookmaker_id=bm, outcome=outcome, odds=odds)
+
+        if not changed:
+            return opp
+
+        candidates = recompute_event(int(opp.arb_event_id), opp.start_time, sibling_bests)
+        for c in candidates:
+            if c.market_name == opp.market_name and c.line == opp.line and set(c.legs) == set(opp.legs):
+                return replace(opp, odds=c.odds, legs=c.legs, profit=c.profit, roi=c.roi,
+                               margin=c.margin, stakes=c.stakes)
+        return None
@@ -5,23 +5,25 @@ import sys
 import time
 import signal
 import atexit
-import threading
 import traceback
 from pathlib import Path
 from typing import List, Optional
 
 from core.logger import get_logger, log_error, log_info, log_success
-from core.settings import load_settings, get_scan_interval, get_target_markets
+from core.settings import load_settings, push_settings, get_scan_interval, get_target_markets
 from core.db import init_db, resolve_sport_id
-from core.arbitrage import scan_and_alert_db
-from core.telegram import run_bot
+from core.arbitrage import scan_and_alert_db, flush_lifecycle
+from core.telegram import flush_digest, set_alert_sink
+from core.bot_process import BotSupervisor
+from core.verify import LegVerifier
+from core.dedup import get_dedup_store
+from core.config import ENVCFG
 
 # Optional: use your scraper orchestrator per cycle (so fresh odds land in DB)
 from scrapers.scraper_loader import discover_scrapers
 from scrapers.orchestrator import ScraperOrchestrator
-from scrapers.base_scraper import BaseScraper
+from scrapers.local_runner import LOCAL_ONLY, run_local
 from scrapers.async_base_scraper import AsyncBaseScraper
-import asyncio
 
 LOG = get_logger(__name__)
 
@@ -71,8 +73,11 @@ def _parse_args():
     ap.add_argument("--limit", type=int, default=10, help="Max Telegram alerts to send per scan.")
     ap.add_argument("--interval", type=int, default=None, help="Scan interval seconds (default: settings.scan_interval).")
     ap.add_argument("--loop", action="store_true", help="Run continuously.")
-    ap.add_argument("--no-bot", action="store_true", help="Do not start Telegram bot thread.")
+    ap.add_argument("--no-bot", action="store_true", help="Do not start the Telegram bot process.")
     ap.add_argument("--scrape-each-cycle", action="store_true", help="Run scrapers before each scan (writes fresh odds to DB).")
+    ap.add_argument("--verify-legs", action="store_true", help="Re-fetch each new arb's leg markets and drop vanished arbs before alerting.")
+    ap.add_argument("--replicas", type=int, default=ENVCFG.SCANNER_REPLICAS, help="Scanner replicas splitting the events (SCANNER_REPLICAS).")
+    ap.add_argument("--replica-index", type=int, default=ENVCFG.SCANNER_REPLICA_INDEX, help="This replica's index, 0-based (SCANNER_REPLICA_INDEX).")
     return ap.parse_args()
 
 # -------------------------
@@ -90,51 +95,71 @@ def _run_scrapers_once() -> int:
         log_error("❌ No valid scrapers discovered.")
         return 0
 
-    # Try orchestrator first
+    # Try orchestrator first (unless SCRAPER_LOCAL_ONLY=1: no Celery/Redis here)
+    if not LOCAL_ONLY:
+        try:
+            orch = ScraperOrchestrator(scrapers)
+            # Stream: each bookmaker is reported as it lands, matches are not held in memory
+            result = orch.run(on_result=lambda bookmaker, matches: log_info(f"📥 {bookmaker}: {len(matches)} entries."))
+            n = sum((result.get("match_counts") or {}).values()) if isinstance(result, dict) else 0
+            log_success(f"✅ Orchestrator executed. Entries: {n}")
+            return n
+        except Exception as e:
+            log_error(f"⚠️ Orchestrator failed ({e}); falling back to local execution.")
+
+    # Fallback: every scraper concurrently on one local event loop
     try:
-        orch = ScraperOrchestrator(scrapers)
-        result = orch.run()
-        n = len(result.get("matches", [])) if isinstance(result, dict) else 0
-        log_success(f"✅ Orchestrator executed. Entries: {n}")
-        return n
+        result = run_local(scrapers)
     except Exception as e:
-        log_error(f"⚠️ Orchestrator failed ({e}); falling back to direct execution.")
+        log_error(f"❌ Local scraper run failed: {e}")
+        traceback.print_exc()
+        return 0
 
-    # Fallback direct exec (sync/async)
-    total = 0
-    for s in scrapers:
-        try:
-            if isinstance(s, BaseScraper):
-                entries = s.get_odds()
-            elif isinstance(s, AsyncBaseScraper):
-                entries = asyncio.run(s.get_odds())
-            else:
-                log_error(f"❌ Unknown scraper type: {type(s)}")
-                continue
-            n = len(entries or [])
-            total += n
-            if n:
-                log_info(f"✅ {s.bookmaker} produced {n} entries (fallback).")
-            else:
-                log_info(f"⚠️ {s.bookmaker} produced no entries.")
-        except Exception as ex:
-            log_error(f"❌ Fallback scraper {getattr(s, 'bookmaker', '<?>')} failed: {ex}")
-            traceback.print_exc()
-    return total
-
-# -------------------------
-# Telegram bot thread
-# -------------------------
-def _start_bot_thread():
-    def _runner():
-        try:
-            log_info("🤖 Starting Telegram bot…")
-            run_bot()  # blocking
-        except Exception as e:
-            log_error(f"⚠️ Telegram bot crashed: {e}")
-    t = threading.Thread(target=_runner, name="telegram-bot", daemon=True)
-    t.start()
-    return t
+    for name, r in sorted(result["results"].items(), key=lambda kv: -kv[1]["seconds"]):
+        if r["status"] != "OK":
+            log_error(f"❌ {name}: {r['status']} after {r['seconds']}s ({r['error']})")
+        elif r["entries"]:
+            log_info(f"✅ {name} produced {r['entries']} entries in {r['seconds']}s (local).")
+        else:
+            log_info(f"⚠️ {name} produced no entries ({r['seconds']}s).")
+    log_success(f"✅ Local run finished in {result['elapsed_s']}s. Entries: {result['entries']}")
+    return result["entries"]
+
+# -------------------------
+# Optional: pre-alert leg verifier
+# -------------------------
+def _start_verifier() -> Optional[LegVerifier]:
+    """Keep one warm instance per refresh-capable async scraper for targeted re-fetches."""
+    try:
+        scrapers = [s for s in discover_scrapers() if isinstance(s, AsyncBaseScraper)]
+        return LegVerifier(scrapers).start()
+    except Exception as e:
+        log_error(f"⚠️ Leg verifier unavailable ({e}); alerting on DB prices.")
+        return None
+
+# -------------------------
+# Telegram bot process
+# -------------------------
+def _start_bot_process() -> Optional[BotSupervisor]:
+    """Run the bot in a supervised child process; alerts are routed to it over IPC."""
+    try:
+        bot = BotSupervisor().start()
+    except Exception as e:
+        log_error(f"⚠️ Telegram bot process failed to start ({e}); alerts will be posted in-process.")
+        return None
+    set_alert_sink(bot.send_alert)
+    # From here on settings arrive from the bot over IPC instead of being re-read each scan
+    push_settings(load_settings())
+    return bot
+
+def _stop_bot_process(bot: Optional[BotSupervisor]) -> None:
+    if bot is None:
+        return
+    set_alert_sink(None)
+    try:
+        bot.stop()
+    except Exception as e:
+        log_error(f"⚠️ Telegram bot process stop failed: {e}")
 
 # -------------------------
 # Resolve sport
@@ -155,6 +180,8 @@ def _scan_once(
     markets: List[str],
     limit: int,
     scrape_before: bool,
+    verifier: Optional[LegVerifier] = None,
+    partition: Optional[tuple] = None,
 ) -> int:
     if scrape_before:
         _ = _run_scrapers_once()
@@ -166,6 +193,8 @@ def _scan_once(
             market_names=markets,
             max_send=limit,
             sport_name=None,  # already resolved id
+            verifier=verifier,
+            partition=partition,
         )
         return int(sent or 0)
     except Exception as e:
@@ -180,8 +209,24 @@ def main():
     s = load_settings()
     init_db()
 
+    # Replicas split the events (--replicas/--replica-index); the shared de-dup store only
+    # guards alerts, e.g. while replicas are resized. One unpartitioned scanner without a
+    # shared store keeps the single-instance lock.
+    replicas = max(1, int(args.replicas))
+    if not 0 <= args.replica_index < replicas:
+        log_error(f"❌ --replica-index must be in [0, {replicas - 1}] (got {args.replica_index}).")
+        raise SystemExit(2)
+    partition = (args.replica_index, replicas) if replicas > 1 else None
     if args.loop:
-        _write_lock()
+        store = get_dedup_store()
+        if replicas > 1:
+            log_info(f"🧩 Replica {args.replica_index + 1}/{replicas}: scanning this replica's share of events "
+                     f"(de-dup: {type(store).__name__}).")
+        elif store.shared:
+            log_info(f"🔓 Shared alert de-dup ({type(store).__name__}); running without single-instance lock. "
+                     f"Unpartitioned scanners each scan everything — set SCANNER_REPLICAS to split the work.")
+        else:
+            _write_lock()
 
     # config
     interval = int(args.interval) if args.interval is not None else int(get_scan_interval())
@@ -195,23 +240,43 @@ def main():
         f"   loop={bool(args.loop)}, interval={interval}s, scrape_each_cycle={bool(args.scrape_each_cycle)}"
     )
 
-    # Start Telegram bot thread unless disabled
-    if not args.no_bot:
-        _start_bot_thread()
+    # Start Telegram bot process unless disabled
+    bot = None if args.no_bot else _start_bot_process()
+
+    verifier = _start_verifier() if args.verify_legs else None
 
     if not args.loop:
-        sent = _scan_once(resolved_sport_id, args.hours, markets, args.limit, args.scrape_each_cycle)
+        try:
+            sent = _scan_once(resolved_sport_id, args.hours, markets, args.limit, args.scrape_each_cycle, verifier,
+                              partition)
+            flush_lifecycle(force=True)
+            sent += flush_digest(priority_roi=s.digest_priority_roi)
+        finally:
+            if verifier:
+                verifier.close()
+            _stop_bot_process(bot)
         log_success(f"✅ One-shot scan complete. Alerts sent: {sent}")
         return
 
     # Loop mode
     total_sent = 0
+    cycles = 0
     try:
         while not _STOP:
             cycle_start = time.time()
-            sent = _scan_once(resolved_sport_id, args.hours, markets, args.limit, args.scrape_each_cycle)
+            sent = _scan_once(resolved_sport_id, args.hours, markets, args.limit, args.scrape_each_cycle, verifier,
+                              partition)
             total_sent += sent
+            cycles += 1
             log_success(f"✅ Scan cycle done. Sent {sent} (total {total_sent}).")
+            if bot:
+                bot.push_status({
+                    "pid": os.getpid(),
+                    "cycles": cycles,
+                    "last_cycle_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    "last_sent": sent,
+                    "total_sent": total_sent,
+                })
 
             # sleep to next tick, but remain responsive to signals
             remaining = max(1.0, interval - (time.time() - cycle_start))
@@ -219,10 +284,24 @@ def main():
             while time.time() < end_at:
                 if _STOP:
                     break
+                if bot:
+                    bot.poll()  # pushed settings, alert verdicts, restart a crashed bot
                 time.sleep(1)
             if _STOP:
                 break
     finally:
+        try:
+            flush_lifecycle(force=True)
+        except Exception as e:
+            log_error(f"⚠️ Lifecycle flush failed: {e}")
+        try:
+            flush_digest(priority_roi=s.digest_priority_roi)
+        except Exception as e:
+            log_error(f"⚠️ Digest flush failed: {e}")
+        if verifier:
+            log_info(f"🔎 Leg verifier: {verifier.stats}")
+            verifier.close()
+        _stop_bot_process(bot)
         _cleanup_lock()
         log_info("👋 Stopped. Bye!")
 
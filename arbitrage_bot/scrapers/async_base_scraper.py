@@ -1,17 +1,32 @@
 # scrapers/async_base_scraper.py
 import asyncio
+import contextlib
 import json
 import logging
+import os
 import random
 import time
 from collections import OrderedDict, defaultdict
-from typing import List, Dict, Optional, Callable, Tuple, Any
+from typing import List, Dict, Optional, Callable, Tuple, Any, Awaitable
 from core.db import resolve_bookmaker_id
 import httpx
 from bs4 import BeautifulSoup
-from playwright.async_api import async_playwright, Browser, Error as PWError
-
+from playwright.async_api import Error as PWError
+
+from scrapers.browser_pool import browser_pool, has_pool
+from scrapers.checkpoint import CrawlCheckpoint, open_checkpoint
+from scrapers.http_pool import acquire_client, pool_stats, release_client
+from scrapers.parse_pool import offload
+from scrapers.parse_pool import stats as parse_pool_stats
+from scrapers.payload_cache import payload_cache, payload_digest
 from scrapers.proxy_pool import ProxyPool
+from scrapers.scheduler import (
+    OBSERVE_BATCH, feed_enabled, flush_observations, observations_pending, refresh_scheduler, register_source,
+)
+from scrapers.limiters import (
+    ADAPTIVE_ENABLED, TokenBucket, adaptive_limiter, find_adaptive, find_bucket, host_of, share_bucket,
+    token_bucket,
+)
 from utils.match_utils import build_match_dict
 
 # --- Structured JSON Logger ---
@@ -29,6 +44,18 @@ handler.setFormatter(formatter)
 logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+# --- Response cache + single-flight (shared by every instance in the process) ---
+RESPONSE_CACHE_TTL = float(os.getenv("SCRAPER_RESPONSE_CACHE_TTL", "3"))   # seconds; 0 disables the cache
+RESPONSE_CACHE_MAX = int(os.getenv("SCRAPER_RESPONSE_CACHE_MAX", "1024"))
+# Request headers that can change the response body (everything else is ignored in the key)
+_CACHE_KEY_HEADERS = ("accept", "accept-language", "authorization", "cookie", "origin", "referer")
+_RESPONSE_CACHE: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()   # key -> (expires_at, body)
+_IN_FLIGHT: Dict[str, "asyncio.Future"] = {}
+
+# --- Tail retry of failed detail fetches (see retry_concurrently) ---
+TAIL_RETRY_CONCURRENCY = int(os.getenv("SCRAPER_TAIL_RETRY_CONCURRENCY", "5"))
+TAIL_RETRY_BASE_DELAY = float(os.getenv("SCRAPER_TAIL_RETRY_BASE_DELAY", "0.8"))
+
 
 class AsyncBaseScraper:
     CONTEXT_TTL_SEC: int = 180
@@ -68,9 +95,11 @@ class AsyncBaseScraper:
                  requests_per_minute: int = 60,
                  failure_threshold: int = 5,
                  recovery_timeout: int = 60,
-                 rate_limiter: Optional[asyncio.Semaphore] = None,
-                 http2: bool = False,
-                 request_timeout: float = 20.0):
+                 rate_limiter: Optional[Any] = None,
+                 http2: Optional[bool] = None,
+                 request_timeout: float = 20.0,
+                 burst: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
         self.bookmaker = bookmaker
         self.base_url = base_url.rstrip("/")
         self.default_max_retries = max_retries
@@ -95,40 +124,59 @@ class AsyncBaseScraper:
         self._direct_mode = not bool(proxy_list)
         self.ua = self.DEFAULT_DIRECT_UA if self._direct_mode else random.choice(self.USER_AGENTS)
 
+        # Pooled per (host, proxy, loop) — see scrapers/http_pool.py; None = pool default (HTTP/2 if h2 is installed)
         self.client: Optional[httpx.AsyncClient] = None
         self._http2 = http2
         self._request_timeout = request_timeout
 
-        self._playwright = None
-        self._browser: Optional[Browser] = None
+        # Browser fallback goes through the per-loop pool (scrapers/browser_pool.py);
+        # each instance sticks to one fingerprint profile so its pooled context is reused.
+        self._proxy_url: Optional[str] = None
+        self._browser_profile: Dict[str, Any] = random.choice(self.BROWSER_PROFILES)
+        self._browser_retained = False
 
-        self._context_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
-        self._context_profiles: Dict[str, Dict[str, Any]] = {}
-        self._context_ua: Dict[str, str] = {}
+        self.metrics = self._fresh_metrics()
 
-        self.metrics = {
-            "requests_made": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "matches_collected": 0,
-            "latency_histogram": [],
-            "proxy_success": 0,
-            "proxy_fail": 0,
-            "endpoint_errors": defaultdict(int),
-        }
+        # Identical GETs share one in-flight request; repeats within cache_ttl are served
+        # from memory. Pass cache_ttl=0 to try_api/try_static_html to skip the cache.
+        self.cache_ttl = RESPONSE_CACHE_TTL if cache_ttl is None else cache_ttl
 
+        # Request rate: one token bucket per host, shared by all instances in the process.
+        # `rate_limiter` may be a TokenBucket (replaces the per-host buckets) or a
+        # Semaphore (held for the whole request: a cross-instance concurrency cap).
         self.requests_per_minute = requests_per_minute
-        self._min_interval = 60.0 / max(1, requests_per_minute)
-        self._rate_lock = asyncio.Lock()
+        self.burst = burst
         self._shared_rate_limiter = rate_limiter
-        self._last_request_ts = 0.0
 
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
         self._cb_store: Dict[str, Dict[str, float]] = {}
+        self._limiter_hosts: set = set()  # hosts whose limiters/buckets this instance used
+
+        # Unchanged detail payloads skip parse + save (see scrapers/payload_cache.py)
+        self.payload_hashes = payload_cache(self.bookmaker)
+        self._schedule_flush: Optional[asyncio.Future] = None  # in-flight scheduler flush (Redis)
 
     # ... rest of the class stays unchanged ...
 
+    @staticmethod
+    def _fresh_metrics() -> Dict[str, Any]:
+        return {
+            "requests_made": 0,
+            "successful_requests": 0,
+            "failed_requests": 0,
+            "matches_collected": 0,
+            "latency_histogram": [],
+            "proxy_success": 0,
+            "proxy_fail": 0,
+            "endpoint_errors": defaultdict(int),
+            "pipeline": {},  # label -> last pipelined_crawl stats
+            "payloads_skipped": 0,    # detail payload identical to the last stored one
+            "payloads_processed": 0,
+            "response_cache": {"hits": 0, "misses": 0, "coalesced": 0},
+            "tail_retry": {},  # label -> last retry_concurrently stats
+        }
+
     # --------------------
     # lifecycle
     # --------------------
@@ -141,71 +189,61 @@ class AsyncBaseScraper:
                 self.log("no_proxies_configured", level="warning",
                          message="Running without proxies — direct connection mode enabled")
 
-            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0)
-
             headers = {
                 "User-Agent": self.ua,
                 "Accept": "application/json, text/html;q=0.9, */*;q=0.8",
                 "Accept-Language": "en-US,en;q=0.9",
-                "Connection": "keep-alive",
+                # no "Connection" header: keep-alive is httpx's default and h2 rejects it
             }
 
-            self.client = httpx.AsyncClient(
+            self._proxy_url = proxy["http"] if proxy else None
+            self.client = acquire_client(
+                self.base_url,
+                proxy=self._proxy_url,
                 headers=headers,
                 timeout=self._request_timeout,
-                trust_env=False,
                 http2=self._http2,
-                proxies=proxy["http"] if proxy else None,
-                follow_redirects=True,
-                limits=limits,
             )
-            self.log("httpx_client_created")
+            self.log("httpx_client_acquired")
 
-        # ✅ Only launch Playwright if this scraper actually needs it
-        if getattr(self, "supports_browser_fallback", True):
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(headless=True)
-            self.log("browser_started")
+        # ✅ Only scrapers that may fall back hold the shared browser pool open
+        # (Chromium itself is launched lazily on the first try_browser call)
+        if getattr(self, "supports_browser_fallback", True) and not self._browser_retained:
+            browser_pool(self.CONTEXT_TTL_SEC, self.CONTEXT_CACHE_MAX).retain()
+            self._browser_retained = True
 
         return self
 
     async def __aexit__(self, exc_type, exc, tb):
         await self.cleanup()
 
+    def healthy(self) -> bool:
+        """Cheap liveness check used before reusing a long-lived instance (worker runtime)."""
+        return self.client is not None and not self.client.is_closed
+
+    def reset_run_state(self) -> None:
+        """Forget per-run state before a reused instance starts its next run (subclasses extend)."""
+        self.metrics = self._fresh_metrics()
+        self._cb_store.clear()
+
     async def cleanup(self):
+        self.payload_hashes.flush()
+        await self.flush_refresh_schedule()
+
         if self.client:
             try:
-                await self.client.aclose()
-                self.log("httpx_client_closed")
+                await release_client(self.client)
+                self.log("httpx_client_released")
             except Exception as e:
                 self.log("httpx_client_close_failed", level="warning", error=str(e))
             self.client = None
 
-        for key, cached in list(self._context_cache.items()):
-            try:
-                await cached["context"].close()
-                self.log("context_closed", context_key=key)
-            except Exception as e:
-                self.log("context_close_failed", level="warning", context_key=key, error=str(e))
-        self._context_cache.clear()
-        self._context_profiles.clear()
-        self._context_ua.clear()
-
-        if self._browser:
-            try:
-                await self._browser.close()
-                self.log("browser_closed")
-            except Exception as e:
-                self.log("browser_close_failed", level="warning", error=str(e))
-            self._browser = None
-
-        if self._playwright:
+        if self._browser_retained:
+            self._browser_retained = False
             try:
-                await self._playwright.stop()
-                self.log("playwright_stopped")
+                await browser_pool().release()
             except Exception as e:
-                self.log("playwright_stop_failed", level="warning", error=str(e))
-            self._playwright = None
+                self.log("browser_pool_release_failed", level="warning", error=str(e))
 
         self.log("cleanup_complete")
 
@@ -219,16 +257,71 @@ class AsyncBaseScraper:
     # --------------------
     # rate limit helper
     # --------------------
-    async def _rate_limit(self):
-        if self._shared_rate_limiter is not None:
-            async with self._shared_rate_limiter:
-                await asyncio.sleep(0)
-        async with self._rate_lock:
-            now = time.perf_counter()
-            wait = self._min_interval - (now - self._last_request_ts)
-            if wait > 0:
-                await asyncio.sleep(wait)
-            self._last_request_ts = time.perf_counter()
+    def _bucket_for(self, url: str) -> TokenBucket:
+        if isinstance(self._shared_rate_limiter, TokenBucket):
+            return self._shared_rate_limiter
+        return token_bucket(url, rate=self.requests_per_minute / 60.0, burst=self.burst)
+
+    @contextlib.contextmanager
+    def rate_share(self, url: str, share: float):
+        """
+        Inside the block, draw every request from a bucket at `share` of `url`'s host rate
+        (a sharded fetch running next to other shards on the same egress). A caller-given
+        rate_limiter is left alone.
+        """
+        if share >= 1.0 or self._shared_rate_limiter is not None:
+            yield
+            return
+        self._shared_rate_limiter = share_bucket(url, self.requests_per_minute / 60.0, self.burst, share)
+        try:
+            yield
+        finally:
+            self._shared_rate_limiter = None
+
+    async def _rate_limit(self, url: str) -> None:
+        self._limiter_hosts.add(host_of(url))
+        await self._bucket_for(url).acquire()
+
+    @contextlib.asynccontextmanager
+    async def _request_slot(self, url: str):
+        """One HTTP request: a per-host token, plus the shared semaphore if one was given."""
+        sem = self._shared_rate_limiter
+        held = sem is not None and not isinstance(sem, TokenBucket)
+        if held:
+            await sem.acquire()
+        try:
+            await self._rate_limit(url)
+            yield
+        finally:
+            if held:
+                sem.release()
+
+    # --------------------
+    # adaptive concurrency (per host, AIMD)
+    # --------------------
+    def concurrency_limiter(self, url: str, initial: int, max_limit: Optional[int] = None):
+        """
+        Gate for detail fetches against `url`'s host. `initial` seeds the host's
+        AdaptiveLimiter; afterwards the limit follows the host's responses.
+        With SCRAPER_ADAPTIVE_CONCURRENCY=0 this is a plain fixed Semaphore.
+        """
+        if not ADAPTIVE_ENABLED:
+            return asyncio.Semaphore(initial)
+        lim = adaptive_limiter(url, initial=initial, max_limit=max_limit)
+        self._limiter_hosts.add(lim.host)
+        return lim
+
+    def _feed_limiter(self, url: str, latency: Optional[float], status: Optional[int] = None,
+                      retry_after: Optional[float] = None, error: bool = False) -> None:
+        lim = find_adaptive(url)
+        if lim is None:
+            return
+        if error:
+            lim.on_error()
+        elif status in self.TRANSIENT_STATUSES or retry_after:
+            lim.on_throttle(status, retry_after)
+        elif latency is not None:
+            lim.on_success(latency)
 
     # --------------------
     # retry wrapper (respects Retry-After via _cb_store)
@@ -288,6 +381,66 @@ class AsyncBaseScraper:
             return None
         return wrapped
 
+    # --------------------
+    # single-flight + short-TTL response cache
+    # --------------------
+    @staticmethod
+    def _response_key(kind: str, url: str, headers: Optional[Dict[str, str]]) -> str:
+        relevant = sorted(
+            (k.lower(), str(v)) for k, v in (headers or {}).items()
+            if k.lower() in _CACHE_KEY_HEADERS or k.lower().startswith("x-")
+        )
+        return f"{kind} {url} {json.dumps(relevant)}" if relevant else f"{kind} {url}"
+
+    async def _single_flight(self, kind: str, url: str, kwargs: Dict[str, Any],
+                             fetch: Callable[..., Awaitable[Any]]) -> Any:
+        """
+        Serve `url` from the response cache, join an identical request already in flight
+        on this loop, or run `fetch` as the leader. Bodies are shared: treat them as read-only.
+        """
+        ttl = kwargs.pop("cache_ttl", None)
+        ttl = self.cache_ttl if ttl is None else ttl
+        stats = self.metrics["response_cache"]
+        key = self._response_key(kind, url, kwargs.get("headers"))
+
+        if ttl > 0:
+            hit = _RESPONSE_CACHE.get(key)
+            if hit and hit[0] > time.monotonic():
+                _RESPONSE_CACHE.move_to_end(key)
+                stats["hits"] += 1
+                return hit[1]
+
+        loop = asyncio.get_running_loop()
+        leader = _IN_FLIGHT.get(key)
+        if leader is not None and not leader.done() and leader.get_loop() is loop:
+            stats["coalesced"] += 1
+            ok, value = await asyncio.shield(leader)
+            if not ok:
+                raise value
+            return value
+
+        stats["misses"] += 1
+        fut = loop.create_future()
+        _IN_FLIGHT[key] = fut
+        try:
+            result = await fetch(url, **kwargs)
+        except BaseException as e:
+            # Followers see a plain failure if the leader itself was cancelled
+            fut.set_result((True, None) if isinstance(e, asyncio.CancelledError) else (False, e))
+            raise
+        else:
+            fut.set_result((True, result))
+        finally:
+            if _IN_FLIGHT.get(key) is fut:
+                del _IN_FLIGHT[key]
+
+        if result is not None and ttl > 0:
+            _RESPONSE_CACHE[key] = (time.monotonic() + ttl, result)
+            _RESPONSE_CACHE.move_to_end(key)
+            while len(_RESPONSE_CACHE) > RESPONSE_CACHE_MAX:
+                _RESPONSE_CACHE.popitem(last=False)
+        return result
+
     # --------------------
     # try_api / try_static_html
     # --------------------
@@ -295,11 +448,18 @@ class AsyncBaseScraper:
     def try_api(self):
         @self.with_retries
         async def _impl(endpoint: str, **kwargs):
-            await self._rate_limit()
             self.metrics["requests_made"] += 1
-            t0 = time.perf_counter()
-
-            resp = await self.client.get(endpoint, timeout=self._request_timeout)
+            async with self._request_slot(endpoint):
+                t0 = time.perf_counter()
+                try:
+                    resp = await self.client.get(
+                        endpoint,
+                        headers=kwargs.get("headers"),
+                        timeout=kwargs.get("timeout") or self._request_timeout,
+                    )
+                except httpx.RequestError:
+                    self._feed_limiter(endpoint, None, error=True)
+                    raise
             dt = time.perf_counter() - t0
             self.metrics["latency_histogram"].append(dt)
 
@@ -308,8 +468,10 @@ class AsyncBaseScraper:
                 ra = resp.headers.get("Retry-After")
                 if ra and ra.isdigit():
                     self._cb_store.setdefault(kwargs.get("cb_key", f"api:{endpoint}"), {})["retry_after"] = float(ra)
+                self._feed_limiter(endpoint, dt, status, float(ra) if ra and ra.isdigit() else None)
                 self.metrics["endpoint_errors"][f"{status}"] += 1
                 return None
+            self._feed_limiter(endpoint, dt, status)
 
             try:
                 resp.raise_for_status()
@@ -325,17 +487,27 @@ class AsyncBaseScraper:
                     self.log("json_decode_failed", level="error", endpoint=endpoint, error=str(e))
                     return None
             return None
-        return _impl
+
+        async def _cached(endpoint: str, **kwargs):
+            return await self._single_flight("api", endpoint, kwargs, _impl)
+        return _cached
 
     @property
     def try_static_html(self):
         @self.with_retries
         async def _impl(url: str, **kwargs):
-            await self._rate_limit()
             self.metrics["requests_made"] += 1
-            t0 = time.perf_counter()
-
-            resp = await self.client.get(url, timeout=self._request_timeout)
+            async with self._request_slot(url):
+                t0 = time.perf_counter()
+                try:
+                    resp = await self.client.get(
+                        url,
+                        headers=kwargs.get("headers"),
+                        timeout=kwargs.get("timeout") or self._request_timeout,
+                    )
+                except httpx.RequestError:
+                    self._feed_limiter(url, None, error=True)
+                    raise
             dt = time.perf_counter() - t0
             self.metrics["latency_histogram"].append(dt)
 
@@ -344,13 +516,19 @@ class AsyncBaseScraper:
                 ra = resp.headers.get("Retry-After")
                 if ra and ra.isdigit():
                     self._cb_store.setdefault(kwargs.get("cb_key", f"http:{url}"), {})["retry_after"] = float(ra)
+                self._feed_limiter(url, dt, status, float(ra) if ra and ra.isdigit() else None)
                 self.metrics["endpoint_errors"][f"{status}"] += 1
                 return None
+            self._feed_limiter(url, dt, status)
 
             resp.raise_for_status()
-            html = resp.text
-            return BeautifulSoup(html, "html.parser")
-        return _impl
+            return resp.text
+
+        async def _cached(url: str, **kwargs):
+            # Cache/share the HTML text; every caller gets its own (mutable) soup
+            html = await self._single_flight("html", url, kwargs, _impl)
+            return BeautifulSoup(html, "html.parser") if html is not None else None
+        return _cached
 
     # --------------------
     # Browser fallback (self-contained; no Celery import at module import time)
@@ -361,29 +539,21 @@ class AsyncBaseScraper:
         """
         if not getattr(self, "supports_browser_fallback", True):
             return None
-        if not self._browser or not self._playwright:
-            # If someone toggled fallback on mid-flight, bring up the browser lazily
-            self._playwright = await async_playwright().start()
-            self._browser = await self._playwright.chromium.launch(headless=True)
-            self.log("browser_started_late")
-
-        page = await self._browser.new_page()
-        try:
-            await page.goto(url, wait_until="domcontentloaded", timeout=int(self._request_timeout * 1000))
-            try:
-                await page.wait_for_load_state("networkidle", timeout=5000)
-            except Exception:
-                pass
-            content = await page.content()
-            return content
-        except Exception as e:
-            self.log("browser_fetch_failed", level="warning", error=str(e), url=url)
-            return None
-        finally:
-            try:
-                await page.close()
-            except Exception:
-                pass
+        if not self._browser_retained:
+            # If someone toggled fallback on mid-flight, join the pool lazily
+            browser_pool(self.CONTEXT_TTL_SEC, self.CONTEXT_CACHE_MAX).retain()
+            self._browser_retained = True
+
+        html = await browser_pool().fetch_html(
+            url,
+            profile=self._browser_profile,
+            user_agent=self.ua,
+            proxy=self._proxy_url,
+            timeout=self._request_timeout,
+        )
+        if html is None:
+            self.log("browser_fetch_failed", level="warning", url=url)
+        return html
 
     # If you really need Celery-driven Playwright, lazy-load it:
     def run_playwright_task(self, *args, **kwargs):
@@ -421,6 +591,423 @@ class AsyncBaseScraper:
     async def parse_api(self, data): return []
     async def parse_html(self, soup): return []
 
+    # --------------------
+    # targeted single-event refresh (pre-alert verification)
+    # --------------------
+    supports_event_refresh: bool = False
+
+    async def fetch_event_payload(self, event_id, **kwargs) -> Optional[Any]:
+        """Override: ONE detail request for a single bookmaker event (no list crawl)."""
+        return None
+
+    def event_norms(self, event_id, payload: Any, stub: Optional[dict] = None) -> List[dict]:
+        """Override: detail payload → normalized market dicts (no DB writes)."""
+        return []
+
+    async def refresh_event(self, event_id, stub: Optional[dict] = None, timeout: Optional[float] = None) -> Optional[List[dict]]:
+        """
+        Re-fetch one event's markets on the already-open client.
+        Returns normalized market dicts, or None if the fetch failed/timed out
+        (callers must tell "no data" apart from "market vanished" → []).
+        """
+        if not self.supports_event_refresh:
+            return None
+        try:
+            coro = self.fetch_event_payload(event_id, cb_key=f"refresh:{event_id}", cache_ttl=0)
+            payload = await (asyncio.wait_for(coro, timeout) if timeout else coro)
+        except asyncio.TimeoutError:
+            self.log("refresh_event_timeout", level="warning", event_id=str(event_id), timeout=timeout)
+            return None
+        except Exception as e:
+            self.log("refresh_event_failed", level="warning", event_id=str(event_id), error=str(e))
+            return None
+        if payload is None:
+            return None
+        try:
+            return self.event_norms(event_id, payload, stub=stub)
+        except Exception as e:
+            self.log("refresh_event_parse_failed", level="warning", event_id=str(event_id), error=str(e))
+            return None
+
+    # --------------------
+    # unchanged-payload detection
+    # --------------------
+    def payload_changed(self, match_id, only_priority: bool, *parts: Any) -> Optional[Tuple[str, str]]:
+        """
+        None if this (match_id, scope) was already stored from identical `parts`
+        (caller skips parsing/saving); otherwise a token for `payload_stored`.
+        """
+        if not self.payload_hashes.enabled or match_id is None:
+            self.metrics["payloads_processed"] += 1
+            return ("", "")
+        key = f"{match_id}:{'p' if only_priority else 'f'}"
+        digest = payload_digest(*parts)
+        if self.payload_hashes.unchanged(key, digest):
+            self.metrics["payloads_skipped"] += 1
+            return None
+        self.metrics["payloads_processed"] += 1
+        return key, digest
+
+    def payload_stored(self, token: Tuple[str, str], ok: bool = True) -> None:
+        """Record the digest once every market was saved; failed writes are retried next cycle."""
+        key, digest = token
+        if not key:
+            return
+        if ok:
+            self.payload_hashes.remember(key, digest)
+        else:
+            self.payload_hashes.forget(key)
+
+    def parse_ctx(self) -> Dict[str, Any]:
+        """Picklable scraper context handed to pure parse functions."""
+        return {
+            "bookmaker": self.bookmaker,
+            "bookmaker_url": getattr(self, "bookmaker_url", None),
+            "bookmaker_id": self.bookmaker_id,
+        }
+
+    async def offload_norms(self, fn: Callable[..., Tuple[List[dict], List[Tuple[Any, str]]]], *args: Any) -> List[dict]:
+        """
+        Run a pure `fn(ctx, *args) -> (norms, errors)` off the event loop when the parse
+        pool is enabled (scrapers/parse_pool.py), inline otherwise; errors are logged here.
+        """
+        norms, errors = await offload(fn, self.parse_ctx(), *args)
+        for match_id, err in errors:
+            self.log("parse_market_failed", level="error", error=err, match_id=match_id)
+        return norms
+
+    def note_refresh(self, match_id, kickoff: Any, changed: bool, stub: Optional[dict] = None,
+                     only_priority: bool = False) -> None:
+        """
+        Feed the refresh scheduler (scrapers/scheduler.py): kickoff + whether the odds moved.
+        Observations are buffered; a full buffer is written to Redis from a worker thread.
+        """
+        if not feed_enabled() or match_id is None:
+            return
+        try:
+            register_source(self.bookmaker, f"{type(self).__module__}:{type(self).__name__}")
+            refresh_scheduler(self.bookmaker).observe(
+                match_id, kickoff, changed, stub=stub, only_priority=only_priority,
+            )
+        except Exception as e:
+            self.log("refresh_schedule_failed", level="warning", match_id=str(match_id), error=str(e))
+            return
+        if observations_pending() >= OBSERVE_BATCH and (self._schedule_flush is None or self._schedule_flush.done()):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return  # sync caller: the end-of-phase / cleanup flush picks it up
+            self._schedule_flush = loop.create_task(self.flush_refresh_schedule())
+
+    async def flush_refresh_schedule(self) -> None:
+        """Write buffered scheduler observations (one Redis pipeline) without blocking the loop."""
+        if self._schedule_flush is not None and not self._schedule_flush.done() \
+                and self._schedule_flush is not asyncio.current_task():
+            await asyncio.wait([self._schedule_flush])
+        if not observations_pending():
+            return
+        try:
+            await asyncio.to_thread(flush_observations)
+        except Exception as e:
+            self.log("refresh_schedule_flush_failed", level="warning", error=str(e))
+
+    async def refresh_and_store(self, event_id, stub: Optional[dict] = None, only_priority: bool = False) -> Optional[int]:
+        """
+        Scheduled refresh: ONE detail request for a tracked event, stored like a crawl
+        would store it. Returns markets stored, or None if the fetch failed.
+        """
+        if not self.supports_event_refresh:
+            return None
+        try:
+            payload = await self.fetch_event_payload(event_id, cb_key=f"sched:{event_id}")
+        except Exception as e:
+            self.log("scheduled_refresh_failed", level="warning", event_id=str(event_id), error=str(e))
+            return None
+        if payload is None:
+            return None
+        return await self.parse_and_store(stub or {}, payload, only_priority=only_priority)
+
+    async def parse_and_store(self, match_stub: dict, detail_data: Any, only_priority: bool = False) -> int:
+        """Override: detail payload → saved markets (used by crawls and scheduled refreshes)."""
+        return 0
+
+    # --------------------
+    # resumable crawls + tail retry
+    # --------------------
+    def crawl_checkpoint(self, name: str, failed: Optional[Dict[str, Any]] = None) -> Optional[CrawlCheckpoint]:
+        """
+        Checkpoint for one crawl phase (None when SCRAPER_CHECKPOINTS=0). A fresh one
+        left by a crashed run is loaded and its failed stubs merged into `failed`.
+        """
+        try:
+            return open_checkpoint(self.bookmaker, name, failed=failed)
+        except Exception as e:
+            self.log("checkpoint_open_failed", level="warning", name=name, error=str(e))
+            return None
+
+    async def retry_concurrently(
+        self,
+        ids: List[Any],
+        attempt: Callable[[Any], Awaitable[Optional[int]]],
+        *,
+        concurrency: int = TAIL_RETRY_CONCURRENCY,
+        attempts: int = 3,
+        base_delay: float = TAIL_RETRY_BASE_DELAY,
+        label: str = "tail_retry",
+    ) -> Tuple[int, List[Any]]:
+        """
+        Bounded pool for tail retries: up to `concurrency` ids in flight, each tried
+        up to `attempts` times with its own exponential backoff + jitter (an id that is
+        backing off does not hold a slot). `attempt(id)` returns the stored count, or
+        None for "retry". Returns (total stored, ids that never succeeded).
+        """
+        sem = asyncio.Semaphore(max(1, int(concurrency)))
+        gave_up: List[Any] = []
+        st = {"ids": len(ids), "recovered": 0, "gave_up": 0, "attempts": 0, "stored": 0}
+
+        async def _one(mid) -> int:
+            for n in range(1, attempts + 1):
+                async with sem:
+                    st["attempts"] += 1
+                    try:
+                        stored = await attempt(mid)
+                    except Exception as e:
+                        stored = None
+                        self.log("tail_retry_failed", level="warning", label=label,
+                                 match_id=str(mid), attempt=n, error=str(e))
+                if stored is not None:
+                    st["recovered"] += 1
+                    st["stored"] += int(stored)
+                    return int(stored)
+                if n < attempts:
+                    await asyncio.sleep(base_delay * 2 ** (n - 1) + random.random() * base_delay * 0.5)
+            st["gave_up"] += 1
+            gave_up.append(mid)
+            return 0
+
+        started = time.perf_counter()
+        await asyncio.gather(*(_one(mid) for mid in ids))
+        st["elapsed_sec"] = round(time.perf_counter() - started, 3)
+        self.metrics["tail_retry"][label] = st
+        self.log("tail_retry_complete", label=label, **st)
+        return st["stored"], gave_up
+
+    # --------------------
+    # pipelined list → detail crawl
+    # --------------------
+    _EOS = object()  # end-of-stream sentinel for detail workers
+
+    async def pipelined_crawl(
+        self,
+        *,
+        fetch_page: Callable[[int], Awaitable[Optional[List[Any]]]],
+        handle_item: Callable[[Any], Awaitable[int]],
+        accept: Optional[Callable[[Any], bool]] = None,
+        priority: Optional[Callable[[Any], float]] = None,
+        producers: int = 4,
+        workers: int = 16,
+        queue_size: Optional[int] = None,
+        max_pages: int = 10_000,
+        on_result: Optional[Callable[[int], None]] = None,
+        label: str = "crawl",
+        checkpoint: Optional[CrawlCheckpoint] = None,
+        item_key: Optional[Callable[[Any], Any]] = None,
+    ) -> int:
+        """
+        List pages and detail fetches overlap instead of alternating in batches.
+
+        - `producers` tasks claim page indexes (0, 1, 2, …) from a shared counter,
+          call `fetch_page(i)` and push accepted items into a bounded queue;
+          a full queue blocks producers (backpressure).
+        - `workers` tasks pull items and await `handle_item(item)` (→ stored count);
+          with `priority(item)` the queue is a PriorityQueue (lowest value first).
+        - End of stream: a page is only claimed while it is within `producers`
+          pages of the last non-empty page; once no fetch in flight can extend
+          that window, producers exit and one sentinel per worker is enqueued.
+        - With a `checkpoint` (scrapers/checkpoint.py) a page is recorded once every
+          item it enqueued was handled, and `item_key(item)` ids as they finish;
+          a resumed crawl skips those pages and ids instead of fetching them again.
+
+        Returns the total stored; per-stage stats land in metrics["pipeline"][label].
+        """
+        producers = max(1, int(producers))
+        workers = max(1, int(workers))
+        maxsize = queue_size or workers * 4
+        q: asyncio.Queue = asyncio.PriorityQueue(maxsize=maxsize) if priority else asyncio.Queue(maxsize=maxsize)
+        seq = 0  # FIFO tie-break inside a priority level
+        cond = asyncio.Condition()
+
+        def _wrap(page, it):
+            nonlocal seq
+            entry = (page, it)
+            if not priority:
+                return entry
+            seq += 1
+            return (float("inf"), seq, entry) if it is self._EOS else (float(priority(it)), seq, entry)
+
+        # page -> outstanding items (+1 while its producer is still enqueueing)
+        pending: Dict[int, int] = {}
+
+        def _settle(page: int) -> None:
+            left = pending.get(page, 0) - 1
+            if left > 0:
+                pending[page] = left
+                return
+            pending.pop(page, None)
+            if checkpoint is not None:
+                checkpoint.page_done(page)
+
+        def _key_of(it) -> Optional[str]:
+            if item_key is None:
+                return None
+            k = item_key(it)
+            return None if k is None else str(k)
+
+        st = {
+            "pages_fetched": 0, "pages_empty": 0, "page_errors": 0,
+            "items_listed": 0, "items_enqueued": 0, "items_processed": 0, "item_errors": 0, "stored": 0,
+            "pages_resumed": 0, "items_resumed": 0,
+            "list_sec": 0.0, "detail_sec": 0.0, "producer_blocked_sec": 0.0, "worker_idle_sec": 0.0,
+            "queue_max": 0, "queue_depth_sum": 0, "queue_depth_samples": 0,
+        }
+        next_page = 0
+        inflight = 0
+        last_nonempty = -1
+
+        async def _claim() -> Optional[int]:
+            nonlocal next_page, inflight
+            async with cond:
+                while True:
+                    if next_page < max_pages and next_page <= last_nonempty + producers:
+                        p = next_page
+                        next_page += 1
+                        inflight += 1
+                        return p
+                    if inflight == 0:
+                        return None
+                    await cond.wait()
+
+        async def _producer():
+            nonlocal inflight, last_nonempty
+            while True:
+                p = await _claim()
+                if p is None:
+                    return
+                if checkpoint is not None and checkpoint.is_page_done(p):
+                    st["pages_resumed"] += 1
+                    async with cond:
+                        inflight -= 1
+                        last_nonempty = max(last_nonempty, p)
+                        cond.notify_all()
+                    continue
+                t0 = time.perf_counter()
+                try:
+                    items = await fetch_page(p)
+                except Exception as e:
+                    st["page_errors"] += 1
+                    self.log("pipeline_page_failed", level="warning", label=label, page=p, error=str(e))
+                    items = None
+                st["list_sec"] += time.perf_counter() - t0
+                st["pages_fetched"] += 1
+                async with cond:
+                    inflight -= 1
+                    if items:
+                        last_nonempty = max(last_nonempty, p)
+                    else:
+                        st["pages_empty"] += 1
+                    cond.notify_all()
+
+                if not items:
+                    continue
+                pending[p] = 1
+                for it in items:
+                    st["items_listed"] += 1
+                    if checkpoint is not None and _key_of(it) in checkpoint.done_ids:
+                        st["items_resumed"] += 1
+                        continue
+                    if accept is not None and not accept(it):
+                        continue
+                    pending[p] += 1
+                    t1 = time.perf_counter()
+                    await q.put(_wrap(p, it))
+                    st["producer_blocked_sec"] += time.perf_counter() - t1
+                    st["items_enqueued"] += 1
+                    depth = q.qsize()
+                    st["queue_max"] = max(st["queue_max"], depth)
+                    st["queue_depth_sum"] += depth
+                    st["queue_depth_samples"] += 1
+                _settle(p)
+
+        async def _worker():
+            while True:
+                t0 = time.perf_counter()
+                entry = await q.get()
+                if priority:
+                    entry = entry[2]
+                page, item = entry
+                st["worker_idle_sec"] += time.perf_counter() - t0
+                try:
+                    if item is self._EOS:
+                        return
+                    t1 = time.perf_counter()
+                    n = int(await handle_item(item) or 0)
+                    st["detail_sec"] += time.perf_counter() - t1
+                    st["items_processed"] += 1
+                    if checkpoint is not None:
+                        checkpoint.item_done(_key_of(item))
+                    if n:
+                        st["stored"] += n
+                        if on_result:
+                            on_result(n)
+                    _settle(page)
+                except Exception as e:
+                    st["item_errors"] += 1
+                    self.log("detail_task_failed", level="error", label=label, error=str(e))
+                    _settle(page)  # handled (and logged); a cancelled item keeps its page open
+                finally:
+                    q.task_done()
+
+        started = time.perf_counter()
+        worker_tasks = [asyncio.create_task(_worker()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*[_producer() for _ in range(producers)])
+        except BaseException:
+            # Cancelled/crashed: stop the workers now — queueing sentinels could wait on a stuck one
+            for t in worker_tasks:
+                t.cancel()
+            if checkpoint is not None:
+                checkpoint.save(force=True)
+            raise
+        for _ in worker_tasks:
+            await q.put(_wrap(None, self._EOS))
+        try:
+            await asyncio.gather(*worker_tasks)
+        except BaseException:
+            for t in worker_tasks:
+                t.cancel()
+            raise
+        finally:
+            if checkpoint is not None:
+                checkpoint.save(force=True)
+
+        elapsed = max(1e-9, time.perf_counter() - started)
+        samples = st.pop("queue_depth_samples")
+        depth_sum = st.pop("queue_depth_sum")
+        st.update({
+            "producers": producers,
+            "workers": workers,
+            "queue_size": q.maxsize,
+            "queue_avg": round(depth_sum / samples, 2) if samples else 0.0,
+            "elapsed_sec": round(elapsed, 3),
+            "pages_per_sec": round(st["pages_fetched"] / elapsed, 2),
+            "items_per_sec": round(st["items_processed"] / elapsed, 2),
+        })
+        for k in ("list_sec", "detail_sec", "producer_blocked_sec", "worker_idle_sec"):
+            st[k] = round(st[k], 3)
+        self.metrics["pipeline"][label] = st
+        self.log("pipeline_complete", label=label, **st)
+        return st["stored"]
+
     # --------------------
     # orchestrator-friendly get_odds (API -> HTML -> Browser)
     # --------------------
@@ -471,9 +1058,9 @@ class AsyncBaseScraper:
     # --------------------
     def metrics_snapshot(self) -> Dict[str, Any]:
         try:
-            pool_stats = self.proxy_pool.stats()
+            proxy_stats = self.proxy_pool.stats()
         except Exception:
-            pool_stats = {}
+            proxy_stats = {}
 
         buckets = {"lt_0_2s": 0, "0_2_0_5s": 0, "0_5_1_0s": 0, "gt_1_0s": 0}
         for d in self.metrics["latency_histogram"]:
@@ -496,7 +1083,20 @@ class AsyncBaseScraper:
             "proxy_fail": self.metrics["proxy_fail"],
             "endpoint_errors": dict(self.metrics["endpoint_errors"]),
             "latency_buckets": buckets,
-            "proxy_pool": pool_stats,
+            "proxy_pool": proxy_stats,
+            "pipeline": dict(self.metrics["pipeline"]),
+            "payloads_skipped": self.metrics["payloads_skipped"],
+            "payloads_processed": self.metrics["payloads_processed"],
+            "payload_cache": self.payload_hashes.stats(),
+            "response_cache": {**self.metrics["response_cache"], "entries": len(_RESPONSE_CACHE)},
+            "parse_pool": parse_pool_stats(),
+            "http_pool": pool_stats(),
+            "browser_pool": browser_pool().snapshot() if has_pool() else None,
+            "adaptive_limits": {h: lim.stats() for h in sorted(self._limiter_hosts) if (lim := find_adaptive(h))},
+            "rate_limits": (
+                {"shared": self._shared_rate_limiter.stats()} if isinstance(self._shared_rate_limiter, TokenBucket)
+                else {h: b.stats() for h in sorted(self._limiter_hosts) if (b := find_bucket(h))}
+            ),
         }
 
     # --------------------
@@ -0,0 +1,289 @@
+# scrapers/autoscaler.py
+"""
+Backlog-driven pool sizing for the per-bookmaker worker queues (scrapers/queues.py).
+
+Every tick, for each book's queue:
+
+    need   = ceil(queue depth × avg task latency / SCRAPER_AUTOSCALE_DRAIN_SEC)
+    target = clamp(need, QueueSpec.min_concurrency, QueueSpec.max_concurrency)
+
+so a backlog is drained within the drain window without ever exceeding the
+book's cap. Growing is immediate; shrinking goes one process per tick, only once
+the queue is empty and SCRAPER_AUTOSCALE_COOLDOWN_SEC after the last grow.
+
+Pluggable ends, so the same logic runs against stand-ins in tests:
+  • broker: depth(queue), latency_ms(bookmaker)
+      RedisBroker — Celery's Redis broker lists + the tasks' latency_ms/success counters
+      LocalBroker — in-memory stand-in (publish/consume/record_latency)
+  • pool:   size(queue), resize(queue, n)
+      CeleryPool  — pool_grow/pool_shrink on the workers consuming the queue
+      LocalPool   — records sizes
+
+    python -m scrapers.autoscaler            # loop every SCRAPER_AUTOSCALE_EVERY_SEC
+    python -m scrapers.autoscaler --once --dry-run
+"""
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from core.logger import get_logger
+
+from .queues import QueueSpec, queue_plan
+
+logger = get_logger(__name__)
+
+AUTOSCALE_EVERY_SEC = float(os.getenv("SCRAPER_AUTOSCALE_EVERY_SEC", "30"))
+DRAIN_SEC = float(os.getenv("SCRAPER_AUTOSCALE_DRAIN_SEC", "120"))
+COOLDOWN_SEC = float(os.getenv("SCRAPER_AUTOSCALE_COOLDOWN_SEC", "180"))
+DEFAULT_TASK_MS = float(os.getenv("SCRAPER_AUTOSCALE_DEFAULT_TASK_MS", "60000"))  # before any latency sample
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "scraper:metrics")
+
+# kombu's Redis transport keeps priority levels in sibling lists: "<queue>\x06\x16<n>"
+_PRIORITY_SEP = "\x06\x16"
+_PRIORITY_STEPS = (3, 6, 9)
+
+
+# --------------------
+# brokers
+# --------------------
+class LocalBroker:
+    """In-memory broker stand-in for tests and dry runs."""
+
+    def __init__(self, window: int = 50):
+        self.queues: Dict[str, Deque[Any]] = defaultdict(deque)
+        self._latencies: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def publish(self, queue: str, task: Any = None, count: int = 1) -> None:
+        self.queues[queue].extend([task] * count)
+
+    def consume(self, queue: str) -> Optional[Any]:
+        q = self.queues.get(queue)
+        return q.popleft() if q else None
+
+    def record_latency(self, bookmaker: str, ms: float) -> None:
+        self._latencies[bookmaker].append(float(ms))
+
+    def depth(self, queue: str) -> int:
+        return len(self.queues.get(queue) or ())
+
+    def latency_ms(self, bookmaker: str) -> Optional[float]:
+        samples = self._latencies.get(bookmaker)
+        return sum(samples) / len(samples) if samples else None
+
+
+class RedisBroker:
+    """Queue depth from Celery's Redis broker; latency from the tasks' metric counters (REDIS_URL)."""
+
+    def __init__(self, broker_url: Optional[str] = None, metrics_url: Optional[str] = None):
+        import redis  # optional outside the Celery deployment
+        self.client = redis.Redis.from_url(
+            broker_url or os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0"), decode_responses=True
+        )
+        self.metrics = redis.Redis.from_url(
+            metrics_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"), decode_responses=True
+        )
+        self._last: Dict[str, tuple] = {}        # bookmaker -> (latency_ms total, runs)
+        self._latency: Dict[str, float] = {}     # bookmaker -> last average
+
+    def depth(self, queue: str) -> int:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.llen(queue)
+        for step in _PRIORITY_STEPS:
+            pipe.llen(f"{queue}{_PRIORITY_SEP}{step}")
+        return sum(int(n or 0) for n in pipe.execute())
+
+    def latency_ms(self, bookmaker: str) -> Optional[float]:
+        """Average latency of the runs finished since the previous call (else the last average)."""
+        # latency_ms is only added on success, so average over successful runs
+        keys = [f"{METRICS_PREFIX}:{bookmaker}:{m}" for m in ("latency_ms", "success")]
+        total, runs = (int(v or 0) for v in self.metrics.mget(keys))
+        prev = self._last.get(bookmaker)
+        self._last[bookmaker] = (total, runs)
+        if prev is not None and runs > prev[1]:
+            self._latency[bookmaker] = (total - prev[0]) / (runs - prev[1])
+        elif prev is None and runs:
+            self._latency[bookmaker] = total / runs
+        return self._latency.get(bookmaker)
+
+
+# --------------------
+# pools
+# --------------------
+class LocalPool:
+    """Worker-pool stand-in: remembers the size of each queue's pool."""
+
+    def __init__(self, sizes: Optional[Dict[str, int]] = None):
+        self.sizes: Dict[str, int] = dict(sizes or {})
+        self.resizes: List[tuple] = []
+
+    def refresh(self) -> None:
+        pass
+
+    def size(self, queue: str) -> Optional[int]:
+        return self.sizes.get(queue)
+
+    def resize(self, queue: str, n: int) -> None:
+        self.resizes.append((queue, self.sizes.get(queue), n))
+        self.sizes[queue] = n
+
+
+class CeleryPool:
+    """Prefork pools of the workers consuming each queue, resized over Celery remote control."""
+
+    def __init__(self, app: Any, timeout: float = 2.0):
+        self.app = app
+        self.timeout = timeout
+        self._workers: Dict[str, List[str]] = {}   # queue -> worker names
+        self._procs: Dict[str, int] = {}            # worker -> pool processes
+
+    def refresh(self) -> None:
+        inspect = self.app.control.inspect(timeout=self.timeout)
+        active = inspect.active_queues() or {}
+        stats = inspect.stats() or {}
+        self._workers = defaultdict(list)
+        for worker, queues in active.items():
+            for q in queues or []:
+                self._workers[q.get("name")].append(worker)
+        self._procs = {w: len(((s or {}).get("pool") or {}).get("processes") or []) for w, s in stats.items()}
+
+    def size(self, queue: str) -> Optional[int]:
+        workers = self._workers.get(queue)
+        if not workers:
+            return None
+        return sum(self._procs.get(w, 0) for w in workers)
+
+    def resize(self, queue: str, n: int) -> None:
+        workers = sorted(self._workers.get(queue) or [])
+        if not workers:
+            return
+        # spread the target evenly; the first workers take the remainder
+        base, extra = divmod(n, len(workers))
+        for i, worker in enumerate(workers):
+            want = max(1, base + (1 if i < extra else 0))
+            have = self._procs.get(worker, 0)
+            if want > have:
+                self.app.control.pool_grow(want - have, destination=[worker])
+            elif want < have:
+                self.app.control.pool_shrink(have - want, destination=[worker])
+            self._procs[worker] = want
+
+
+# --------------------
+# autoscaler
+# --------------------
+@dataclass
+class ScaleDecision:
+    queue: str
+    bookmaker: str
+    depth: int
+    latency_ms: Optional[float]
+    current: Optional[int]
+    target: Optional[int]
+    action: str   # grow | shrink | hold | no_worker
+
+
+class Autoscaler:
+    def __init__(
+        self,
+        specs: Iterable[QueueSpec],
+        broker: Any,
+        pool: Any,
+        drain_sec: float = DRAIN_SEC,
+        cooldown_sec: float = COOLDOWN_SEC,
+        dry_run: bool = False,
+    ):
+        self.specs = list(specs)
+        self.broker = broker
+        self.pool = pool
+        self.drain_sec = max(1.0, drain_sec)
+        self.cooldown_sec = cooldown_sec
+        self.dry_run = dry_run
+        self._last_grow: Dict[str, float] = {}
+
+    def desired(self, spec: QueueSpec, depth: int, latency_ms: Optional[float]) -> int:
+        task_sec = (latency_ms if latency_ms is not None else DEFAULT_TASK_MS) / 1000.0
+        need = math.ceil(depth * task_sec / self.drain_sec) if depth else 0
+        return max(spec.min_concurrency, min(spec.max_concurrency, need))
+
+    def tick(self) -> List[ScaleDecision]:
+        try:
+            self.pool.refresh()
+        except Exception as e:
+            logger.warning(f"⚠️ autoscaler: could not inspect workers: {e}")
+            return []
+
+        now = time.monotonic()
+        decisions: List[ScaleDecision] = []
+        for spec in self.specs:
+            try:
+                depth = self.broker.depth(spec.queue)
+                latency = self.broker.latency_ms(spec.bookmaker)
+            except Exception as e:
+                logger.warning(f"⚠️ autoscaler: metrics for {spec.queue} unavailable: {e}")
+                continue
+            current = self.pool.size(spec.queue)
+            if current is None:
+                decisions.append(ScaleDecision(spec.queue, spec.bookmaker, depth, latency, None, None, "no_worker"))
+                continue
+
+            target = self.desired(spec, depth, latency)
+            action = "hold"
+            if target > current:
+                action = "grow"
+                self._last_grow[spec.queue] = now
+            elif target < current:
+                cooled = now - self._last_grow.get(spec.queue, float("-inf")) >= self.cooldown_sec
+                if depth == 0 and cooled:
+                    action, target = "shrink", current - 1   # one step per tick
+                else:
+                    target = current
+            else:
+                target = current
+
+            if action != "hold" and not self.dry_run:
+                try:
+                    self.pool.resize(spec.queue, target)
+                except Exception as e:
+                    logger.warning(f"⚠️ autoscaler: resize of {spec.queue} to {target} failed: {e}")
+                    continue
+            decisions.append(ScaleDecision(spec.queue, spec.bookmaker, depth, latency, current, target, action))
+
+        changed = [asdict(d) for d in decisions if d.action in ("grow", "shrink")]
+        if changed:
+            logger.info("📈 " + json.dumps({"event": "autoscale", "dry_run": self.dry_run, "changes": changed}))
+        return decisions
+
+    def run_forever(self, every: float = AUTOSCALE_EVERY_SEC, stop: Optional[threading.Event] = None) -> None:
+        stop = stop or threading.Event()
+        logger.info(f"📈 Autoscaler watching {len(self.specs)} queues every {every:.0f}s.")
+        while not stop.is_set():
+            self.tick()
+            stop.wait(every)
+
+
+def main() -> None:
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Resize per-bookmaker scraper worker pools from queue backlog.")
+    ap.add_argument("--once", action="store_true", help="one tick, print the decisions and exit")
+    ap.add_argument("--dry-run", action="store_true", help="decide but do not resize")
+    ap.add_argument("--every", type=float, default=AUTOSCALE_EVERY_SEC)
+    args = ap.parse_args()
+
+    from .orchestrator import celery  # the worker app (remote control)
+
+    scaler = Autoscaler(queue_plan().values(), RedisBroker(), CeleryPool(celery), dry_run=args.dry_run)
+    if args.once:
+        for d in scaler.tick():
+            print(json.dumps(asdict(d)))
+        return
+    scaler.run_forever(args.every)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ import requests
 from bs4 import BeautifulSoup
 
 from utils.match_utils import build_match_dict
+from .http_pool import shared_session
 from .proxy_pool import ProxyPool
 from core.db import upsert_market, resolve_bookmaker_id  # DB helpers
 
@@ -54,8 +55,8 @@ class BaseScraper:
 
         self.proxy_pool = ProxyPool(proxy_list or [], max_failures=3)
 
-        # Session is kept, but UA will be rotated per attempt via per-request headers.
-        self.session = requests.Session()
+        # Process-wide session (shared keep-alive pool); UA is rotated per attempt via per-request headers.
+        self.session = shared_session()
         self.session.headers.update({"Accept-Language": "en-US,en;q=0.9"})
 
         # Simple in-process cache: {key: (value, ts)}
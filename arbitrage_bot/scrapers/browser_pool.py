@@ -0,0 +1,259 @@
+# scrapers/browser_pool.py
+"""
+Warm Playwright browser + context pool (one per event loop, i.e. per worker process
+when the worker runtime's persistent loop is in use).
+
+  • one headless Chromium, launched lazily and relaunched if it disconnects
+  • idle contexts pooled per (profile, user agent, proxy) and reused across fetches;
+    evicted after `ttl` seconds or when more than `max_contexts` exist (LRU)
+  • every context aborts image/font/media requests (SCRAPER_BROWSER_BLOCK overrides
+    the resource types) — HTML/XHR is all the fallback parsers need
+  • warm() pre-creates contexts so the first fallback does not pay for them
+
+AsyncBaseScraper.try_browser and tasks.run_playwright_task both fetch through it.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from playwright.async_api import async_playwright
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+BLOCKED_RESOURCES = frozenset(
+    t.strip() for t in os.getenv("SCRAPER_BROWSER_BLOCK", "image,font,media").split(",") if t.strip()
+)
+CONTEXT_TTL_SEC = float(os.getenv("SCRAPER_BROWSER_CONTEXT_TTL", "180"))
+CONTEXT_MAX = int(os.getenv("SCRAPER_BROWSER_CONTEXTS", "6"))
+KEEP_WARM = False   # set by the worker runtime: the pool outlives its last user on a persistent loop
+
+
+def set_keep_warm(flag: bool) -> None:
+    global KEEP_WARM
+    KEEP_WARM = bool(flag)
+
+
+class _Ctx:
+    __slots__ = ("context", "key", "created", "uses")
+
+    def __init__(self, context, key: str):
+        self.context = context
+        self.key = key
+        self.created = time.monotonic()
+        self.uses = 0
+
+
+class BrowserPool:
+    def __init__(self, ttl: float = CONTEXT_TTL_SEC, max_contexts: int = CONTEXT_MAX):
+        self.ttl = ttl
+        self.max_contexts = max(1, max_contexts)
+        self._playwright = None
+        self._browser = None
+        self._launch_lock = asyncio.Lock()
+        self._idle: "OrderedDict[int, _Ctx]" = OrderedDict()   # id -> idle context, LRU order
+        self._leased = 0
+        self.users = 0          # scrapers that may fall back to the browser (see retain/release)
+        self.stats = {"launches": 0, "contexts_created": 0, "contexts_reused": 0,
+                      "contexts_evicted": 0, "blocked_requests": 0, "fetches": 0}
+
+    # --------------------
+    # browser
+    # --------------------
+    async def _ensure_browser(self):
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._idle.clear()  # contexts died with the old browser
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self.stats["launches"] += 1
+            logger.info("🌐 Pooled Chromium launched.")
+            return self._browser
+
+    # --------------------
+    # contexts
+    # --------------------
+    @staticmethod
+    def _key(profile: Optional[Dict[str, Any]], user_agent: Optional[str], proxy: Optional[str]) -> str:
+        return json.dumps([profile or {}, user_agent or "", proxy or ""], sort_keys=True)
+
+    async def _block(self, route) -> None:
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            self.stats["blocked_requests"] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _new_context(self, key: str, profile: Optional[Dict[str, Any]], user_agent: Optional[str],
+                           proxy: Optional[str]) -> _Ctx:
+        browser = await self._ensure_browser()
+        kwargs: Dict[str, Any] = dict(profile or {})
+        if user_agent:
+            kwargs["user_agent"] = user_agent
+        if proxy:
+            kwargs["proxy"] = {"server": proxy}
+        context = await browser.new_context(**kwargs)
+        if BLOCKED_RESOURCES:
+            await context.route("**/*", self._block)
+        self.stats["contexts_created"] += 1
+        return _Ctx(context, key)
+
+    async def _close(self, ctx: _Ctx) -> None:
+        try:
+            await ctx.context.close()
+        except Exception:
+            pass
+
+    async def _evict(self) -> None:
+        now = time.monotonic()
+        for cid, ctx in list(self._idle.items()):
+            if now - ctx.created >= self.ttl:
+                self._idle.pop(cid, None)
+                self.stats["contexts_evicted"] += 1
+                await self._close(ctx)
+        while self._idle and len(self._idle) + self._leased > self.max_contexts:
+            _, ctx = self._idle.popitem(last=False)
+            self.stats["contexts_evicted"] += 1
+            await self._close(ctx)
+
+    async def _acquire(self, profile, user_agent, proxy) -> _Ctx:
+        key = self._key(profile, user_agent, proxy)
+        await self._evict()
+        for cid, ctx in reversed(self._idle.items()):
+            if ctx.key == key:
+                self._idle.pop(cid)
+                self.stats["contexts_reused"] += 1
+                break
+        else:
+            ctx = await self._new_context(key, profile, user_agent, proxy)
+        self._leased += 1
+        ctx.uses += 1
+        return ctx
+
+    async def _release(self, ctx: _Ctx, ok: bool) -> None:
+        self._leased = max(0, self._leased - 1)
+        if ok and self._browser is not None and self._browser.is_connected() \
+                and time.monotonic() - ctx.created < self.ttl:
+            self._idle[id(ctx)] = ctx
+            await self._evict()
+        else:
+            await self._close(ctx)
+
+    async def warm(self, profiles: Iterable[Dict[str, Any]], user_agents: Optional[List[str]] = None,
+                   proxy: Optional[str] = None) -> int:
+        """Pre-create idle contexts (up to the pool bound)."""
+        made = 0
+        for profile in profiles:
+            if len(self._idle) + self._leased >= self.max_contexts:
+                break
+            ua = random.choice(user_agents) if user_agents else None
+            ctx = await self._new_context(self._key(profile, ua, proxy), profile, ua, proxy)
+            self._idle[id(ctx)] = ctx
+            made += 1
+        return made
+
+    # --------------------
+    # fetch
+    # --------------------
+    async def fetch_html(self, url: str, *, profile: Optional[Dict[str, Any]] = None,
+                         user_agent: Optional[str] = None, proxy: Optional[str] = None,
+                         timeout: float = 20.0, settle_ms: int = 5000) -> Optional[str]:
+        """Load `url` in a pooled context and return the rendered HTML (None on failure)."""
+        self.stats["fetches"] += 1
+        ctx = await self._acquire(profile, user_agent, proxy)
+        ok = True
+        page = None
+        try:
+            page = await ctx.context.new_page()
+            await page.goto(url, wait_until="domcontentloaded", timeout=int(timeout * 1000))
+            try:
+                await page.wait_for_load_state("networkidle", timeout=settle_ms)
+            except Exception:
+                pass
+            return await page.content()
+        except Exception as e:
+            ok = self._browser is not None and self._browser.is_connected()
+            logger.warning(f"⚠️ browser pool: fetch of {url} failed: {e}")
+            return None
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+            await self._release(ctx, ok)
+
+    def retain(self) -> None:
+        self.users += 1
+
+    async def release(self) -> None:
+        """Drop a user; the last one shuts the browser down unless the pool is kept warm."""
+        self.users = max(0, self.users - 1)
+        if self.users == 0 and not KEEP_WARM:
+            await close_pool()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.stats, "idle_contexts": len(self._idle), "leased_contexts": self._leased,
+                "browser_up": bool(self._browser and self._browser.is_connected())}
+
+    async def close(self) -> None:
+        idle, self._idle = list(self._idle.values()), OrderedDict()
+        for ctx in idle:
+            await self._close(ctx)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+# --------------------
+# per-loop registry
+# --------------------
+_POOLS: Dict[int, Tuple[asyncio.AbstractEventLoop, BrowserPool]] = {}
+
+
+def browser_pool(ttl: Optional[float] = None, max_contexts: Optional[int] = None) -> BrowserPool:
+    """The running loop's pool (created on first use; later ttl/max_contexts arguments are ignored)."""
+    loop = asyncio.get_running_loop()
+    for lid in [lid for lid, (lp, _) in _POOLS.items() if lp.is_closed()]:
+        _POOLS.pop(lid, None)
+    hit = _POOLS.get(id(loop))
+    if hit is None or hit[0] is not loop:
+        pool = BrowserPool(
+            ttl=CONTEXT_TTL_SEC if ttl is None else ttl,
+            max_contexts=CONTEXT_MAX if max_contexts is None else max_contexts,
+        )
+        hit = _POOLS[id(loop)] = (loop, pool)
+    return hit[1]
+
+
+def has_pool() -> bool:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    hit = _POOLS.get(id(loop))
+    return hit is not None and hit[0] is loop
+
+
+async def close_pool() -> None:
+    """Close the running loop's pool (worker shutdown / end of a one-shot run)."""
+    loop = asyncio.get_running_loop()
+    hit = _POOLS.pop(id(loop), None)
+    if hit is not None:
+        await hit[1].close()
@@ -0,0 +1,140 @@
+# scrapers/checkpoint.py
+"""
+On-disk crawl checkpoints so a restarted worker resumes a phase instead of
+re-downloading it.
+
+A checkpoint (data/checkpoints/<bookmaker>_<name>.json) records:
+  • pages_done — list pages whose accepted items were all handled
+                 (pipelined_crawl skips fetching them on resume)
+  • done_ids   — match ids whose detail was handled (seeded into the seen set)
+  • failed     — {match_id: list stub} awaiting the tail retry
+
+Writes are atomic (tmp + replace) and throttled to one per CHECKPOINT_EVERY_SEC.
+A checkpoint older than CHECKPOINT_MAX_AGE_SEC is ignored (odds would be stale,
+and list pages shift as matches kick off); a phase that finishes deletes its file.
+Set SCRAPER_CHECKPOINTS=0 to disable.
+"""
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHECKPOINTS_ENABLED = os.getenv("SCRAPER_CHECKPOINTS", "1") != "0"
+CHECKPOINT_DIR = Path(os.getenv("SCRAPER_CHECKPOINT_DIR", "data/checkpoints"))
+CHECKPOINT_EVERY_SEC = float(os.getenv("SCRAPER_CHECKPOINT_EVERY_SEC", "5"))
+CHECKPOINT_MAX_AGE_SEC = float(os.getenv("SCRAPER_CHECKPOINT_MAX_AGE_SEC", "600"))
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", text.lower()).strip("_") or "default"
+
+
+class CrawlCheckpoint:
+    def __init__(self, bookmaker: str, name: str, failed: Optional[Dict[str, Any]] = None,
+                 directory: Path = CHECKPOINT_DIR):
+        self.path = directory / f"{_slug(bookmaker)}_{_slug(name)}.json"
+        self.pages_done: set = set()
+        self.done_ids: set = set()
+        # Shared with the scraper's own failed map, so the file always has the current set
+        self.failed: Dict[str, Any] = failed if failed is not None else {}
+        self.started_at = time.time()
+        self.resumed = False
+        self._last_save = 0.0
+        self._dirty = False
+
+    # --------------------
+    # load / save
+    # --------------------
+    def load(self) -> bool:
+        """Adopt a fresh on-disk checkpoint; returns True when resuming."""
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"⚠️ checkpoint: ignoring unreadable {self.path}: {e}")
+            return False
+        age = time.time() - float(raw.get("updated_at", 0))
+        if age > CHECKPOINT_MAX_AGE_SEC:
+            logger.info(f"🗂️ checkpoint {self.path.name} is {age:.0f}s old — starting fresh.")
+            self.discard()
+            return False
+        self.pages_done = set(int(p) for p in raw.get("pages_done", []))
+        self.done_ids = set(str(i) for i in raw.get("done_ids", []))
+        self.failed.update({str(k): v for k, v in (raw.get("failed") or {}).items()})
+        self.started_at = float(raw.get("started_at", self.started_at))
+        self.resumed = True
+        logger.info(
+            f"🗂️ Resuming from {self.path.name}: {len(self.pages_done)} pages, "
+            f"{len(self.done_ids)} matches done, {len(self.failed)} failed."
+        )
+        return True
+
+    def save(self, force: bool = False) -> None:
+        if not (self._dirty or force):
+            return
+        now = time.time()
+        if not force and now - self._last_save < CHECKPOINT_EVERY_SEC:
+            return
+        payload = {
+            "version": 1,
+            "started_at": self.started_at,
+            "updated_at": now,
+            "pages_done": sorted(self.pages_done),
+            "done_ids": sorted(self.done_ids),
+            "failed": self.failed,
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(payload, separators=(",", ":"), default=str), encoding="utf-8")
+            os.replace(tmp, self.path)
+            self._last_save = now
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"⚠️ checkpoint: could not write {self.path}: {e}")
+
+    def discard(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️ checkpoint: could not remove {self.path}: {e}")
+
+    # --------------------
+    # progress
+    # --------------------
+    def page_done(self, page: int) -> None:
+        self.pages_done.add(int(page))
+        self._dirty = True
+        self.save()
+
+    def item_done(self, item_id: Any) -> None:
+        if item_id is None:
+            return
+        self.done_ids.add(str(item_id))
+        self._dirty = True
+        self.save()
+
+    def is_page_done(self, page: int) -> bool:
+        return page in self.pages_done
+
+    def complete(self) -> None:
+        """The phase finished (including its tail retry): nothing left to resume."""
+        self.discard()
+
+
+def open_checkpoint(bookmaker: str, name: str, failed: Optional[Dict[str, Any]] = None) -> Optional[CrawlCheckpoint]:
+    """Checkpoint for one crawl phase (resumed if a fresh one exists), or None when disabled."""
+    if not CHECKPOINTS_ENABLED:
+        return None
+    ckpt = CrawlCheckpoint(bookmaker, name, failed=failed)
+    ckpt.load()
+    return ckpt
@@ -0,0 +1,376 @@
+# scrapers/crawler.py
+"""
+Generic list → detail crawler shared by the bookmaker API scrapers.
+
+A bookmaker subclasses ListDetailCrawler and declares only what is specific to it:
+
+    list_page(period, index)        → list rows of page `index` (0-based)
+    row_key(row)                    → stable match id (dedup, checkpoints, retries)
+    row_kickoff(row)                → raw kickoff (epoch sec/ms or ISO) for the window filter
+    row_eligible(row)               → sport / has-markets gate before any detail request
+    detail_url(match_id)            → detail endpoint
+    detail_ok(payload)              → is this a usable detail payload?
+    parse_and_store(stub, payload, only_priority) → markets stored
+    retry_stub(match_id)            → minimal stub when a failed row is unknown
+  optional:
+    detail_request_kwargs()         → extra try_api kwargs (headers, timeout)
+    store_inline(row, only_priority)→ list rows that already carry markets (no detail call)
+    batched_detail(match_id)        → payload from a multi-game request, or None
+    on_phase_start / on_phase_end   → per-phase setup / summary
+  sharded crawls (scrapers/sharding.py):
+    prepare_run()                   → per-run setup (e.g. discover the sport id)
+    crawl_plan(mode)                → the CrawlPasses a run of `mode` makes
+    pass_done(crawl_pass)           → bookkeeping once a pass finished
+
+The engine owns everything else, in one place:
+  • time windows (CrawlWindow) routed client-side from ONE list crawl, nearest first
+  • dedup (seen set), AIMD host limiter + per-window caps, pipelined list/detail
+    (AsyncBaseScraper.pipelined_crawl), per-detail retries with backoff + jitter
+  • checkpoints (scrapers/checkpoint.py) and the concurrent tail retry
+  • tqdm progress and phase summaries
+  • the split used by sharded crawls: collect_rows (list half, coordinator) and
+    fetch_rows (detail half, one shard of match ids per worker)
+"""
+import asyncio
+import contextlib
+import random
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from tqdm import tqdm
+
+from .async_base_scraper import TAIL_RETRY_BASE_DELAY, TAIL_RETRY_CONCURRENCY, AsyncBaseScraper
+
+
+def ts_to_dt(ts) -> Optional[datetime]:
+    """Kickoff (epoch sec/ms or ISO string) → aware UTC datetime; None if unparseable."""
+    try:
+        if ts is None:
+            return None
+        if isinstance(ts, (int, float)) or (isinstance(ts, str) and ts.isdigit()):
+            val = float(ts)
+            if val > 1e12:  # epoch ms
+                val /= 1000.0
+            return datetime.fromtimestamp(val, tz=timezone.utc)
+        s = str(ts)
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        return datetime.fromisoformat(s).astimezone(timezone.utc)
+    except Exception:
+        return None
+
+
+def in_window(start_ts, start_dt: Optional[datetime], end_dt: Optional[datetime]) -> bool:
+    """True if start_ts ∈ [start_dt, end_dt)."""
+    dt = ts_to_dt(start_ts)
+    if dt is None:
+        return False
+    if start_dt and dt < start_dt:
+        return False
+    if end_dt and dt >= end_dt:
+        return False
+    return True
+
+
+@dataclass
+class CrawlWindow:
+    name: str
+    start_dt: Optional[datetime]
+    end_dt: Optional[datetime]
+    concurrency: int
+    priority: int = 0               # lower = dispatched first
+    only_priority: bool = True
+    stored: int = 0
+    semaphore: Optional[asyncio.Semaphore] = None
+
+
+@dataclass
+class CrawlPass:
+    period: Any                     # list period / filter passed to list_page
+    windows: List[CrawlWindow]
+    pages_per_batch: int
+
+
+def _fmt(dt: Optional[datetime]) -> str:
+    return dt.strftime("%Y-%m-%d %H:%M") if dt else "∞"
+
+
+class ListDetailCrawler(AsyncBaseScraper):
+    # per-book tuning (override as class attributes)
+    detail_retries: int = 3
+    detail_retry_delay: float = 0.5
+    tail_retry_concurrency: int = TAIL_RETRY_CONCURRENCY
+    tail_retry_delay: float = TAIL_RETRY_BASE_DELAY
+    accept_unknown_kickoff: bool = False   # rows without a kickoff: crawl them (True) or drop them
+    progress_desc: str = "Scraping soccer matches"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._seen: set = set()
+        self._failed_details: Dict[str, dict] = {}   # match_id -> list stub, for the tail retry
+        self.semaphore = None                        # host-wide AIMD gate of the running phase
+
+    def reset_run_state(self) -> None:
+        super().reset_run_state()
+        self._seen.clear()
+        self._failed_details.clear()
+
+    # --------------------
+    # adapter surface
+    # --------------------
+    async def list_page(self, period: Any, index: int) -> List[dict]:
+        raise NotImplementedError
+
+    def row_key(self, row: dict) -> Optional[str]:
+        mid = row.get("id")
+        return None if mid is None else str(mid)
+
+    def row_kickoff(self, row: dict) -> Any:
+        return row.get("start_time")
+
+    def row_eligible(self, row: dict) -> bool:
+        return True
+
+    def detail_url(self, match_id: Any) -> str:
+        raise NotImplementedError
+
+    def detail_request_kwargs(self) -> Dict[str, Any]:
+        return {}
+
+    def detail_ok(self, payload: Any) -> bool:
+        return bool(payload)
+
+    def retry_stub(self, match_id: str) -> dict:
+        return {"id": match_id}
+
+    async def store_inline(self, row: dict, only_priority: bool) -> Optional[int]:
+        return None
+
+    async def batched_detail(self, match_id: Any) -> Optional[Any]:
+        return None
+
+    def on_phase_start(self, windows: List[CrawlWindow]) -> None:
+        pass
+
+    def on_phase_end(self, windows: List[CrawlWindow]) -> None:
+        pass
+
+    async def prepare_run(self) -> None:
+        pass
+
+    def crawl_plan(self, mode: Optional[str] = None) -> List[CrawlPass]:
+        raise NotImplementedError(f"{type(self).__name__} has no crawl plan (cannot be sharded)")
+
+    def pass_done(self, crawl_pass: CrawlPass) -> None:
+        pass
+
+    # --------------------
+    # detail fetch
+    # --------------------
+    async def fetch_match_details(self, row: dict, only_priority: bool = False,
+                                  semaphore: Optional[asyncio.Semaphore] = None) -> int:
+        if not self.row_eligible(row):
+            return 0
+
+        inline = await self.store_inline(row, only_priority)
+        if inline is not None:
+            return inline
+
+        match_id = self.row_key(row)
+        if not match_id:
+            return 0
+
+        data = await self.batched_detail(match_id)
+        if data is not None:
+            return await self.parse_and_store(row, data, only_priority=only_priority)
+
+        url = self.detail_url(match_id)
+        for attempt in range(1, self.detail_retries + 1):
+            async with (semaphore or contextlib.nullcontext()), self.semaphore:
+                data = await self.try_api(url, cb_key=f"api:{url}", **self.detail_request_kwargs())
+            if self.detail_ok(data):
+                return await self.parse_and_store(row, data, only_priority=only_priority)
+            if attempt < self.detail_retries:
+                # ⤴️ Exponential backoff + jitter (slot released meanwhile)
+                await asyncio.sleep(self.detail_retry_delay * (2 ** (attempt - 1)) + random.random() * 0.4)
+
+        # record failed for tail-retry (the list stub keeps kickoff/teams for the retry)
+        self._failed_details[match_id] = row
+        return 0
+
+    # --------------------
+    # phases
+    # --------------------
+    def phase_window(self, *, only_priority: bool, concurrency: int,
+                     start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> CrawlWindow:
+        """One window named by its offset from now (0h/24h/48h), so a restarted run finds its checkpoint."""
+        offset_h = round((start_dt - datetime.now(timezone.utc)).total_seconds() / 3600) if start_dt else "all"
+        return CrawlWindow(f"{'priority' if only_priority else 'full'}_{offset_h}h", start_dt, end_dt,
+                           concurrency=concurrency, only_priority=only_priority)
+
+    async def scrape_phase(self, *, only_priority: bool, concurrency: int, pages_per_batch: int,
+                           start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None,
+                           period: Any = None) -> int:
+        w = self.phase_window(only_priority=only_priority, concurrency=concurrency, start_dt=start_dt, end_dt=end_dt)
+        return (await self.scrape_windows(period=period, windows=[w], pages_per_batch=pages_per_batch))[w.name]
+
+    def route_row(self, row: dict, windows: List[CrawlWindow]) -> Optional[CrawlWindow]:
+        """First window containing the row's kickoff (None: outside every window)."""
+        kickoff = self.row_kickoff(row)
+        if kickoff is None and self.accept_unknown_kickoff:
+            return windows[0]
+        for w in windows:
+            if in_window(kickoff, w.start_dt, w.end_dt):
+                return w
+        return None
+
+    def accept_row(self, row: dict, windows: List[CrawlWindow]) -> bool:
+        # List-level window filter + dedup BEFORE scheduling details
+        if self.route_row(row, windows) is None:
+            return False
+        mid = self.row_key(row)
+        if not mid or mid in self._seen:
+            return False
+        self._seen.add(mid)
+        return True
+
+    async def scrape_windows(self, *, period: Any = None, windows: List[CrawlWindow],
+                             pages_per_batch: int) -> Dict[str, int]:
+        """
+        One list crawl for one or more time windows: every list page is fetched once,
+        each row is routed to the first window containing its kickoff, and details are
+        dispatched nearest-window-first under each window's own concurrency cap.
+        """
+        single = len(windows) == 1
+        if single:
+            w = windows[0]
+            span = f"{_fmt(w.start_dt)} → {_fmt(w.end_dt)}" if (w.start_dt or w.end_dt) else "All upcoming"
+            print(f"\n🚀 Starting phase: {'PRIORITY' if w.only_priority else 'FULL'} ({span})")
+        else:
+            print("\n🚀 Starting single-pass phase: " + ", ".join(w.name for w in windows))
+        for w in windows:
+            # one window: the AIMD gate alone (it may grow past the starting concurrency)
+            w.semaphore = None if single else asyncio.Semaphore(w.concurrency)
+            w.stored = 0
+
+        # Host-wide AIMD gate; window semaphores only cap each window's share of it
+        self.semaphore = self.concurrency_limiter(self.detail_url("0"), max(w.concurrency for w in windows))
+        self.on_phase_start(windows)
+
+        label = (f"period_{period}:" if period is not None else "") + "+".join(w.name for w in windows)
+        # A crashed run of this phase left pages/ids done: resume instead of starting over
+        ckpt = self.crawl_checkpoint(label, failed=self._failed_details)
+
+        pbar = tqdm(desc=self.progress_desc, unit="match")
+
+        async def _handle(row: dict) -> int:
+            w = self.route_row(row, windows)  # list rows may be shared via caches: do not tag them
+            n = await self.fetch_match_details(row, only_priority=w.only_priority, semaphore=w.semaphore)
+            w.stored += n or 0
+            return n
+
+        try:
+            # ⚡ List pages keep flowing while details are fetched (no batch barrier)
+            total = await self.pipelined_crawl(
+                fetch_page=lambda i: self.list_page(period, i),
+                handle_item=_handle,
+                accept=lambda row: self.accept_row(row, windows),
+                priority=None if single else (lambda row: self.route_row(row, windows).priority),
+                producers=pages_per_batch,
+                workers=getattr(self.semaphore, "max_limit", windows[0].concurrency) if single
+                else sum(w.concurrency for w in windows),
+                on_result=lambda n: pbar.update(1),
+                label=label,
+                checkpoint=ckpt,
+                item_key=self.row_key,
+            )
+        finally:
+            pbar.close()
+            self.on_phase_end(windows)
+        print(f"✅ Phase complete — stored {total} matches ({self.metrics['payloads_skipped']} unchanged payloads skipped)")
+
+        # 🔁 Tail-retry for failed details in this phase
+        await self.retry_failed_details(only_priority=all(w.only_priority for w in windows))
+        await self.flush_refresh_schedule()
+        if ckpt:
+            ckpt.complete()
+        return {w.name: w.stored for w in windows}
+
+    # --------------------
+    # sharded crawl halves
+    # --------------------
+    async def collect_rows(self, crawl_pass: CrawlPass) -> Dict[str, List[dict]]:
+        """List half of scrape_windows: accepted, deduped rows per window name (no detail requests)."""
+        windows = crawl_pass.windows
+        rows: Dict[str, List[dict]] = {w.name: [] for w in windows}
+
+        async def _keep(row: dict) -> int:
+            rows[self.route_row(row, windows).name].append(row)
+            return 0
+
+        await self.pipelined_crawl(
+            fetch_page=lambda i: self.list_page(crawl_pass.period, i),
+            handle_item=_keep,
+            accept=lambda row: self.accept_row(row, windows),
+            producers=crawl_pass.pages_per_batch,
+            workers=1,
+            label=(f"period_{crawl_pass.period}:" if crawl_pass.period is not None else "")
+                  + "+".join(w.name for w in windows) + ":list",
+        )
+        return rows
+
+    async def fetch_rows(self, rows: List[dict], *, only_priority: bool, concurrency: int,
+                         rate_share: float = 1.0) -> int:
+        """
+        Detail half for one shard of list rows: fetch + store under the host AIMD gate, then
+        the tail retry. `rate_share` < 1 draws requests from a bucket at that share of the
+        host rate (shards sharing one egress).
+        """
+        w = CrawlWindow("shard", None, None, concurrency=concurrency, only_priority=only_priority)
+        with self.rate_share(self.detail_url("0"), rate_share):
+            self.semaphore = self.concurrency_limiter(self.detail_url("0"), concurrency)
+            self.on_phase_start([w])
+            try:
+                results = await asyncio.gather(
+                    *(self.fetch_match_details(row, only_priority=only_priority) for row in rows),
+                    return_exceptions=True,
+                )
+            finally:
+                self.on_phase_end([w])
+            for r in results:
+                if isinstance(r, Exception):
+                    self.log("shard_detail_failed", level="warning", error=str(r))
+            stored = sum(r for r in results if isinstance(r, int))
+            stored += await self.retry_failed_details(only_priority=only_priority)
+            await self.flush_refresh_schedule()
+            return stored
+
+    # --------------------
+    # tail retry
+    # --------------------
+    async def retry_failed_details(self, *, only_priority: bool,
+                                   start_dt: Optional[datetime] = None, end_dt: Optional[datetime] = None) -> int:
+        if not self._failed_details:
+            return 0
+        stubs = dict(self._failed_details)
+        self._failed_details.clear()
+        print(f"🔁 Tail retry for {len(stubs)} failed details ({self.tail_retry_concurrency} at a time)...")
+
+        async def _attempt(mid: str) -> Optional[int]:
+            # the recorded list stub, or a minimal one (checkpoints from older runs)
+            stub = stubs.get(mid) or self.retry_stub(mid)
+            data = await self.try_api(self.detail_url(mid), cb_key=f"retry:{mid}", **self.detail_request_kwargs())
+            if self.detail_ok(data):
+                return await self.parse_and_store(stub, data, only_priority=only_priority)
+            return None
+
+        recovered, gave_up = await self.retry_concurrently(
+            list(stubs), _attempt,
+            concurrency=self.tail_retry_concurrency,
+            attempts=self.detail_retries + 1,
+            base_delay=self.tail_retry_delay,
+            label="priority" if only_priority else "full",
+        )
+        print(f"🔁 Tail retry complete — recovered {recovered} ({len(gave_up)} still failing)")
+        return recovered
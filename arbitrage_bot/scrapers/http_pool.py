@@ -0,0 +1,277 @@
+# scrapers/http_pool.py
+"""
+Process-wide HTTP connection layer shared by every scraper.
+
+  • AsyncClient registry keyed by (host, proxy, event loop): scrapers of the same
+    host share one keep-alive pool instead of each paying DNS + TCP + TLS again.
+    Clients are loop-bound (httpx/anyio), so each loop gets its own; a client is
+    closed when its last user releases it unless lingering is on (long-lived
+    worker loops keep warm connections between runs).
+  • HTTP/2 multiplexing when the optional `h2` package is installed
+    (SCRAPER_HTTP2=0 forces HTTP/1.1).
+  • In-process DNS cache (TTL) in front of socket.getaddrinfo, which outlives loops.
+  • warm_up(): resolve + connect ahead of the first real request.
+  • pool_stats(): requests, new TCP connections, TLS handshakes, reuse ratio
+    (collected through the httpcore trace extension) and DNS hit counts.
+
+The sync BaseScraper shares one requests.Session with a larger urllib3 pool.
+"""
+import asyncio
+import importlib.util
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+HTTP2_ENABLED = os.getenv("SCRAPER_HTTP2", "1") != "0" and HTTP2_AVAILABLE
+DNS_TTL = float(os.getenv("SCRAPER_DNS_TTL", "300"))                # 0 disables the DNS cache
+KEEPALIVE_EXPIRY = float(os.getenv("SCRAPER_KEEPALIVE_SEC", "60"))
+MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE = int(os.getenv("SCRAPER_MAX_KEEPALIVE", "50"))
+LINGER = os.getenv("SCRAPER_HTTP_LINGER", "0") == "1"               # keep idle clients open on their loop
+
+_lock = threading.Lock()
+_stats: Dict[str, int] = {
+    "clients_created": 0,
+    "requests": 0,
+    "new_connections": 0,
+    "tls_handshakes": 0,
+    "dns_lookups": 0,
+    "dns_hits": 0,
+}
+
+
+def _bump(key: str, n: int = 1) -> None:
+    with _lock:
+        _stats[key] += n
+
+
+def set_linger(flag: bool) -> None:
+    """Keep released clients open (only sensible when the owning loop is long-lived)."""
+    global LINGER
+    LINGER = bool(flag)
+
+
+# --------------------
+# DNS cache
+# --------------------
+_dns_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_orig_getaddrinfo = socket.getaddrinfo
+_dns_installed = False
+
+
+def _cached_getaddrinfo(host, port, family=0, type=0, proto=0, flags=0):
+    key = (host, port, family, type, proto, flags)
+    now = time.monotonic()
+    hit = _dns_cache.get(key)
+    if hit and hit[0] > now:
+        _bump("dns_hits")
+        return hit[1]
+    _bump("dns_lookups")
+    result = _orig_getaddrinfo(host, port, family, type, proto, flags)
+    _dns_cache[key] = (now + DNS_TTL, result)
+    return result
+
+
+def install_dns_cache() -> None:
+    """Wrap socket.getaddrinfo with a TTL cache (idempotent; no-op when SCRAPER_DNS_TTL=0)."""
+    global _dns_installed
+    if _dns_installed or DNS_TTL <= 0:
+        return
+    socket.getaddrinfo = _cached_getaddrinfo
+    _dns_installed = True
+
+
+def prime_dns(urls: Iterable[str]) -> int:
+    """Resolve hosts now (sync; e.g. at worker start). Returns how many resolved."""
+    install_dns_cache()
+    ok = 0
+    for url in urls:
+        parts = urlsplit(url if "://" in url else f"https://{url}")
+        if not parts.hostname:
+            continue
+        try:
+            socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80),
+                               0, socket.SOCK_STREAM)
+            ok += 1
+        except OSError as e:
+            logger.warning(f"⚠️ DNS warm-up failed for {parts.hostname}: {e}")
+    return ok
+
+
+# --------------------
+# connection tracing
+# --------------------
+async def _trace(event_name: str, info: Dict[str, Any]) -> None:
+    if event_name == "connection.connect_tcp.complete":
+        _bump("new_connections")
+    elif event_name == "connection.start_tls.complete":
+        _bump("tls_handshakes")
+
+
+async def _on_request(request: httpx.Request) -> None:
+    _bump("requests")
+    request.extensions["trace"] = _trace
+
+
+# --------------------
+# client registry
+# --------------------
+class _Entry:
+    __slots__ = ("client", "loop", "refs")
+
+    def __init__(self, client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop):
+        self.client = client
+        self.loop = loop
+        self.refs = 0
+
+
+_clients: Dict[Tuple[str, str, int], _Entry] = {}
+
+
+def _key(url: str, proxy: Optional[str], loop) -> Tuple[str, str, int]:
+    return (urlsplit(url).netloc.lower(), proxy or "", id(loop))
+
+
+def acquire_client(url: str, proxy: Optional[str] = None, headers: Optional[Dict[str, str]] = None,
+                   timeout: float = 20.0, http2: Optional[bool] = None) -> httpx.AsyncClient:
+    """
+    Shared AsyncClient for `url`'s host on the running loop (created on first use).
+    Pair every call with release_client(). Headers/timeout only apply on creation;
+    per-request values still override them.
+    """
+    install_dns_cache()
+    loop = asyncio.get_running_loop()
+    key = _key(url, proxy, loop)
+    with _lock:
+        # drop clients of loops that are gone (their sockets died with the loop)
+        for k in [k for k, e in _clients.items() if e.loop.is_closed()]:
+            _clients.pop(k, None)
+        entry = _clients.get(key)
+        if entry is None or entry.client.is_closed:
+            use_h2 = HTTP2_ENABLED if http2 is None else (bool(http2) and HTTP2_AVAILABLE)
+            client = httpx.AsyncClient(
+                headers=headers,
+                timeout=timeout,
+                trust_env=False,
+                http2=use_h2,
+                proxies=proxy or None,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=MAX_CONNECTIONS,
+                    max_keepalive_connections=MAX_KEEPALIVE,
+                    keepalive_expiry=KEEPALIVE_EXPIRY,
+                ),
+                event_hooks={"request": [_on_request]},
+            )
+            entry = _clients[key] = _Entry(client, loop)
+            _stats["clients_created"] += 1
+        entry.refs += 1
+        return entry.client
+
+
+async def release_client(client: httpx.AsyncClient) -> None:
+    """Drop one reference; close the client when unused (unless lingering)."""
+    to_close = None
+    with _lock:
+        for k, entry in list(_clients.items()):
+            if entry.client is client:
+                entry.refs = max(0, entry.refs - 1)
+                if entry.refs == 0 and not LINGER:
+                    _clients.pop(k, None)
+                    to_close = client
+                break
+        else:
+            to_close = client  # not pooled (e.g. registry already reset)
+    if to_close is not None and not to_close.is_closed:
+        await to_close.aclose()
+
+
+async def close_all() -> int:
+    """Close every pooled client bound to the running loop (e.g. at worker shutdown)."""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        mine = [(k, e) for k, e in _clients.items() if e.loop is loop]
+        for k, _ in mine:
+            _clients.pop(k, None)
+    for _, entry in mine:
+        try:
+            await entry.client.aclose()
+        except Exception as e:
+            logger.warning(f"⚠️ http pool: close failed: {e}")
+    return len(mine)
+
+
+async def warm_up(urls: Iterable[str], proxy: Optional[str] = None, timeout: float = 5.0) -> int:
+    """
+    Open a pooled connection per host on the running loop (HEAD of the origin; any
+    response counts). Clients stay registered for later acquire_client() calls.
+    """
+    origins = {}
+    for url in urls:
+        parts = urlsplit(url)
+        if parts.scheme and parts.netloc:
+            origins[parts.netloc.lower()] = f"{parts.scheme}://{parts.netloc}/"
+
+    async def _one(origin: str) -> bool:
+        client = acquire_client(origin, proxy=proxy, timeout=timeout)
+        try:
+            await client.head(origin, timeout=timeout)
+            return True
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ http pool: warm-up of {origin} failed: {e}")
+            return False
+        finally:
+            with _lock:
+                for entry in _clients.values():
+                    if entry.client is client:
+                        entry.refs = max(0, entry.refs - 1)  # keep it open for the next user
+
+    results = await asyncio.gather(*(_one(o) for o in origins.values()))
+    return sum(results)
+
+
+def pool_stats() -> Dict[str, Any]:
+    with _lock:
+        s = dict(_stats)
+        clients = sum(1 for e in _clients.values() if not e.client.is_closed)
+    reqs = s["requests"]
+    return {
+        **s,
+        "clients_open": clients,
+        "http2": HTTP2_ENABLED,
+        "reuse_ratio": round(1.0 - s["new_connections"] / reqs, 3) if reqs else None,
+        "dns_cache": _dns_installed,
+    }
+
+
+# --------------------
+# sync (requests) side
+# --------------------
+_session = None
+
+
+def shared_session():
+    """One requests.Session per process with a pool sized for concurrent scrapers."""
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            install_dns_cache()
+            sess = requests.Session()
+            adapter = HTTPAdapter(pool_connections=32, pool_maxsize=MAX_KEEPALIVE)
+            sess.mount("https://", adapter)
+            sess.mount("http://", adapter)
+            _session = sess
+        return _session
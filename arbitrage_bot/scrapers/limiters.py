@@ -0,0 +1,385 @@
+# scrapers/limiters.py
+"""
+Per-host request limiters shared by every scraper instance in the process.
+
+TokenBucket — request *rate* per host (rate tokens/sec, up to `burst` stored).
+  A caller reserves its token under a tiny thread lock and then sleeps on its own,
+  so nobody holds a lock while waiting and hosts never block each other.
+
+AdaptiveLimiter — AIMD concurrency gate (drop-in for asyncio.Semaphore):
+  • additive increase (~+1 slot per `limit` healthy responses) while latency stays
+    near its baseline and the recent error rate is low
+  • multiplicative decrease on 429/5xx, Retry-After (also pauses new acquisitions),
+    latency spikes and bursts of transport errors; at most once per cooldown
+
+The learned limit survives across runs/event loops; only the in-flight bookkeeping
+is reset when the limiter is first used from a new loop (Celery tasks run each
+scrape on a fresh loop).
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from urllib.parse import urlsplit
+
+ADAPTIVE_ENABLED = os.getenv("SCRAPER_ADAPTIVE_CONCURRENCY", "1") != "0"
+ADAPTIVE_MIN = int(os.getenv("SCRAPER_MIN_CONCURRENCY", "2"))
+ADAPTIVE_MAX_FACTOR = float(os.getenv("SCRAPER_MAX_CONCURRENCY_FACTOR", "2.0"))  # ceiling = initial × factor
+
+RATE_BURST = int(os.getenv("SCRAPER_RATE_BURST", "5"))
+# Per-host overrides: "api.betika.com=20:40,www.ke.sportpesa.com=8" (req/sec[:burst])
+HOST_RATES_ENV = os.getenv("SCRAPER_HOST_RATES", "")
+
+_WAIT_BUCKETS = (("lt_50ms", 0.05), ("lt_200ms", 0.2), ("lt_1s", 1.0), ("lt_5s", 5.0))
+
+
+def _wait_label(wait: float) -> str:
+    if wait <= 0:
+        return "0s"
+    for label, upper in _WAIT_BUCKETS:
+        if wait < upper:
+            return label
+    return "ge_5s"
+
+
+def host_of(url_or_host: str) -> str:
+    if "://" in (url_or_host or ""):
+        return urlsplit(url_or_host).netloc.lower()
+    return (url_or_host or "").lower()
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        host: str,
+        initial: int = 10,
+        min_limit: int = ADAPTIVE_MIN,
+        max_limit: int = 100,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        latency_spike: float = 2.5,
+        error_rate_max: float = 0.2,
+        cooldown_sec: float = 2.0,
+        window: int = 50,
+    ):
+        self.host = host
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.increase = float(increase)
+        self.decrease = float(decrease)
+        self.latency_spike = float(latency_spike)
+        self.error_rate_max = float(error_rate_max)
+        self.cooldown_sec = float(cooldown_sec)
+
+        self._outcomes: Deque[bool] = deque(maxlen=int(window))  # True = error
+        self._lat_fast: Optional[float] = None   # EWMA α=0.3
+        self._lat_base: Optional[float] = None   # EWMA α=0.05 over healthy samples (α=0.02 during spikes)
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+        self.counters = {"acquired": 0, "successes": 0, "errors": 0, "throttles": 0,
+                         "increases": 0, "decreases": 0, "waits": 0}
+        self.last_decrease_reason: Optional[str] = None
+
+    # ---------------------------
+    # gate
+    # ---------------------------
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._in_flight = 0
+            self._waiters = deque()
+
+    async def acquire(self) -> None:
+        self._bind_loop()
+        while True:
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                break
+            await asyncio.sleep(delay)
+        if self._in_flight < int(self.limit) and not self._waiters:
+            self._in_flight += 1
+            self.counters["acquired"] += 1
+            return
+        # FIFO: _wake() reserves the slot before resolving the future (no barging)
+        self.counters["waits"] += 1
+        fut = self._loop.create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+            elif fut.done() and not fut.cancelled():
+                self.release()  # hand the reserved slot back
+            raise
+        self.counters["acquired"] += 1
+
+    def release(self) -> None:
+        self._in_flight = max(0, self._in_flight - 1)
+        self._wake()
+
+    def _wake(self) -> None:
+        delay = self._paused_until - time.monotonic()
+        if delay > 0 and self._waiters and self._loop is not None:
+            self._loop.call_later(delay, self._wake)
+            return
+        while self._in_flight < int(self.limit) and self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._in_flight += 1
+                fut.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    # ---------------------------
+    # feedback
+    # ---------------------------
+    def _error_rate(self) -> float:
+        return (sum(self._outcomes) / len(self._outcomes)) if self._outcomes else 0.0
+
+    def on_success(self, latency: float) -> None:
+        self.counters["successes"] += 1
+        self._outcomes.append(False)
+        self._lat_fast = latency if self._lat_fast is None else 0.7 * self._lat_fast + 0.3 * latency
+        if self._lat_base is None:
+            self._lat_base = latency
+
+        if self._lat_fast > self._lat_base * self.latency_spike:
+            # drift the baseline slowly so a host that is simply slower now is not pinned at min
+            self._lat_base = 0.98 * self._lat_base + 0.02 * latency
+            self._decrease("latency_spike")
+            return
+
+        self._lat_base = 0.95 * self._lat_base + 0.05 * latency
+        if self._error_rate() < self.error_rate_max / 2 and self.limit < self.max_limit:
+            before = int(self.limit)
+            self.limit = min(float(self.max_limit), self.limit + self.increase / max(1.0, self.limit))
+            if int(self.limit) > before:
+                self.counters["increases"] += 1
+                self._wake()
+
+    def on_throttle(self, status: Optional[int] = None, retry_after: Optional[float] = None) -> None:
+        """429/5xx or an explicit Retry-After from the host."""
+        self.counters["throttles"] += 1
+        self._outcomes.append(True)
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + float(retry_after))
+        self._decrease(f"status_{status}" if status else "throttled")
+
+    def on_error(self) -> None:
+        """Transport error / timeout: only back off once they dominate the window."""
+        self.counters["errors"] += 1
+        self._outcomes.append(True)
+        if len(self._outcomes) >= 10 and self._error_rate() > self.error_rate_max:
+            self._decrease("error_rate")
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown_sec:
+            return
+        self._last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        self.counters["decreases"] += 1
+        self.last_decrease_reason = reason
+
+    def widen(self, max_limit: int) -> None:
+        """Raise the ceiling (never lowers the learned limit below min)."""
+        self.max_limit = max(self.max_limit, int(max_limit))
+
+    # ---------------------------
+    # observability
+    # ---------------------------
+    def stats(self) -> Dict[str, object]:
+        return {
+            "limit": round(self.limit, 2),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "error_rate": round(self._error_rate(), 3),
+            "latency_fast_ms": round(self._lat_fast * 1000, 1) if self._lat_fast is not None else None,
+            "latency_base_ms": round(self._lat_base * 1000, 1) if self._lat_base is not None else None,
+            "paused_for_sec": round(max(0.0, self._paused_until - time.monotonic()), 2),
+            "last_decrease_reason": self.last_decrease_reason,
+            **self.counters,
+        }
+
+
+# ===============================
+# process-wide registry (per host)
+# ===============================
+_ADAPTIVE: Dict[str, AdaptiveLimiter] = {}
+
+
+def adaptive_limiter(url_or_host: str, initial: int, max_limit: Optional[int] = None) -> AdaptiveLimiter:
+    """Get (or create) the host's limiter; `initial` only seeds a new one."""
+    host = host_of(url_or_host)
+    ceiling = max_limit or max(initial, int(initial * ADAPTIVE_MAX_FACTOR))
+    lim = _ADAPTIVE.get(host)
+    if lim is None:
+        lim = _ADAPTIVE[host] = AdaptiveLimiter(host, initial=initial, max_limit=ceiling)
+    else:
+        lim.widen(ceiling)
+    return lim
+
+
+def find_adaptive(url_or_host: str) -> Optional[AdaptiveLimiter]:
+    return _ADAPTIVE.get(host_of(url_or_host))
+
+
+def adaptive_stats() -> Dict[str, Dict[str, object]]:
+    return {h: lim.stats() for h, lim in _ADAPTIVE.items()}
+
+
+# ===============================
+# token bucket (per host request rate)
+# ===============================
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = RATE_BURST, name: str = ""):
+        self.name = name
+        self.rate = max(1e-6, float(rate))
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._ts = time.monotonic()
+        self._lock = threading.Lock()  # guards arithmetic only; never held across an await
+        self._waits: Deque[float] = deque(maxlen=2000)
+        self._hist = {"0s": 0, **{label: 0 for label, _ in _WAIT_BUCKETS}, "ge_5s": 0}
+        self.acquired = 0
+        self.delayed = 0
+
+    def reserve(self) -> float:
+        """Take a token now (possibly going into debt); returns how long the caller must wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.burst), self._tokens + (now - self._ts) * self.rate)
+            self._ts = now
+            self._tokens -= 1.0
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.acquired += 1
+            if wait > 0:
+                self.delayed += 1
+            self._waits.append(wait)
+            self._hist[_wait_label(wait)] += 1
+        return wait
+
+    def refund(self) -> None:
+        with self._lock:
+            self._tokens = min(float(self.burst), self._tokens + 1.0)
+
+    async def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund()
+                raise
+        return wait
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+    def stats(self) -> Dict[str, object]:
+        waits = sorted(self._waits)
+
+        def pct(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "rate_per_sec": round(self.rate, 3),
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "acquired": self.acquired,
+            "delayed": self.delayed,
+            "wait_p50_ms": pct(0.5),
+            "wait_p95_ms": pct(0.95),
+            "wait_max_ms": round(waits[-1] * 1000, 1) if waits else None,
+            "wait_histogram": dict(self._hist),
+        }
+
+
+def _parse_host_rates(raw: str) -> Dict[str, tuple]:
+    out: Dict[str, tuple] = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        host, spec = part.split("=", 1)
+        rate, _, burst = spec.partition(":")
+        try:
+            out[host.strip().lower()] = (float(rate), int(burst) if burst else None)
+        except ValueError:
+            continue
+    return out
+
+
+_HOST_RATES = _parse_host_rates(HOST_RATES_ENV)
+_BUCKETS: Dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def token_bucket(url_or_host: str, rate: float, burst: Optional[int] = None) -> TokenBucket:
+    """Get (or create) the host's bucket; SCRAPER_HOST_RATES overrides the caller's rate/burst."""
+    host = host_of(url_or_host)
+    b = _BUCKETS.get(host)
+    if b is not None:
+        return b
+    with _BUCKETS_LOCK:
+        b = _BUCKETS.get(host)
+        if b is None:
+            o_rate, o_burst = _HOST_RATES.get(host, (None, None))
+            b = _BUCKETS[host] = TokenBucket(
+                rate=o_rate or rate, burst=o_burst or burst or RATE_BURST, name=host,
+            )
+    return b
+
+
+def share_bucket(url_or_host: str, rate: float, burst: Optional[int], share: float) -> TokenBucket:
+    """
+    A process-wide bucket at `share` of the host's rate (SCRAPER_HOST_RATES applies first):
+    one of N processes behind the same egress takes 1/N so together they keep the host rate.
+    """
+    if share >= 1.0:
+        return token_bucket(url_or_host, rate, burst)
+    host = host_of(url_or_host)
+    key = f"{host}@{share:.4g}"
+    b = _BUCKETS.get(key)
+    if b is not None:
+        return b
+    with _BUCKETS_LOCK:
+        b = _BUCKETS.get(key)
+        if b is None:
+            o_rate, o_burst = _HOST_RATES.get(host, (None, None))
+            b = _BUCKETS[key] = TokenBucket(
+                rate=(o_rate or rate) * share,
+                burst=max(1, int((o_burst or burst or RATE_BURST) * share)),
+                name=key,
+            )
+    return b
+
+
+def find_bucket(url_or_host: str) -> Optional[TokenBucket]:
+    return _BUCKETS.get(host_of(url_or_host))
+
+
+def rate_stats() -> Dict[str, Dict[str, object]]:
+    return {h: b.stats() for h, b in _BUCKETS.items()}
@@ -0,0 +1,156 @@
+# scrapers/local_runner.py
+"""
+In-process scraper runner for when Celery/Redis is not available
+(main.py --scrape-each-cycle falls back to it when the orchestrator fails).
+
+All scrapers run concurrently on ONE event loop, so a cycle takes about as long
+as the slowest scraper instead of the sum of all of them:
+
+  • async scrapers run inside `async with scraper` (httpx client, browser pool)
+    and through `run()` when they have one (they store to the DB themselves),
+    else `get_multiple_odds()` / `get_odds()`
+  • sync BaseScrapers run in threads of a run-scoped executor
+  • SCRAPER_LOCAL_CONCURRENCY scrapers at a time (0 = all at once)
+  • SCRAPER_LOCAL_TIMEOUT_SEC per scraper; a timed-out async scraper is
+    cancelled and cleaned up, a sync one is abandoned (threads cannot be cancelled;
+    the executor is shut down without waiting so the cycle is not held up)
+  • pooled HTTP clients and the browser pool are closed before the loop ends
+  • the refresh scheduler is not fed: nothing in this process dispatches its queues
+
+SCRAPER_LOCAL_ONLY=1 skips the Celery orchestrator and always runs locally.
+
+Returns per-scraper status, entries and wall time next to the aggregated matches,
+keyed "<bookmaker>:<ScraperClass>" so two scrapers of one book do not collide.
+"""
+import asyncio
+import inspect
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from core.logger import get_logger
+
+from . import browser_pool, http_pool
+from . import scheduler as refresh_sched
+from .async_base_scraper import AsyncBaseScraper
+from .base_scraper import BaseScraper
+
+logger = get_logger(__name__)
+
+LOCAL_CONCURRENCY = int(os.getenv("SCRAPER_LOCAL_CONCURRENCY", "0"))     # 0 = every scraper at once
+LOCAL_TIMEOUT_SEC = float(os.getenv("SCRAPER_LOCAL_TIMEOUT_SEC", "900"))  # 0 = no per-scraper timeout
+LOCAL_ONLY = os.getenv("SCRAPER_LOCAL_ONLY", "0") == "1"                 # never try the Celery orchestrator
+
+
+async def _call(scraper: AsyncBaseScraper, mode: Optional[str]) -> Any:
+    if hasattr(scraper, "run"):
+        run_kwargs = {"mode": mode} if mode and "mode" in inspect.signature(scraper.run).parameters else {}
+        return await scraper.run(**run_kwargs)
+    if hasattr(scraper, "get_multiple_odds"):
+        return await scraper.get_multiple_odds()
+    return await scraper.get_odds()
+
+
+async def _run_async_scraper(scraper: AsyncBaseScraper, mode: Optional[str]) -> Any:
+    async with scraper:
+        out = await _call(scraper, mode)
+        if isinstance(out, list):
+            return out
+        # run() stores to the DB itself: report how many detail payloads it processed
+        return scraper.metrics.get("payloads_processed", 0)
+
+
+def _run_sync_scraper(scraper: BaseScraper) -> Any:
+    if hasattr(scraper, "run"):
+        return scraper.run()
+    return scraper.get_odds()
+
+
+def _result_key(scraper: Any, taken: set) -> str:
+    cls = type(scraper).__name__
+    bookmaker = getattr(scraper, "bookmaker", None)
+    key = f"{bookmaker}:{cls}" if bookmaker else cls
+    n = 2
+    while key in taken:  # the same class twice (e.g. one instance per proxy)
+        key = f"{bookmaker}:{cls}#{n}" if bookmaker else f"{cls}#{n}"
+        n += 1
+    taken.add(key)
+    return key
+
+
+async def run_local_async(
+    scrapers: List[Any],
+    *,
+    concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Run `scrapers` concurrently on the running loop; see the module docstring."""
+    refresh_sched.set_feed(False)  # no dispatch_refresh here: the queues would only grow
+    concurrency = LOCAL_CONCURRENCY if concurrency is None else concurrency
+    timeout = LOCAL_TIMEOUT_SEC if timeout is None else timeout
+    gate = asyncio.Semaphore(concurrency if concurrency > 0 else max(1, len(scrapers)))
+    loop = asyncio.get_running_loop()
+    threads: Optional[ThreadPoolExecutor] = None
+
+    matches: List[Dict[str, Any]] = []
+    results: Dict[str, Dict[str, Any]] = {}
+
+    async def _one(scraper: Any, name: str) -> None:
+        nonlocal threads
+        async with gate:
+            t0 = time.perf_counter()
+            status, entries, error = "OK", 0, None
+            try:
+                if isinstance(scraper, AsyncBaseScraper):
+                    work = _run_async_scraper(scraper, mode)
+                elif isinstance(scraper, BaseScraper):
+                    threads = threads or ThreadPoolExecutor(thread_name_prefix="local-scraper")
+                    work = loop.run_in_executor(threads, _run_sync_scraper, scraper)
+                else:
+                    raise TypeError(f"unknown scraper type {type(scraper).__name__}")
+                out = await (asyncio.wait_for(work, timeout) if timeout > 0 else work)
+                if isinstance(out, list):
+                    matches.extend(out)
+                    entries = len(out)
+                elif isinstance(out, int):
+                    entries = out
+            except asyncio.TimeoutError:
+                status, error = "TIMEOUT", f"no result after {timeout:.0f}s"
+                logger.warning(f"⏱️ {name} timed out after {timeout:.0f}s.")
+            except Exception as e:
+                status, error = "FAILED", str(e)
+                logger.error(f"❌ {name} failed: {e}")
+            results[name] = {
+                "bookmaker": getattr(scraper, "bookmaker", None) or type(scraper).__name__,
+                "status": status,
+                "entries": entries,
+                "seconds": round(time.perf_counter() - t0, 2),
+                "error": error,
+            }
+
+    t0 = time.perf_counter()
+    try:
+        taken: set = set()
+        await asyncio.gather(*(_one(s, _result_key(s, taken)) for s in scrapers))
+    finally:
+        # Clients and Chromium are bound to this loop, which ends with the run
+        await browser_pool.close_pool()
+        await http_pool.close_all()
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+
+    return {
+        "status": "OK" if any(r["status"] == "OK" for r in results.values()) else "FAILED",
+        "matches": matches,
+        "bookmakers_run": sorted({r["bookmaker"] for r in results.values() if r["status"] == "OK"}),
+        "entries": sum(r["entries"] for r in results.values()),
+        "results": results,
+        "elapsed_s": round(time.perf_counter() - t0, 2),
+    }
+
+
+def run_local(scrapers: List[Any], **kwargs: Any) -> Dict[str, Any]:
+    """Sync wrapper for CLI callers (owns the event loop for the duration of the run)."""
+    return asyncio.run(run_local_async(scrapers, **kwargs))
@@ -1,15 +1,19 @@
 # scrapers/orchestrator.py
 import asyncio
+import inspect
 import json
 import logging
 import os
+import time
 from datetime import datetime
-from typing import List, Dict, Any, Optional  # 👈 removed Union
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Union
 
 import redis
-from celery.result import AsyncResult
+from celery import states
+from celery.result import AsyncResult, ResultSet
 
 # ❌ removed: from .base_scraper import BaseScraper
+from . import result_store
 from .async_base_scraper import AsyncBaseScraper  # 👈 async-only
 # ❌ removed: from .tasks import run_scraper_task  (avoids circular import)
 from .scraper_loader import discover_scrapers
@@ -43,13 +47,20 @@ if not logger.handlers:
 _lvl = os.getenv("SCRAPER_LOG_LEVEL", "INFO").upper()
 logger.setLevel(logging._nameToLevel.get(_lvl, logging.INFO))
 
+# Called once per finished bookmaker with its matches (plain function or coroutine function)
+ResultConsumer = Callable[[str, List[Dict[str, Any]]], Union[None, Awaitable[None]]]
+RESULT_POLL_INTERVAL = float(os.getenv("SCRAPER_RESULT_POLL_SEC", "0.5"))  # backends without native join
+
 
 class ScraperOrchestrator:
     """
     Orchestrates distributed scraping using Celery.
     - Auto-discovers scrapers if not provided
     - Optional persistent Redis-backed cache
-    - Concurrency control for waiting on Celery tasks
+    - Results streamed as each task finishes (one collector thread, result-backend
+      pub/sub on Redis) and handed to an optional per-bookmaker consumer
+    - Large results arrive by reference (scrapers/result_store.py) and are read
+      back chunk by chunk; the cache keeps the reference, not the records
     - Structured JSON logging
     - Metrics integration
     """
@@ -58,7 +69,6 @@ class ScraperOrchestrator:
         self,
         scrapers: List[AsyncBaseScraper] = None,  # 👈 type-hint is async-only now
         cache_enabled: bool = True,
-        max_concurrent: int = 5,
         task_timeout: int = 40,
         high_priority_bookmakers: List[str] = None,
         redis_url: Optional[str] = None,
@@ -67,7 +77,6 @@ class ScraperOrchestrator:
         self.scrapers = scrapers or discover_scrapers()
         self.cache_enabled = cache_enabled
         self._in_memory_cache: Dict[str, Any] = {}
-        self.semaphore = asyncio.Semaphore(max_concurrent)
         self.task_timeout = task_timeout
         self.high_priority_bookmakers = set(high_priority_bookmakers or [])
         self.task_retries = task_retries
@@ -127,9 +136,14 @@ class ScraperOrchestrator:
     # --------------------
     # orchestration (async + sync wrappers)
     # --------------------
-    async def run_async(self) -> Dict[str, Any]:
+    async def run_async(self, on_result: Optional[ResultConsumer] = None) -> Dict[str, Any]:
         """
-        Submit all scrapers as Celery tasks and collect results.
+        Submit all scrapers as Celery tasks and collect results as they finish.
+
+        With `on_result`, each bookmaker's matches (cache hits included) go to the
+        consumer the moment they land and are NOT kept: the returned "matches" stays
+        empty and orchestrator memory does not grow with the number of scrapers.
+        Without it, matches are aggregated and returned as before.
         """
         if not self.scrapers:
             logger.warning(json.dumps({"event": "no_scrapers_found"}))
@@ -142,6 +156,7 @@ class ScraperOrchestrator:
 
         aggregated: List[Dict[str, Any]] = []
         bookmakers_run: List[str] = []
+        counts: Dict[str, int] = {}
 
         async def orchestrate():
             tasks: List[tuple] = []
@@ -156,11 +171,17 @@ class ScraperOrchestrator:
                             scraper.log("cache_hit", bookmaker=scraper.bookmaker)
                         except Exception:
                             logger.info(json.dumps({"event": "cache_hit", "bookmaker": scraper.bookmaker}))
-                        aggregated.extend(cached)
-                        bookmakers_run.append(scraper.bookmaker)
-                        continue
-
-                queue = "high_priority" if (
+                        if result_store.is_ref(cached):
+                            delivered = await self._deliver_ref(scraper.bookmaker, cached, on_result, aggregated, counts)
+                        else:
+                            await self._deliver(scraper.bookmaker, cached, on_result, aggregated, counts)
+                            delivered = True
+                        if delivered:
+                            bookmakers_run.append(scraper.bookmaker)
+                            continue
+
+                # Book queues: the task router picks the bookmaker's queue
+                queue = None if BOOK_QUEUES else "high_priority" if (
                     scraper.bookmaker in self.high_priority_bookmakers
                     or getattr(scraper, "priority", False)
                 ) else "default"
@@ -197,70 +218,181 @@ class ScraperOrchestrator:
                     if self.redis:
                         self.redis.incr("scraper:metrics:failure", 1)
 
-            gathered = await self._gather_results(tasks, bookmakers_run)
-            aggregated.extend(gathered)
+            await self._stream_results(tasks, bookmakers_run, on_result, aggregated, counts)
             return aggregated
 
         matches = await orchestrate()
         return {
             "status": "OK",
             "matches": matches,
+            "match_counts": counts,
             "bookmakers_run": list(set(bookmakers_run)),
             "timestamp": datetime.utcnow().isoformat(),
         }
 
-    def run(self) -> Dict[str, Any]:
+    def run(self, on_result: Optional[ResultConsumer] = None) -> Dict[str, Any]:
         """
         Sync wrapper for CLI scripts. If already in an async context, instruct caller to use run_async().
         """
         try:
             asyncio.get_running_loop()
         except RuntimeError:
-            return asyncio.run(self.run_async())
+            return asyncio.run(self.run_async(on_result))
 
         raise RuntimeError(
             "ScraperOrchestrator.run() called inside a running event loop. "
             "Use: `await ScraperOrchestrator(...).run_async()` instead."
         )
 
-    async def _gather_results(self, tasks: List[tuple], bookmakers_run: List[str]) -> List[Dict[str, Any]]:
-        all_matches: List[Dict[str, Any]] = []
+    async def _deliver(
+        self,
+        bookmaker: str,
+        matches: List[Dict[str, Any]],
+        on_result: Optional[ResultConsumer],
+        aggregated: List[Dict[str, Any]],
+        counts: Dict[str, int],
+    ) -> None:
+        counts[bookmaker] = counts.get(bookmaker, 0) + len(matches)
+        if on_result is None:
+            aggregated.extend(matches)
+            return
+        try:
+            out = on_result(bookmaker, matches)
+            if inspect.isawaitable(out):
+                await out
+        except Exception as e:
+            logger.error(json.dumps({"event": "result_consumer_failed", "bookmaker": bookmaker, "error": str(e)}))
+
+    async def _deliver_ref(
+        self,
+        bookmaker: str,
+        ref: Dict[str, Any],
+        on_result: Optional[ResultConsumer],
+        aggregated: List[Dict[str, Any]],
+        counts: Dict[str, int],
+    ) -> bool:
+        """Stream a stored result chunk by chunk; False if its first chunk is already gone."""
+        for index in range(int(ref.get("chunks", 0))):
+            chunk = await asyncio.to_thread(result_store.load_chunk, ref, index)
+            if chunk is None:
+                logger.warning(json.dumps({"event": "result_ref_expired", "bookmaker": bookmaker,
+                                           "key": ref.get("key"), "chunk": index, "chunks": ref.get("chunks")}))
+                return index > 0
+            await self._deliver(bookmaker, chunk, on_result, aggregated, counts)
+        return True
+
+    def _collect(self, results: List[AsyncResult], emit: Callable[[str, Dict[str, Any]], None]) -> None:
+        """
+        Blocking: emit(task_id, meta) for each task as it finishes, in completion order,
+        then ("", {}) once done. Runs in ONE thread for the whole batch; on Redis the
+        backend waits on pub/sub notifications instead of polling each task.
+        """
+        pending = {r.id: r for r in results}
+        deadline = time.monotonic() + self.task_timeout
+        rs = ResultSet(list(results))
+        try:
+            if rs.supports_native_join:
+                for task_id, meta in rs.iter_native(timeout=self.task_timeout, interval=RESULT_POLL_INTERVAL):
+                    if pending.pop(task_id, None) is not None:
+                        emit(task_id, meta or {})
+            else:
+                while pending and time.monotonic() < deadline:
+                    for task_id, r in list(pending.items()):
+                        if r.ready():
+                            pending.pop(task_id)
+                            emit(task_id, {"status": r.state, "result": r.result})
+                    if pending:
+                        time.sleep(RESULT_POLL_INTERVAL)
+        except Exception as e:
+            # TimeoutError (or a backend error): whatever is still pending is reported below
+            logger.warning(json.dumps({"event": "result_collect_interrupted", "pending": len(pending), "error": str(e)}))
+        finally:
+            for task_id in pending:
+                emit(task_id, {"status": "TIMEOUT", "result": f"no result after {self.task_timeout}s"})
+            emit("", {})
+
+    async def _stream_results(
+        self,
+        tasks: List[tuple],
+        bookmakers_run: List[str],
+        on_result: Optional[ResultConsumer],
+        aggregated: List[Dict[str, Any]],
+        counts: Dict[str, int],
+    ) -> None:
+        if not tasks:
+            return
+        by_id = {async_result.id: (scraper, async_result, cache_key) for scraper, async_result, cache_key in tasks}
+        loop = asyncio.get_running_loop()
+        done: asyncio.Queue = asyncio.Queue()
+
+        def _emit(task_id: str, meta: Dict[str, Any]) -> None:
+            loop.call_soon_threadsafe(done.put_nowait, (task_id, meta))
+
+        collector = loop.run_in_executor(None, self._collect, [r for _, r, _ in tasks], _emit)
+        try:
+            while True:
+                task_id, meta = await done.get()
+                if not task_id:
+                    break
+                scraper, async_result, cache_key = by_id[task_id]
+                await self._handle_result(scraper, meta, cache_key, bookmakers_run, on_result, aggregated, counts)
+                if meta.get("status") in states.READY_STATES:
+                    try:
+                        async_result.forget()  # consumed: free the backend key now, not at result_expires
+                    except Exception:
+                        pass
+        finally:
+            await collector
 
-        async def fetch_result(scraper, async_result: AsyncResult, cache_key: str):
-            async with self.semaphore:
+    async def _handle_result(
+        self,
+        scraper,
+        meta: Dict[str, Any],
+        cache_key: str,
+        bookmakers_run: List[str],
+        on_result: Optional[ResultConsumer],
+        aggregated: List[Dict[str, Any]],
+        counts: Dict[str, int],
+    ) -> None:
+        status, result = meta.get("status"), meta.get("result")
+        if status != states.SUCCESS:
+            scraper.log("task_failed", error=str(result), status=status)
+            logger.error(json.dumps({"event": "task_failed", "bookmaker": scraper.bookmaker, "status": status, "error": str(result)}))
+            if self.redis:
+                self.redis.incr("scraper:metrics:failure", 1)
+            return
+
+        if not result:
+            scraper.log("empty_task_result", bookmaker=scraper.bookmaker)
+            return
+
+        ref = result.get("matches_ref") if isinstance(result, dict) else None
+        matches = result.get("matches") if isinstance(result, dict) else None
+        if result_store.is_ref(ref):
+            await self._deliver_ref(scraper.bookmaker, ref, on_result, aggregated, counts)
+            bookmakers_run.append(scraper.bookmaker)
+            if self.cache_enabled:
+                # The reference is all the cache needs; it lapses with the chunks
+                self._cache_set(cache_key, ref, ttl=min(300, result_store.RESULT_TTL))
+            scraper.log("task_success", bookmaker=scraper.bookmaker, matches=ref.get("count", 0), stored_bytes=ref.get("bytes", 0))
+            if self.redis:
+                self.redis.incr("scraper:metrics:success", 1)
+        elif isinstance(matches, list):
+            await self._deliver(scraper.bookmaker, matches, on_result, aggregated, counts)
+            bookmakers_run.append(scraper.bookmaker)
+            if self.cache_enabled:
                 try:
-                    result = await asyncio.to_thread(async_result.get, timeout=self.task_timeout)
+                    self._cache_set(cache_key, matches)
                 except Exception as e:
-                    scraper.log("task_failed", error=str(e))
-                    logger.error(json.dumps({"event": "task_failed", "bookmaker": scraper.bookmaker, "error": str(e)}))
-                    if self.redis:
-                        self.redis.incr("scraper:metrics:failure", 1)
-                    return
-
-                if not result:
-                    scraper.log("empty_task_result", bookmaker=scraper.bookmaker)
-                    return
-
-                matches = result.get("matches")
-                if isinstance(matches, list):
-                    all_matches.extend(matches)
-                    bookmakers_run.append(scraper.bookmaker)
-                    if self.cache_enabled:
-                        try:
-                            self._cache_set(cache_key, matches)
-                        except Exception as e:
-                            logger.error(json.dumps({"event": "cache_set_failed", "bookmaker": scraper.bookmaker, "error": str(e)}))
-                    scraper.log("task_success", bookmaker=scraper.bookmaker, matches=len(matches))
-                    if self.redis:
-                        self.redis.incr("scraper:metrics:success", 1)
-                else:
-                    scraper.log("invalid_task_result", bookmaker=scraper.bookmaker, result_type=type(matches).__name__)
-                    logger.warning(json.dumps({"event": "invalid_task_result", "bookmaker": scraper.bookmaker, "result": str(matches)}))
-                    if self.redis:
-                        self.redis.incr("scraper:metrics:failure", 1)
-
-        await asyncio.gather(*(fetch_result(s, t, k) for s, t, k in tasks))
-        return all_matches
+                    logger.error(json.dumps({"event": "cache_set_failed", "bookmaker": scraper.bookmaker, "error": str(e)}))
+            scraper.log("task_success", bookmaker=scraper.bookmaker, matches=len(matches))
+            if self.redis:
+                self.redis.incr("scraper:metrics:success", 1)
+        else:
+            scraper.log("invalid_task_result", bookmaker=scraper.bookmaker, result_type=type(matches).__name__)
+            logger.warning(json.dumps({"event": "invalid_task_result", "bookmaker": scraper.bookmaker, "result": str(matches)}))
+            if self.redis:
+                self.redis.incr("scraper:metrics:failure", 1)
 
     # --------------------
     # clean up resources
@@ -285,6 +417,9 @@ class ScraperOrchestrator:
 from celery import Celery
 from kombu import Queue
 from celery.schedules import crontab  # <-- existing
+from .queues import BOOK_QUEUES, book_queues, route_task
+from .scheduler import DISPATCH_EVERY_SEC, SCHEDULER_ENABLED
+from .sharding import SHARD_COUNT
 
 celery = Celery(
     "scrapers",
@@ -293,48 +428,42 @@ celery = Celery(
     include=["scrapers.tasks"],
 )
 
-# Configure queues
+# Configure queues (+ one per bookmaker, so a worker started without -Q still consumes them)
 celery.conf.task_default_queue = "default"
 celery.conf.task_queues = (
     Queue("default", routing_key="default"),
     Queue("high_priority", routing_key="high_priority"),
-)
+) + tuple(Queue(q, routing_key=q) for q in book_queues())
 celery.conf.task_default_exchange = "default"
 celery.conf.task_default_routing_key = "default"
 
-celery.conf.task_routes = {
-    "scrapers.tasks.run_scraper_task": {
-        "queue": "high_priority",
-        "routing_key": "high_priority",
-    },
-}
+# Scraper tasks → one queue per bookmaker (scrapers/queues.py)
+celery.conf.task_routes = (route_task,)
+celery.conf.task_create_missing_queues = True
+celery.conf.worker_prefetch_multiplier = int(os.getenv("SCRAPER_QUEUE_DEFAULT_PREFETCH", "1"))
 
 # PERIODIC SCHEDULE (Celery Beat)
+# With SCRAPER_SHARDS>1 Betika crawls fan out: a coordinator lists, fetch_shard subtasks fetch details.
+BETIKA_CRAWL_TASK = "scrapers.tasks.shard_crawl" if SHARD_COUNT > 1 else "scrapers.tasks.run_scraper_task"
+# With the refresh scheduler on, list crawls are for discovery (new matches, kickoff
+# moves) and per-match detail refreshes are timed by scrapers/scheduler.py instead.
 celery.conf.beat_schedule = {
-    "betika_0_24": {
-        "task": "scrapers.tasks.run_scraper_task",
-        "schedule": crontab(minute="*/5"),
-        "options": {"queue": "high_priority"},
+    # 0–24h every 15 min (5 min without the scheduler); the same single list pass also
+    # refreshes 24–48h whenever that bucket is older than BETIKA_24_48_EVERY_SEC.
+    "betika_0_48": {
+        "task": BETIKA_CRAWL_TASK,
+        "schedule": crontab(minute="*/15" if SCHEDULER_ENABLED else "*/5"),
+        "options": {} if BOOK_QUEUES else {"queue": "high_priority"},
         "kwargs": {
             "scraper_module": "scrapers.betika_scraper",
             "scraper_class": "BetikaScraper",
-            "mode": "24",
-        },
-    },
-    "betika_24_48": {
-        "task": "scrapers.tasks.run_scraper_task",
-        "schedule": crontab(minute="*/15"),
-        "options": {"queue": "high_priority"},
-        "kwargs": {
-            "scraper_module": "scrapers.betika_scraper",
-            "scraper_class": "BetikaScraper",
-            "mode": "48",
+            "mode": "0_48",
         },
     },
     "betika_gt48": {
-        "task": "scrapers.tasks.run_scraper_task",
+        "task": BETIKA_CRAWL_TASK,
         "schedule": crontab(minute="5"),
-        "options": {"queue": "default"},
+        "options": {} if BOOK_QUEUES else {"queue": "default"},
         "kwargs": {
             "scraper_module": "scrapers.betika_scraper",
             "scraper_class": "BetikaScraper",
@@ -342,3 +471,10 @@ celery.conf.beat_schedule = {
         },
     },
 }
+
+if SCHEDULER_ENABLED:
+    celery.conf.beat_schedule["refresh_dispatch"] = {
+        "task": "scrapers.tasks.dispatch_refresh",
+        "schedule": DISPATCH_EVERY_SEC,
+        "options": {"queue": "high_priority", "expires": DISPATCH_EVERY_SEC},
+    }
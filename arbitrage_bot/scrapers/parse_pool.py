@@ -0,0 +1,108 @@
+# scrapers/parse_pool.py
+"""
+Optional process pool for CPU-heavy payload parsing.
+
+Detail payload → normalized records (JSON walking, normalize_market regexes,
+build_match_dict, dateutil parsing, difflib team matching) is pure CPU work; on
+the event loop it stalls every socket the scraper has open. With
+SCRAPER_PARSE_PROCESSES=N (>0) `offload(fn, *args)` runs it in one of N worker
+processes and the loop only pays for pickling the payload in and the compact
+records out.
+
+  • `fn` must be a module-level function (picklable) without DB or network work
+  • workers are started with SCRAPER_PARSE_START_METHOD (default "spawn": safe
+    next to the worker runtime's loop thread)
+  • if the pool cannot start (e.g. inside a daemonic Celery prefork child) or
+    breaks, parsing falls back to running inline — never lost
+
+Off by default; tools/bench_parse_offload.py measures loop lag and throughput
+both ways.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+PARSE_PROCESSES = int(os.getenv("SCRAPER_PARSE_PROCESSES", "0"))   # 0 = parse on the event loop
+START_METHOD = os.getenv("SCRAPER_PARSE_START_METHOD", "spawn")
+
+_lock = threading.Lock()
+_executor: Optional[ProcessPoolExecutor] = None
+_disabled = False   # creation failed once: stay inline for the life of the process
+_stats: Dict[str, int] = {"offloaded": 0, "inline": 0, "broken": 0}
+
+
+def set_processes(n: int) -> None:
+    """Resize (0 disables); takes effect on the next offload."""
+    global PARSE_PROCESSES, _disabled
+    shutdown()
+    PARSE_PROCESSES = max(0, int(n))
+    _disabled = False
+
+
+def parse_executor() -> Optional[ProcessPoolExecutor]:
+    """The process-wide pool (created lazily), or None when parsing runs inline."""
+    global _executor, _disabled
+    if PARSE_PROCESSES <= 0 or _disabled:
+        return None
+    with _lock:
+        if _executor is None:
+            try:
+                _executor = ProcessPoolExecutor(
+                    max_workers=PARSE_PROCESSES,
+                    mp_context=multiprocessing.get_context(START_METHOD),
+                )
+                logger.info(f"🧮 Parse pool started ({PARSE_PROCESSES} processes, {START_METHOD}).")
+            except Exception as e:
+                _disabled = True
+                logger.warning(f"⚠️ parse pool unavailable, parsing inline: {e}")
+        return _executor
+
+
+def _reset_broken() -> None:
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is not None:
+        ex.shutdown(wait=False, cancel_futures=True)
+
+
+async def offload(fn: Callable[..., Any], *args: Any) -> Any:
+    """`fn(*args)` in the parse pool when enabled, else inline on the calling loop."""
+    global _disabled
+    ex = parse_executor()
+    if ex is not None:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(ex, fn, *args)
+            _stats["offloaded"] += 1
+            return result
+        except (BrokenProcessPool, RuntimeError) as e:
+            # RuntimeError from the pool itself: "…after shutdown" / "daemonic processes…"
+            if not isinstance(e, BrokenProcessPool) and not any(w in str(e) for w in ("shutdown", "daemonic")):
+                raise
+            _stats["broken"] += 1
+            logger.warning(f"⚠️ parse pool failed ({e}); parsing inline.")
+            _reset_broken()
+            if "daemonic" in str(e):
+                _disabled = True
+    _stats["inline"] += 1
+    return fn(*args)
+
+
+def stats() -> Dict[str, Any]:
+    return {**_stats, "processes": PARSE_PROCESSES if not _disabled else 0}
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        ex, _executor = _executor, None
+    if ex is not None:
+        ex.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,153 @@
+# scrapers/payload_cache.py
+"""
+Content-hash cache for match-detail payloads.
+
+Most detail responses are byte-identical between cycles. Before parsing, a scraper
+hashes the payload (plus the list stub it is combined with) and compares it with the
+digest recorded the last time that (match_id, scope) was stored; a match means the
+normalize/build/save work would only rewrite the same rows, so it is skipped.
+
+  • one cache per bookmaker, shared by every instance/mode in the process
+  • entries expire after SCRAPER_PAYLOAD_HASH_TTL seconds (forces a periodic re-save)
+  • LRU-bounded to SCRAPER_PAYLOAD_HASH_MAX entries
+  • persisted to data/payload_hashes_<bookmaker>.json on cleanup and reloaded lazily
+
+A digest is only recorded after every market of the payload was saved, so a failed
+write is retried on the next cycle. Set SCRAPER_PAYLOAD_HASH_TTL=0 to disable.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+HASH_TTL = float(os.getenv("SCRAPER_PAYLOAD_HASH_TTL", "1800"))
+HASH_MAX = int(os.getenv("SCRAPER_PAYLOAD_HASH_MAX", "50000"))
+HASH_DIR = Path(os.getenv("SCRAPER_PAYLOAD_HASH_DIR", "data"))
+
+
+def payload_digest(*parts: Any) -> str:
+    """Stable digest of JSON-like parts (key order does not matter)."""
+    blob = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str, ensure_ascii=False)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class PayloadHashCache:
+    def __init__(self, name: str, ttl: float = HASH_TTL, max_entries: int = HASH_MAX,
+                 path: Optional[Path] = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        slug = re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "default"
+        self.path = path or HASH_DIR / f"payload_hashes_{slug}.json"
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # key -> (digest, stored_at)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self.skipped = 0
+        self.processed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    # --------------------
+    # lookups
+    # --------------------
+    def unchanged(self, key: str, digest: str) -> bool:
+        """True (and counted as skipped) if `key` was stored with this digest within the TTL."""
+        with self._lock:
+            self._load()
+            hit = self._entries.get(key)
+            if hit and hit[0] == digest and time.time() - hit[1] < self.ttl:
+                self._entries.move_to_end(key)
+                self.skipped += 1
+                return True
+            self.processed += 1
+            return False
+
+    def remember(self, key: str, digest: str) -> None:
+        with self._lock:
+            self._load()
+            self._entries[key] = (digest, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def forget(self, key: str) -> None:
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty = True
+
+    # --------------------
+    # persistence
+    # --------------------
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"⚠️ payload hashes: ignoring unreadable {self.path}: {e}")
+            return
+        cutoff = time.time() - self.ttl
+        rows = sorted(
+            ((k, v[0], float(v[1])) for k, v in (raw.get("entries") or {}).items()
+             if isinstance(v, list) and len(v) == 2),
+            key=lambda r: r[2],
+        )
+        for key, digest, ts in rows[-self.max_entries:]:
+            if ts > cutoff:
+                self._entries[key] = (digest, ts)
+
+    def flush(self) -> None:
+        """Write live entries to disk (atomic replace); no-op when nothing changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            cutoff = time.time() - self.ttl
+            entries = {k: [d, round(ts, 3)] for k, (d, ts) in self._entries.items() if ts > cutoff}
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"version": 1, "entries": entries}, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"⚠️ payload hashes: could not write {self.path}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "skipped": self.skipped,
+                "processed": self.processed,
+                "ttl_sec": self.ttl,
+            }
+
+
+# --------------------
+# per-bookmaker registry
+# --------------------
+_CACHES: Dict[str, PayloadHashCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def payload_cache(bookmaker: str) -> PayloadHashCache:
+    with _CACHES_LOCK:
+        cache = _CACHES.get(bookmaker)
+        if cache is None:
+            cache = _CACHES[bookmaker] = PayloadHashCache(bookmaker)
+        return cache
@@ -0,0 +1,134 @@
+# scrapers/queues.py
+"""
+Queue-per-bookmaker routing for the scraper tasks.
+
+Every scraper task (run_scraper_task, shard_crawl, fetch_shard, refresh_matches)
+is routed to `scrape.<bookmaker>`, a queue generated from the discovered scraper
+classes, so one slow or backlogged book cannot starve the others and each book
+gets its own worker slots:
+
+  • SCRAPER_QUEUE_CONCURRENCY  "Betika=8,SportPesa=2" — max worker processes per book
+                               (SCRAPER_QUEUE_DEFAULT_CONCURRENCY for the rest)
+  • SCRAPER_QUEUE_MIN          "Betika=2" — floor the autoscaler shrinks to (default 1)
+  • SCRAPER_QUEUE_PREFETCH     "Betika=1" — prefetch multiplier per book's worker (default 1:
+                               long crawls should not sit reserved behind a busy process)
+
+`python -m scrapers.queues` prints one worker command per book. The book queues are
+also declared in the app's task_queues, so a bare `celery -A scrapers.orchestrator
+worker` (no -Q) still consumes them next to default/high_priority; dedicated `-Q
+scrape.<book>` workers are what give each book its own slots. Control tasks
+(dispatch_refresh, merge_shards, …) stay on high_priority. SCRAPER_BOOK_QUEUES=0
+restores the old default/high_priority routing.
+"""
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+BOOK_QUEUES = os.getenv("SCRAPER_BOOK_QUEUES", "1") != "0"
+QUEUE_PREFIX = os.getenv("SCRAPER_QUEUE_PREFIX", "scrape.")
+DEFAULT_CONCURRENCY = int(os.getenv("SCRAPER_QUEUE_DEFAULT_CONCURRENCY", "4"))
+
+# Tasks that run one bookmaker's scraper → where the scraper class sits in the call
+SCRAPER_TASKS = {
+    "scrapers.tasks.run_scraper_task": 1,
+    "scrapers.tasks.shard_crawl": 1,
+    "scrapers.tasks.fetch_shard": 1,
+    "scrapers.tasks.refresh_matches": 1,
+}
+# Queues used when book queues are off (the previous routing)
+LEGACY_QUEUES = {
+    "scrapers.tasks.run_scraper_task": "high_priority",
+    "scrapers.tasks.shard_crawl": "high_priority",
+    "scrapers.tasks.fetch_shard": "default",
+    "scrapers.tasks.refresh_matches": "high_priority",
+}
+
+
+def _per_book(env: str) -> Dict[str, int]:
+    """ "Betika=8, SportPesa=2" → {"betika": 8, "sportpesa": 2} (keys lowercased)."""
+    out: Dict[str, int] = {}
+    for part in os.getenv(env, "").split(","):
+        name, _, value = part.partition("=")
+        if name.strip() and value.strip():
+            try:
+                out[name.strip().lower()] = int(value)
+            except ValueError:
+                pass
+    return out
+
+
+def queue_name(bookmaker: str) -> str:
+    return QUEUE_PREFIX + (re.sub(r"[^a-z0-9]+", "_", bookmaker.lower()).strip("_") or "default")
+
+
+@dataclass
+class QueueSpec:
+    queue: str
+    bookmaker: str
+    scraper_class: str
+    max_concurrency: int
+    min_concurrency: int = 1
+    prefetch: int = 1
+
+    def worker_command(self, app: str = "scrapers.orchestrator") -> str:
+        node = self.queue.replace(QUEUE_PREFIX, "", 1)
+        return (f"celery -A {app} worker -Q {self.queue} -n {node}@%h "
+                f"--concurrency {self.max_concurrency} --prefetch-multiplier {self.prefetch}")
+
+
+@lru_cache(maxsize=1)
+def queue_plan() -> Dict[str, QueueSpec]:
+    """scraper class name → QueueSpec, from the discovered scraper classes (cached)."""
+    from .scraper_loader import scraper_classes  # lazy: imports every scraper module
+
+    caps = _per_book("SCRAPER_QUEUE_CONCURRENCY")
+    floors = _per_book("SCRAPER_QUEUE_MIN")
+    prefetch = _per_book("SCRAPER_QUEUE_PREFETCH")
+    default_prefetch = int(os.getenv("SCRAPER_QUEUE_DEFAULT_PREFETCH", "1"))
+
+    plan: Dict[str, QueueSpec] = {}
+    for cls in scraper_classes():
+        bookmaker = getattr(cls, "bookmaker", None)
+        bookmaker = bookmaker if isinstance(bookmaker, str) and bookmaker else cls.__name__
+        key = bookmaker.lower()
+        cap = max(1, caps.get(key, DEFAULT_CONCURRENCY))
+        plan[cls.__name__] = QueueSpec(
+            queue=queue_name(bookmaker),
+            bookmaker=bookmaker,
+            scraper_class=cls.__name__,
+            max_concurrency=cap,
+            min_concurrency=min(cap, max(1, floors.get(key, 1))),
+            prefetch=max(1, prefetch.get(key, default_prefetch)),
+        )
+    return plan
+
+
+def book_queues() -> List[str]:
+    """Distinct `scrape.<book>` queue names to declare on the app ([] with book queues off)."""
+    if not BOOK_QUEUES:
+        return []
+    return sorted({spec.queue for spec in queue_plan().values()})
+
+
+def route_task(name: str, args: Any, kwargs: Any, options: Any, task: Any = None, **kw) -> Optional[Dict[str, str]]:
+    """Celery task router: scraper tasks → their bookmaker's queue (else the legacy queue)."""
+    if name not in SCRAPER_TASKS:
+        return None
+    if BOOK_QUEUES:
+        scraper_class = (kwargs or {}).get("scraper_class")
+        idx = SCRAPER_TASKS[name]
+        if scraper_class is None and args and len(args) > idx:
+            scraper_class = args[idx]
+        spec = queue_plan().get(str(scraper_class)) if scraper_class else None
+        if spec is not None:
+            return {"queue": spec.queue, "routing_key": spec.queue}
+    queue = LEGACY_QUEUES[name]
+    return {"queue": queue, "routing_key": queue}
+
+
+if __name__ == "__main__":
+    for spec in queue_plan().values():
+        print(f"# {spec.bookmaker}: {spec.min_concurrency}..{spec.max_concurrency} processes")
+        print(spec.worker_command())
@@ -0,0 +1,195 @@
+# scrapers/result_store.py
+"""
+Result-by-reference for Celery scraper tasks.
+
+A task that returns thousands of matches through the result backend makes Redis
+hold (and Celery serialize, and the orchestrator cache) one big JSON blob. Instead
+`put()` writes the records as zlib-compressed JSON chunks of RESULT_CHUNK records
+and returns a small reference:
+
+    {"store": "redis", "key": "betika:3f2a…", "chunks": 4, "count": 1830, "bytes": 91234}
+
+Consumers read it back one chunk at a time (`load_chunk` / `iter_chunks`), so
+neither side ever holds more than one decoded chunk for the transfer.
+
+  • SCRAPER_RESULT_STORE: "auto" (Redis when REDIS_URL answers, else files),
+    "redis", "file", or "off" (tasks return matches inline as before)
+  • chunks expire after SCRAPER_RESULT_TTL seconds (Redis TTL / file mtime)
+  • files live under SCRAPER_RESULT_DIR (default data/results), shared by
+    workers and orchestrator on one host only
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+RESULT_STORE = os.getenv("SCRAPER_RESULT_STORE", "auto").strip().lower()
+RESULT_TTL = int(os.getenv("SCRAPER_RESULT_TTL", "3600"))
+RESULT_CHUNK = max(1, int(os.getenv("SCRAPER_RESULT_CHUNK", "500")))
+RESULT_ZLEVEL = int(os.getenv("SCRAPER_RESULT_ZLEVEL", "6"))
+RESULT_DIR = Path(os.getenv("SCRAPER_RESULT_DIR", "data/results"))
+KEY_PREFIX = "scraper:results"
+
+_lock = threading.Lock()
+_redis: Any = None
+_redis_tried = False
+_last_prune = 0.0
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_") or "default"
+
+
+def _store_redis():
+    """Binary Redis client for chunk blobs, or None."""
+    global _redis, _redis_tried
+    with _lock:
+        if _redis_tried:
+            return _redis
+        _redis_tried = True
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        try:
+            import redis  # optional outside the Celery deployment
+            client = redis.Redis.from_url(url)  # bytes in, bytes out
+            client.ping()
+            _redis = client
+        except Exception as e:
+            logger.warning(f"⚠️ result store: Redis unavailable: {e}")
+        return _redis
+
+
+def _backend() -> Optional[str]:
+    if RESULT_STORE == "off":
+        return None
+    if RESULT_STORE in ("auto", "redis") and _store_redis() is not None:
+        return "redis"
+    if RESULT_STORE == "redis":
+        return None
+    return "file"
+
+
+def enabled() -> bool:
+    return _backend() is not None
+
+
+def is_ref(value: Any) -> bool:
+    return isinstance(value, dict) and "store" in value and "key" in value and "chunks" in value
+
+
+# --------------------
+# chunk I/O
+# --------------------
+def _encode(records: List[Dict[str, Any]]) -> bytes:
+    blob = json.dumps(records, separators=(",", ":"), default=str, ensure_ascii=False)
+    return zlib.compress(blob.encode("utf-8"), RESULT_ZLEVEL)
+
+
+def _decode(blob: bytes) -> List[Dict[str, Any]]:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+def _chunk_key(key: str, index: int) -> str:
+    return f"{KEY_PREFIX}:{key}:{index}"
+
+
+def _chunk_path(key: str, index: int) -> Path:
+    return RESULT_DIR / f"{key.replace(':', '_')}.{index}.json.z"
+
+
+def _prune_files() -> None:
+    """Drop expired chunk files (at most once a minute)."""
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < 60:
+        return
+    _last_prune = now
+    try:
+        for p in RESULT_DIR.glob("*.json.z"):
+            try:
+                if now - p.stat().st_mtime > RESULT_TTL:
+                    p.unlink()
+            except FileNotFoundError:
+                pass
+    except Exception as e:
+        logger.warning(f"⚠️ result store: prune failed: {e}")
+
+
+def put(records: List[Dict[str, Any]], bookmaker: str = "") -> Optional[Dict[str, Any]]:
+    """Store `records` in compressed chunks; returns the reference, or None (caller returns them inline)."""
+    store = _backend()
+    if store is None:
+        return None
+    key = f"{_slug(bookmaker)}:{uuid.uuid4().hex}"
+    chunks = [records[i:i + RESULT_CHUNK] for i in range(0, len(records), RESULT_CHUNK)]
+    size = 0
+    try:
+        if store == "redis":
+            pipe = _store_redis().pipeline(transaction=False)
+            for i, chunk in enumerate(chunks):
+                blob = _encode(chunk)
+                size += len(blob)
+                pipe.setex(_chunk_key(key, i), RESULT_TTL, blob)
+            pipe.execute()
+        else:
+            RESULT_DIR.mkdir(parents=True, exist_ok=True)
+            _prune_files()
+            for i, chunk in enumerate(chunks):
+                blob = _encode(chunk)
+                size += len(blob)
+                path = _chunk_path(key, i)
+                tmp = path.with_suffix(".tmp")
+                tmp.write_bytes(blob)
+                os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"⚠️ result store: could not store {len(records)} records ({store}): {e}")
+        return None
+    return {"store": store, "key": key, "chunks": len(chunks), "count": len(records), "bytes": size}
+
+
+def load_chunk(ref: Dict[str, Any], index: int) -> Optional[List[Dict[str, Any]]]:
+    """One decoded chunk, or None if it expired / cannot be read."""
+    try:
+        if ref["store"] == "redis":
+            client = _store_redis()
+            blob = client.get(_chunk_key(ref["key"], index)) if client is not None else None
+        else:
+            path = _chunk_path(ref["key"], index)
+            blob = path.read_bytes() if path.exists() else None
+        return _decode(blob) if blob is not None else None
+    except Exception as e:
+        logger.warning(f"⚠️ result store: chunk {index} of {ref.get('key')} unreadable: {e}")
+        return None
+
+
+def iter_chunks(ref: Dict[str, Any]) -> Iterator[List[Dict[str, Any]]]:
+    """Chunks in order; stops early (with a warning) at the first missing one."""
+    for i in range(int(ref.get("chunks", 0))):
+        chunk = load_chunk(ref, i)
+        if chunk is None:
+            logger.warning(f"⚠️ result store: {ref.get('key')} chunk {i}/{ref.get('chunks')} missing (expired?).")
+            return
+        yield chunk
+
+
+def delete(ref: Dict[str, Any]) -> None:
+    try:
+        if ref["store"] == "redis":
+            client = _store_redis()
+            if client is not None and ref.get("chunks"):
+                client.delete(*(_chunk_key(ref["key"], i) for i in range(int(ref["chunks"]))))
+        else:
+            for i in range(int(ref.get("chunks", 0))):
+                _chunk_path(ref["key"], i).unlink(missing_ok=True)
+    except Exception as e:
+        logger.warning(f"⚠️ result store: could not delete {ref.get('key')}: {e}")
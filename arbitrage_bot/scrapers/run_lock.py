@@ -0,0 +1,237 @@
+# scrapers/run_lock.py
+"""
+Lease locks that keep scheduled runs of one (scraper_class, mode) from overlapping.
+
+Beat fires on a fixed clock; a crawl that outlives its interval must not be joined
+by a second crawl of the same book hitting the same endpoints and odds rows.
+
+  • RunLease.acquire() takes a lease for SCRAPER_RUN_LOCK_TTL seconds; a daemon
+    thread renews it every TTL/3 while the run is in progress, so a crashed
+    worker frees the slot within one TTL
+  • a trigger that finds the lease taken calls request_rerun(): every overlapping
+    trigger collapses into ONE "run again right after the current one" flag,
+    which release() hands back to the holder
+  • backed by Redis (SET NX PX + owner-checked Lua renew/release) when REDIS_URL
+    answers, else by files under SCRAPER_RUN_LOCK_DIR (one host only)
+
+SCRAPER_RUN_LOCKS=0 disables locking (every trigger runs).
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from core.logger import get_logger
+
+try:
+    import fcntl  # POSIX: serializes file-lease updates between processes
+except ImportError:  # pragma: no cover - Windows dev boxes
+    fcntl = None
+
+logger = get_logger(__name__)
+
+RUN_LOCKS_ENABLED = os.getenv("SCRAPER_RUN_LOCKS", "1") != "0"
+RUN_LOCK_TTL = float(os.getenv("SCRAPER_RUN_LOCK_TTL", "120"))
+RERUN_TTL = float(os.getenv("SCRAPER_RUN_LOCK_RERUN_TTL", "1800"))   # forget a rerun request after this
+RUN_LOCK_DIR = Path(os.getenv("SCRAPER_RUN_LOCK_DIR", "data/locks"))
+KEY_PREFIX = "scraper:runlock"
+
+# KEYS[1] = lease; ARGV[1] = owner, ARGV[2] = ttl ms
+_RENEW_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+# KEYS[1] = lease, KEYS[2] = rerun flag; ARGV[1] = owner, ARGV[2] = consume flag (1/0)
+_RELEASE_LUA = """
+local rerun = 0
+if ARGV[2] == '1' then
+  rerun = redis.call('del', KEYS[2])
+end
+if redis.call('get', KEYS[1]) == ARGV[1] then
+  redis.call('del', KEYS[1])
+end
+return rerun
+"""
+
+_lock = threading.Lock()
+_redis: Any = None
+_redis_tried = False
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_") or "default"
+
+
+def lock_redis():
+    """Shared Redis client for run leases, or None (file leases)."""
+    global _redis, _redis_tried
+    with _lock:
+        if _redis_tried:
+            return _redis
+        _redis_tried = True
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        try:
+            import redis  # optional outside the Celery deployment
+            client = redis.Redis.from_url(url, decode_responses=True)
+            client.ping()
+            _redis = client
+        except Exception as e:
+            logger.warning(f"⚠️ run locks: Redis unavailable, using file leases: {e}")
+        return _redis
+
+
+class RunLease:
+    def __init__(self, name: str, ttl: float = RUN_LOCK_TTL, owner: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self.held = owner is not None  # adopted from the task that acquired it
+        self.lost = False
+        self._redis = lock_redis()
+        self._key = f"{KEY_PREFIX}:{name}"
+        self._rerun_key = f"{self._key}:rerun"
+        self._path = RUN_LOCK_DIR / f"{_slug(name)}.json"
+        self._stop = threading.Event()
+        self._renewer: Optional[threading.Thread] = None
+
+    # --------------------
+    # file backend
+    # --------------------
+    @contextmanager
+    def _file_guard(self) -> Iterator[None]:
+        RUN_LOCK_DIR.mkdir(parents=True, exist_ok=True)
+        with open(self._path.with_suffix(".guard"), "a+") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            return json.loads(self._path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        tmp = self._path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp, self._path)
+
+    # --------------------
+    # lease
+    # --------------------
+    def acquire(self) -> bool:
+        if self._redis is not None:
+            ok = bool(self._redis.set(self._key, self.owner, nx=True, px=int(self.ttl * 1000)))
+        else:
+            with self._file_guard():
+                state = self._read()
+                now = time.time()
+                ok = not state.get("owner") or float(state.get("expires_at", 0)) <= now
+                if ok:
+                    state.update(owner=self.owner, expires_at=now + self.ttl, acquired_at=now)
+                    self._write(state)
+        if ok:
+            self.held = True
+            self._stop.clear()
+            self._renewer = threading.Thread(target=self._renew_loop, name=f"lease-{self.name}", daemon=True)
+            self._renewer.start()
+        return ok
+
+    def renew(self) -> bool:
+        if self._redis is not None:
+            return bool(self._redis.eval(_RENEW_LUA, 1, self._key, self.owner, int(self.ttl * 1000)))
+        with self._file_guard():
+            state = self._read()
+            if state.get("owner") != self.owner:
+                return False
+            state["expires_at"] = time.time() + self.ttl
+            self._write(state)
+            return True
+
+    def _renew_loop(self) -> None:
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                if not self.renew():
+                    self.lost = True
+                    logger.warning(f"⚠️ run lease {self.name} lost (expired or taken over); the run continues unguarded.")
+                    return
+            except Exception as e:
+                logger.warning(f"⚠️ run lease {self.name}: renew failed: {e}")
+
+    def hand_off(self, ttl: float) -> str:
+        """
+        Stop renewing and extend the lease to `ttl` seconds so a follow-up task
+        (e.g. a chord callback) can release it; returns the owner token to pass on.
+        """
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join(timeout=1)
+            self._renewer = None
+        self.ttl = ttl
+        try:
+            self.renew()
+        except Exception as e:
+            logger.warning(f"⚠️ run lease {self.name}: hand-off extend failed: {e}")
+        self.held = False
+        return self.owner
+
+    def request_rerun(self) -> bool:
+        """Ask the current holder to run once more; False if a rerun was already pending (coalesced)."""
+        if self._redis is not None:
+            return bool(self._redis.set(self._rerun_key, self.owner, nx=True, ex=int(RERUN_TTL)))
+        with self._file_guard():
+            state = self._read()
+            pending = float(state.get("rerun_at", 0)) > time.time() - RERUN_TTL
+            if not pending:
+                state["rerun_at"] = time.time()
+                self._write(state)
+            return not pending
+
+    def release(self, consume_rerun: bool = True) -> bool:
+        """Drop the lease; returns True if a rerun was requested meanwhile (and consumes it)."""
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join(timeout=1)
+        if not self.held:
+            return False
+        self.held = False
+        try:
+            if self._redis is not None:
+                return bool(self._redis.eval(_RELEASE_LUA, 2, self._key, self._rerun_key,
+                                             self.owner, "1" if consume_rerun else "0"))
+            with self._file_guard():
+                state = self._read()
+                rerun = consume_rerun and float(state.get("rerun_at", 0)) > time.time() - RERUN_TTL
+                if consume_rerun:
+                    state.pop("rerun_at", None)
+                if state.get("owner") == self.owner:
+                    state.pop("owner", None)
+                    state.pop("expires_at", None)
+                self._write(state)
+                return rerun
+        except Exception as e:
+            logger.warning(f"⚠️ run lease {self.name}: release failed (expires in ≤{self.ttl:.0f}s): {e}")
+            return False
+
+
+def run_lease(scraper_class: str, mode: Optional[str] = None, owner: Optional[str] = None) -> Optional[RunLease]:
+    """
+    Lease for one (scraper_class, mode), or None when run locks are disabled.
+    With `owner` (from hand_off) the returned lease is already held and only released.
+    """
+    if not RUN_LOCKS_ENABLED:
+        return None
+    return RunLease(f"{scraper_class}:{mode or 'default'}", owner=owner)
@@ -0,0 +1,498 @@
+# scrapers/scheduler.py
+"""
+Kickoff- and volatility-aware refresh scheduling.
+
+Instead of refreshing every match of a time window at one fixed beat cadence, each
+stored match gets its own next_refresh_at:
+
+    interval = kickoff ladder (10 min out → 1 min … days out → 1 h)
+               × volatility factor (odds that keep moving → sooner, frozen → later)
+
+The volatility signal is free: every detail parse already knows whether the payload
+changed since the last store (scrapers/payload_cache.py), which feeds an EWMA
+change rate per match. With Redis, observations are buffered and written in one
+pipeline per SCRAPER_REFRESH_OBSERVE_BATCH (and at the end of each crawl phase)
+from a worker thread; each match's EWMA update is one Lua call, so workers and
+shards observing the same match never lose an update.
+
+Per bookmaker there is one priority queue of (next_refresh_at, match_id): a Redis
+zset when REDIS_URL is reachable (shared by all workers), otherwise an in-process
+heap. `dispatch_refresh` (Celery beat) pops what is due, trims it to the global
+request budget (most overdue first across bookmakers) and sends `refresh_matches`
+tasks that re-fetch only those events. Claimed entries are leased; a refresh that
+fails simply becomes due again when the lease runs out.
+
+List crawls stay on the beat for discovery (new matches, kickoff changes).
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEDULER_ENABLED = os.getenv("SCRAPER_REFRESH_SCHEDULER", "1") != "0"
+MIN_INTERVAL = float(os.getenv("SCRAPER_REFRESH_MIN_SEC", "60"))
+MAX_INTERVAL = float(os.getenv("SCRAPER_REFRESH_MAX_SEC", "3600"))
+BUDGET_PER_MIN = int(os.getenv("SCRAPER_REFRESH_BUDGET_PER_MIN", "300"))   # detail requests, all bookmakers
+DISPATCH_EVERY_SEC = float(os.getenv("SCRAPER_REFRESH_DISPATCH_SEC", "30"))
+CLAIM_LEASE_SEC = float(os.getenv("SCRAPER_REFRESH_LEASE_SEC", "120"))
+REFRESH_BATCH = int(os.getenv("SCRAPER_REFRESH_BATCH", "50"))               # events per refresh task
+OBSERVE_BATCH = int(os.getenv("SCRAPER_REFRESH_OBSERVE_BATCH", "200"))      # buffered observations per Redis flush
+
+_EWMA_ALPHA = 0.3          # weight of the newest changed/unchanged observation
+_INITIAL_RATE = 0.5        # unknown volatility until a few observations arrive
+_KEY_PREFIX = "sched:"
+_COMPACT_SLACK = 64        # heap entries tolerated beyond 2× the live matches before a rebuild
+
+# (seconds to kickoff upper bound, base refresh interval)
+_KICKOFF_LADDER = (
+    (30 * 60, 60),
+    (3 * 3600, 120),
+    (6 * 3600, 300),
+    (24 * 3600, 600),
+    (48 * 3600, 1800),
+)
+_LADDER_JSON = json.dumps(_KICKOFF_LADDER)
+
+# observe() on Redis, atomically per match (same rules as the in-process path and refresh_interval)
+# KEYS: meta hash, due zset
+# ARGV: match_id, changed, kickoff|"", stub json|"", only_priority, source|"", now,
+#       alpha, initial rate, min interval, max interval, kickoff ladder json
+_OBSERVE_LUA = """
+local mid = ARGV[1]
+local now = tonumber(ARGV[7])
+local alpha = tonumber(ARGV[8])
+local raw = redis.call('HGET', KEYS[1], mid)
+local meta
+if raw then
+  meta = cjson.decode(raw)
+  local prev = tonumber(meta['rate']) or tonumber(ARGV[9])
+  meta['rate'] = alpha * tonumber(ARGV[2]) + (1 - alpha) * prev
+else
+  meta = {rate = tonumber(ARGV[9]), n = 0}
+end
+meta['n'] = (tonumber(meta['n']) or 0) + 1
+if ARGV[3] ~= '' then meta['kickoff'] = tonumber(ARGV[3]) end
+if ARGV[4] ~= '' then meta['stub'] = cjson.decode(ARGV[4]) end
+local only = meta['only_priority']
+meta['only_priority'] = (only == nil or only == true) and ARGV[5] == '1'
+if ARGV[6] ~= '' then meta['source'] = ARGV[6] end
+
+local ko = tonumber(meta['kickoff'])
+if ko and ko <= now then
+  redis.call('HDEL', KEYS[1], mid)
+  redis.call('ZREM', KEYS[2], mid)
+  return false
+end
+local base = tonumber(ARGV[11])
+if ko then
+  for _, step in ipairs(cjson.decode(ARGV[12])) do
+    if ko - now < step[1] then
+      base = step[2]
+      break
+    end
+  end
+end
+local rate = math.min(1, math.max(0, meta['rate']))
+local interval = math.min(tonumber(ARGV[11]), math.max(tonumber(ARGV[10]), base * 2 ^ (1 - 2 * rate)))
+local next_at = now + interval
+meta['next_at'] = next_at
+redis.call('HSET', KEYS[1], mid, cjson.encode(meta))
+redis.call('ZADD', KEYS[2], next_at, mid)
+return tostring(next_at)
+"""
+
+
+def refresh_interval(seconds_to_kickoff: Optional[float], change_rate: float = _INITIAL_RATE) -> float:
+    """
+    Seconds until the next refresh. `change_rate` ∈ [0, 1] is the share of recent
+    refreshes that saw different odds: 1.0 halves the kickoff interval, 0.0 doubles it.
+    """
+    base = MAX_INTERVAL
+    if seconds_to_kickoff is not None:
+        for upper, interval in _KICKOFF_LADDER:
+            if seconds_to_kickoff < upper:
+                base = interval
+                break
+    rate = min(1.0, max(0.0, change_rate))
+    factor = 2.0 ** (1.0 - 2.0 * rate)   # 0 → ×2, 0.5 → ×1, 1 → ×0.5
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, base * factor))
+
+
+def _epoch(kickoff: Any) -> Optional[float]:
+    if kickoff is None:
+        return None
+    if isinstance(kickoff, datetime):
+        return kickoff.timestamp()
+    try:
+        return float(kickoff)
+    except (TypeError, ValueError):
+        return None
+
+
+class RefreshScheduler:
+    """Per-bookmaker (next_refresh_at, match_id) queue plus the per-match state behind it."""
+
+    def __init__(self, bookmaker: str, redis_client=None):
+        self.bookmaker = bookmaker
+        self.redis = redis_client
+        self._zkey = f"{_KEY_PREFIX}{bookmaker}:due"
+        self._hkey = f"{_KEY_PREFIX}{bookmaker}:meta"
+        # in-process fallback: lazy-deletion heap + authoritative due map
+        self._heap: List[Tuple[float, str]] = []
+        self._due: Dict[str, float] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Redis: observations buffered until flush() (no I/O on the event loop)
+        self._pending: List[tuple] = []
+        self._observe_script = redis_client.register_script(_OBSERVE_LUA) if redis_client is not None else None
+
+    # --------------------
+    # state
+    # --------------------
+    def _schedule_local(self, match_id: str, next_at: float) -> None:
+        self._due[match_id] = next_at
+        heapq.heappush(self._heap, (next_at, match_id))
+        if len(self._heap) > 2 * len(self._due) + _COMPACT_SLACK:
+            self._compact(time.time())
+
+    def _compact(self, now: float) -> None:
+        """Rebuild the heap from the due map (drops superseded entries and kicked-off matches)."""
+        for mid, meta in list(self._meta.items()):
+            if meta.get("kickoff") is not None and meta["kickoff"] <= now:
+                self._drop_local(mid)
+        self._heap = [(at, mid) for mid, at in self._due.items()]
+        heapq.heapify(self._heap)
+
+    def _drop_local(self, match_id: str) -> None:
+        self._meta.pop(match_id, None)
+        self._due.pop(match_id, None)
+
+    def forget(self, match_id: str) -> None:
+        match_id = str(match_id)
+        if self.redis is not None:
+            pipe = self.redis.pipeline()
+            pipe.hdel(self._hkey, match_id)
+            pipe.zrem(self._zkey, match_id)
+            pipe.execute()
+            return
+        with self._lock:
+            self._drop_local(match_id)
+
+    def observe(self, match_id, kickoff: Any, changed: bool, stub: Optional[dict] = None,
+                only_priority: bool = False, source: Optional[str] = None) -> Optional[float]:
+        """
+        Record one stored/skipped detail payload and reschedule the match; returns
+        next_refresh_at (None once the match has kicked off: it is dropped instead).
+        With Redis the observation is only buffered (None) and applied by flush().
+        """
+        match_id = str(match_id)
+        now = time.time()
+        ko = _epoch(kickoff)
+        if self.redis is not None:
+            # no network I/O here: this runs on the scrapers' event loop
+            with self._lock:
+                self._pending.append((match_id, bool(changed), ko, stub, bool(only_priority), source, now))
+            return None
+        with self._lock:
+            meta = self._meta.get(match_id)
+            if meta is None:
+                meta = {"rate": _INITIAL_RATE, "n": 0}
+            else:
+                meta["rate"] = _EWMA_ALPHA * (1.0 if changed else 0.0) + (1 - _EWMA_ALPHA) * float(meta.get("rate", _INITIAL_RATE))
+            meta["n"] = int(meta.get("n", 0)) + 1
+            if ko is not None:
+                meta["kickoff"] = ko
+            if stub is not None:
+                meta["stub"] = stub
+            # full-scope tracking wins: a priority-only refresh would drop markets
+            meta["only_priority"] = bool(meta.get("only_priority", True) and only_priority)
+            if source:
+                meta["source"] = source
+            ko = meta.get("kickoff")
+            if ko is not None and ko <= now:
+                self._drop_local(match_id)
+                return None
+            next_at = now + refresh_interval(None if ko is None else ko - now, meta["rate"])
+            meta["next_at"] = next_at
+            self._meta[match_id] = meta
+            self._schedule_local(match_id, next_at)
+            return next_at
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def flush(self, pipe=None) -> int:
+        """
+        Apply the buffered observations to Redis: one atomic script call per match
+        (EWMA read-modify-write cannot interleave across workers/shards), all in one
+        pipeline. Pass `pipe` to batch with other writes (the caller executes it).
+        Blocking network I/O: call it off the event loop. Returns observations applied.
+        """
+        if self.redis is None:
+            return 0
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return 0
+        own = pipe is None
+        if own:
+            pipe = self.redis.pipeline(transaction=False)
+        for match_id, changed, ko, stub, only_priority, source, at in batch:
+            self._observe_script(
+                keys=[self._hkey, self._zkey],
+                args=[
+                    match_id, int(changed), "" if ko is None else repr(ko),
+                    "" if stub is None else json.dumps(stub, default=str), int(only_priority), source or "",
+                    repr(at), _EWMA_ALPHA, _INITIAL_RATE, MIN_INTERVAL, MAX_INTERVAL, _LADDER_JSON,
+                ],
+                client=pipe,
+            )
+        if own:
+            pipe.execute()
+        return len(batch)
+
+    # --------------------
+    # dispatch
+    # --------------------
+    def peek_due(self, limit: int, now: Optional[float] = None) -> List[Tuple[float, str]]:
+        """Up to `limit` (next_refresh_at, match_id) due now, earliest first (nothing is claimed)."""
+        now = time.time() if now is None else now
+        if limit <= 0:
+            return []
+        if self.redis is not None:
+            rows = self.redis.zrangebyscore(self._zkey, "-inf", now, start=0, num=limit, withscores=True)
+            return [(float(score), str(mid)) for mid, score in rows]
+        with self._lock:
+            out: List[Tuple[float, str]] = []
+            stale: List[Tuple[float, str]] = []
+            while self._heap and len(out) < limit and self._heap[0][0] <= now:
+                at, mid = heapq.heappop(self._heap)
+                if self._due.get(mid) != at:
+                    continue  # superseded by a later observe()/claim
+                out.append((at, mid))
+                stale.append((at, mid))
+            for item in stale:
+                heapq.heappush(self._heap, item)
+            return out
+
+    def claim(self, match_ids: List[str], now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Lease the given matches (they become due again after CLAIM_LEASE_SEC unless a
+        refresh observes them first) and return refresh items. Matches whose kickoff
+        has passed are dropped instead. Only the due time is written, so a concurrent
+        observation's EWMA update is never overwritten.
+        """
+        now = time.time() if now is None else now
+        lease_at = now + CLAIM_LEASE_SEC
+        match_ids = [str(mid) for mid in match_ids]
+        if not match_ids:
+            return []
+        if self.redis is not None:
+            metas = [json.loads(raw) if raw else None for raw in self.redis.hmget(self._hkey, match_ids)]
+        else:
+            with self._lock:
+                metas = [self._meta.get(mid) for mid in match_ids]
+
+        items: List[Dict[str, Any]] = []
+        gone: List[str] = []
+        for mid, meta in zip(match_ids, metas):
+            ko = (meta or {}).get("kickoff")
+            if meta is None or (ko is not None and ko <= now):
+                gone.append(mid)
+                continue
+            items.append({
+                "match_id": mid,
+                "stub": meta.get("stub") or {},
+                "only_priority": bool(meta.get("only_priority", False)),
+            })
+
+        if self.redis is not None:
+            pipe = self.redis.pipeline(transaction=False)
+            if gone:
+                pipe.hdel(self._hkey, *gone)
+                pipe.zrem(self._zkey, *gone)
+            if items:
+                # xx: never resurrect a match an observation dropped in the meantime
+                pipe.zadd(self._zkey, {it["match_id"]: lease_at for it in items}, xx=True)
+            pipe.execute()
+        else:
+            with self._lock:
+                for mid in gone:
+                    self._drop_local(mid)
+                for it in items:
+                    self._schedule_local(it["match_id"], lease_at)
+        return items
+
+    def size(self) -> int:
+        if self.redis is not None:
+            return int(self.redis.zcard(self._zkey))
+        return len(self._due)
+
+    def stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = time.time() if now is None else now
+        if self.redis is not None:
+            overdue = int(self.redis.zcount(self._zkey, "-inf", now))
+        else:
+            overdue = sum(1 for at in self._due.values() if at <= now)
+        return {"tracked": self.size(), "due": overdue}
+
+
+# --------------------
+# feeding
+# --------------------
+_FEED = SCHEDULER_ENABLED
+
+
+def set_feed(enabled: bool) -> None:
+    """Switch feeding for this process (off where no dispatcher drains the queues, e.g. the local runner)."""
+    global _FEED
+    _FEED = bool(enabled) and SCHEDULER_ENABLED
+
+
+def feed_enabled() -> bool:
+    return _FEED
+
+
+# --------------------
+# global request budget (fixed one-minute windows)
+# --------------------
+_LOCAL_BUDGET: Dict[int, int] = {}
+
+
+def take_budget(wanted: int, redis_client=None, per_min: int = BUDGET_PER_MIN) -> int:
+    """Grant up to `wanted` detail requests from this minute's budget (shared via Redis when available)."""
+    if wanted <= 0 or per_min <= 0:
+        return 0
+    window = int(time.time() // 60)
+    if redis_client is not None:
+        key = f"{_KEY_PREFIX}budget:{window}"
+        used = int(redis_client.incrby(key, wanted))
+        redis_client.expire(key, 120)
+        excess = max(0, min(wanted, used - per_min))
+        if excess:
+            redis_client.decrby(key, excess)
+        return wanted - excess
+    for w in [w for w in _LOCAL_BUDGET if w != window]:
+        _LOCAL_BUDGET.pop(w, None)
+    used = _LOCAL_BUDGET.get(window, 0)
+    granted = max(0, min(wanted, per_min - used))
+    _LOCAL_BUDGET[window] = used + granted
+    return granted
+
+
+# --------------------
+# registry
+# --------------------
+_SCHEDULERS: Dict[str, RefreshScheduler] = {}
+_SOURCES: Dict[str, str] = {}              # bookmaker -> "module:Class" (in-process fallback)
+_PENDING_SOURCES: Dict[str, str] = {}      # registered but not yet written to Redis
+_REGISTRY_LOCK = threading.Lock()
+_REDIS: Any = None
+_REDIS_TRIED = False
+
+
+def scheduler_redis():
+    """Shared Redis client for the scheduler, or None (in-process queues)."""
+    global _REDIS, _REDIS_TRIED
+    with _REGISTRY_LOCK:
+        if _REDIS_TRIED:
+            return _REDIS
+        _REDIS_TRIED = True
+        url = os.getenv("REDIS_URL")
+        if not url:
+            return None
+        try:
+            import redis  # optional outside the Celery deployment
+            client = redis.Redis.from_url(url, decode_responses=True)
+            client.ping()
+            _REDIS = client
+        except Exception as e:
+            logger.warning(f"⚠️ refresh scheduler: Redis unavailable, using in-process queues: {e}")
+        return _REDIS
+
+
+def refresh_scheduler(bookmaker: str) -> RefreshScheduler:
+    client = scheduler_redis()
+    with _REGISTRY_LOCK:
+        sched = _SCHEDULERS.get(bookmaker)
+        if sched is None:
+            sched = _SCHEDULERS[bookmaker] = RefreshScheduler(bookmaker, client)
+        return sched
+
+
+def register_source(bookmaker: str, source: str) -> None:
+    """Remember which scraper class refreshes `bookmaker` (read by the dispatcher; Redis write on flush)."""
+    client = scheduler_redis()
+    with _REGISTRY_LOCK:
+        if _SOURCES.get(bookmaker) == source:
+            return
+        _SOURCES[bookmaker] = source
+        if client is not None:
+            _PENDING_SOURCES[bookmaker] = source
+
+
+def observations_pending() -> int:
+    """Buffered observations (+ unwritten sources) awaiting flush_observations()."""
+    with _REGISTRY_LOCK:
+        schedulers = list(_SCHEDULERS.values())
+        sources = len(_PENDING_SOURCES)
+    return sources + sum(s.pending() for s in schedulers)
+
+
+def flush_observations() -> int:
+    """
+    Write every buffered observation (and newly registered sources) to Redis in one
+    pipeline; a no-op in-process. Blocking: scrapers call it via asyncio.to_thread.
+    """
+    client = scheduler_redis()
+    if client is None:
+        return 0
+    with _REGISTRY_LOCK:
+        schedulers = list(_SCHEDULERS.values())
+        sources = dict(_PENDING_SOURCES)
+        _PENDING_SOURCES.clear()
+    pipe = client.pipeline(transaction=False)
+    if sources:
+        pipe.hset(f"{_KEY_PREFIX}sources", mapping=sources)
+    n = sum(s.flush(pipe) for s in schedulers)
+    if n or sources:
+        try:
+            pipe.execute()
+        except Exception:
+            with _REGISTRY_LOCK:
+                for bm, src in sources.items():
+                    _PENDING_SOURCES.setdefault(bm, src)
+            raise
+    return n
+
+
+def scheduled_sources() -> Dict[str, str]:
+    client = scheduler_redis()
+    if client is not None:
+        return dict(client.hgetall(f"{_KEY_PREFIX}sources"))
+    with _REGISTRY_LOCK:
+        return dict(_SOURCES)
+
+
+def plan_dispatch(budget: int, now: Optional[float] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Most-overdue-first selection across bookmakers, capped at `budget` events in total.
+    Returns {bookmaker: [refresh items]} with the selected matches already claimed.
+    """
+    now = time.time() if now is None else now
+    candidates: List[Tuple[float, str, str]] = []
+    for bookmaker in scheduled_sources():
+        for at, mid in refresh_scheduler(bookmaker).peek_due(budget, now):
+            candidates.append((at, bookmaker, mid))
+    candidates.sort()
+    chosen: Dict[str, List[str]] = {}
+    for _, bookmaker, mid in candidates[:budget]:
+        chosen.setdefault(bookmaker, []).append(mid)
+    return {bm: refresh_scheduler(bm).claim(mids, now) for bm, mids in chosen.items()}
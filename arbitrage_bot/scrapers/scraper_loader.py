@@ -6,7 +6,7 @@ import os
 import pkgutil
 import json
 from pathlib import Path
-from typing import List, Union
+from typing import List, Tuple, Union
 
 from .base_scraper import BaseScraper
 from .async_base_scraper import AsyncBaseScraper
@@ -35,20 +35,15 @@ if not logger.handlers:
 logger.setLevel(os.getenv("SCRAPER_LOG_LEVEL", "INFO"))
 
 
-def discover_scrapers(scrapers_dir: Path = None) -> List[Union[BaseScraper, AsyncBaseScraper]]:
-    """
-    Auto-discovers scraper classes in the scrapers/ folder.
-    - Only loads classes inheriting BaseScraper or AsyncBaseScraper
-    - Ignores base/infra modules
-    """
-    scrapers: List[Union[BaseScraper, AsyncBaseScraper]] = []
+def _load_classes(scrapers_dir: Path = None) -> Tuple[List[type], int]:
+    """(scraper classes, modules that failed to import) — see scraper_classes."""
+    classes: List[type] = []
+    failed_imports = 0
     scrapers_dir = scrapers_dir or Path(__file__).parent
 
-    skipped_modules = {"base_scraper", "async_base_scraper", "tasks", "orchestrator", "scraper_loader"}
+    skipped_modules = {"base_scraper", "async_base_scraper", "crawler", "tasks", "orchestrator", "scraper_loader"}
     disabled = set((os.getenv("DISABLED_SCRAPERS", "")).split(","))  # optional: disable via env
 
-    discovered_count, failed_imports, failed_inits = 0, 0, 0
-
     for _, module_name, is_pkg in pkgutil.iter_modules([str(scrapers_dir)]):
         if is_pkg or module_name in skipped_modules or module_name in disabled:
             continue
@@ -66,13 +61,39 @@ def discover_scrapers(scrapers_dir: Path = None) -> List[Union[BaseScraper, Asyn
             if obj.__module__ == module_fullname and (
                 issubclass(obj, BaseScraper) or issubclass(obj, AsyncBaseScraper)
             ):
-                try:
-                    scrapers.append(obj())
-                    discovered_count += 1
-                    logger.info(json.dumps({"event": "scraper_discovered", "class": name, "module": module_fullname}))
-                except Exception as e:
-                    logger.error(json.dumps({"event": "scraper_init_failed", "class": name, "module": module_fullname, "error": str(e)}))
-                    failed_inits += 1
+                classes.append(obj)
+
+    return classes, failed_imports
+
+
+def scraper_classes(scrapers_dir: Path = None) -> List[type]:
+    """
+    Scraper classes in the scrapers/ folder, without instantiating them
+    (queue routing and worker plans only need the classes).
+    - Only classes inheriting BaseScraper or AsyncBaseScraper
+    - Ignores base/infra modules and DISABLED_SCRAPERS
+    """
+    return _load_classes(scrapers_dir)[0]
+
+
+def discover_scrapers(scrapers_dir: Path = None) -> List[Union[BaseScraper, AsyncBaseScraper]]:
+    """
+    Auto-discovers scraper classes in the scrapers/ folder and instantiates them.
+    - Only loads classes inheriting BaseScraper or AsyncBaseScraper
+    - Ignores base/infra modules
+    """
+    scrapers: List[Union[BaseScraper, AsyncBaseScraper]] = []
+    discovered_count, failed_inits = 0, 0
+
+    classes, failed_imports = _load_classes(scrapers_dir)
+    for cls in classes:
+        try:
+            scrapers.append(cls())
+            discovered_count += 1
+            logger.info(json.dumps({"event": "scraper_discovered", "class": cls.__name__, "module": cls.__module__}))
+        except Exception as e:
+            logger.error(json.dumps({"event": "scraper_init_failed", "class": cls.__name__, "module": cls.__module__, "error": str(e)}))
+            failed_inits += 1
 
     if not scrapers:
         logger.warning(json.dumps({"event": "no_scrapers_found"}))
@@ -0,0 +1,83 @@
+# scrapers/sharding.py
+"""
+Fan-out of one bookmaker's detail fetching across Celery workers.
+
+A normal run_scraper_task crawls a whole book inside one worker, so more workers
+only help with more books. In sharded mode (tasks.shard_crawl):
+
+  1. the coordinator runs only the list half of the crawl (ListDetailCrawler
+     .collect_rows) for every pass of the book's crawl_plan(mode)
+  2. match ids are partitioned over SCRAPER_SHARDS shards on a consistent-hash
+     ring: a match stays in the same *shard* run after run, and resizing the ring
+     only moves ~1/N of the matches. Shards are not pinned to workers — each
+     fetch_shard goes to whichever worker is free — so the ring gives stable,
+     balanced partitions, not cache affinity: the payload-hash cache is per
+     process, so a shard that lands on another worker re-parses its payloads
+  3. each shard is a fetch_shard subtask (own proxy when proxies are given)
+     that fetches and stores its rows through the normal parse_and_store writer
+  4. a chord callback (merge_shards) sums the shard results, records metrics and
+     releases the run lease held since step 1
+
+Request rate: token buckets live per process, so N shards behind one egress would
+each spend the full per-host rate. Shards sharing an egress therefore fetch with
+rate_share = 1/N (ListDetailCrawler.fetch_rows → a bucket at 1/N of the host rate),
+keeping the book near its unsharded rate; a shard with its own proxy keeps the full
+rate. Concurrency is split the same way (shard_concurrency) only to bound in-flight
+requests — it is not what limits the rate.
+
+SCRAPER_SHARDS<=1 keeps the beat schedule on plain run_scraper_task.
+"""
+import bisect
+import hashlib
+import math
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+SHARD_COUNT = int(os.getenv("SCRAPER_SHARDS", "0"))          # <=1: sharded crawls off
+SHARD_VNODES = int(os.getenv("SCRAPER_SHARD_VNODES", "64"))  # ring points per shard
+SHARD_MIN_CONCURRENCY = int(os.getenv("SCRAPER_SHARD_MIN_CONCURRENCY", "4"))
+SHARD_LEASE_SEC = float(os.getenv("SCRAPER_SHARD_LEASE_SEC", "900"))  # run lease while shards are out
+
+
+def _point(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    def __init__(self, nodes: Iterable[str], vnodes: int = SHARD_VNODES):
+        self.nodes = list(dict.fromkeys(nodes))
+        if not self.nodes:
+            raise ValueError("HashRing needs at least one node")
+        ring = sorted((_point(f"{node}#{v}"), node) for node in self.nodes for v in range(max(1, vnodes)))
+        self._points = [p for p, _ in ring]
+        self._owners = [n for _, n in ring]
+
+    def node_for(self, key: Any) -> str:
+        i = bisect.bisect(self._points, _point(str(key))) % len(self._points)
+        return self._owners[i]
+
+    def partition(self, items: Iterable[Any], key: Callable[[Any], Any]) -> Dict[str, List[Any]]:
+        """Items grouped by owning node (every node present, possibly empty)."""
+        out: Dict[str, List[Any]] = {node: [] for node in self.nodes}
+        for item in items:
+            out[self.node_for(key(item))].append(item)
+        return out
+
+
+def shard_names(count: int) -> List[str]:
+    return [f"shard-{i}" for i in range(max(1, count))]
+
+
+def shard_concurrency(window_concurrency: int, shards: int, own_proxy: bool) -> int:
+    if own_proxy:
+        return window_concurrency
+    return max(SHARD_MIN_CONCURRENCY, math.ceil(window_concurrency / max(1, shards)))
+
+
+def shard_rate_share(shards: int, own_proxy: bool) -> float:
+    """Fraction of the per-host request rate one shard may spend."""
+    return 1.0 if own_proxy else 1.0 / max(1, shards)
+
+
+def shard_proxy(proxies: Optional[List[str]], index: int) -> Optional[str]:
+    return proxies[index % len(proxies)] if proxies else None
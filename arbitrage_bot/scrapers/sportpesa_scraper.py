@@ -1,28 +1,27 @@
 # scrapers/sportpesa_scraper.py
 import os
 import asyncio
-import random
 import re
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any, Dict, List
-from tqdm import tqdm
 
 from utils.match_utils import build_match_dict
 from core.markets import normalize_market
 from core.save import save_match_odds
-from .async_base_scraper import AsyncBaseScraper
+from .crawler import ListDetailCrawler, ts_to_dt as _ts_to_dt
 
 # 🎯 Canonical market keys (from core.markets.normalize_market)
 #   1x2, ml, btts, dc, ou:<line>, ah:<line>
 TARGET_KEYS = {"1x2", "ml", "btts", "dc", "ah"}     # include all AH lines; OU allowed via prefix below
 PRIORITY_KEYS = {"1x2", "btts", "ah", "ou"}         # include all OU/AH lines
 
-# ⚡ Speed tuning (phase-specific)
+# ⚡ Speed tuning (phase-specific starting points; AdaptiveLimiter tunes per host at runtime)
 PRIORITY_CONCURRENCY = 40
 FULL_CONCURRENCY = 12
 MAX_RETRIES = 3
 RETRY_DELAY = 0.8
+TAIL_RETRY_CONCURRENCY = int(os.getenv("SPORTPESA_TAIL_RETRY_CONCURRENCY", "5"))
 PRIORITY_PAGES_PER_BATCH = 6
 FULL_PAGES_PER_BATCH = 4
 
@@ -32,21 +31,9 @@ ORDER = os.getenv("SPORTPESA_ORDER", "leagues")  # "leagues" or "games"
 MODE = os.getenv("SPORTPESA_MODE", "all")  # all|24|48|gt48
 DEBUG_LIST = bool(int(os.getenv("SPORTPESA_DEBUG_LIST", "0")))
 
-def _ts_to_dt(ts) -> Optional[datetime]:
-    try:
-        if ts is None:
-            return None
-        if isinstance(ts, (int, float)) or (isinstance(ts, str) and str(ts).isdigit()):
-            val = float(ts)
-            if val > 1e12:
-                val /= 1000.0
-            return datetime.fromtimestamp(val, tz=timezone.utc)
-        s = str(ts)
-        if s.endswith("Z"):
-            s = s[:-1] + "+00:00"
-        return datetime.fromisoformat(s).astimezone(timezone.utc)
-    except Exception:
-        return None
+# 📦 Multi-game detail requests (games=<id>,<id>,…); BATCH_SIZE=1 disables batching
+BATCH_SIZE = int(os.getenv("SPORTPESA_BATCH_SIZE", "10"))
+BATCH_WINDOW_MS = float(os.getenv("SPORTPESA_BATCH_WINDOW_MS", "25"))
 
 def _kickoff_from_match(m: dict):
     return m.get("date") or m.get("dateTimestamp") or m.get("startTime") or m.get("start") or m.get("kickoff")
@@ -57,16 +44,6 @@ def _teams_from_match(m: dict):
         return (comp[0].get("name", ""), comp[1].get("name", ""))
     return ((m.get("homeTeam") or {}).get("name", ""), (m.get("awayTeam") or {}).get("name", ""))
 
-def _in_window(start_ts, start_dt: Optional[datetime], end_dt: Optional[datetime]) -> bool:
-    dt = _ts_to_dt(start_ts)
-    if dt is None:
-        return False
-    if start_dt and dt < start_dt:
-        return False
-    if end_dt and dt >= end_dt:
-        return False
-    return True
-
 def _flatten_games_from_payload(payload: Any) -> List[dict]:
     if not payload:
         return []
@@ -149,7 +126,131 @@ def _canon_sel_name(market_key: str, odd: dict, home: str, away: str) -> Optiona
         return None
     return None
 
-class SportPesaScraper(AsyncBaseScraper):
+def markets_norms(ctx: dict, match_stub: dict, markets_payload: List[dict], only_priority: bool) -> tuple:
+    """
+    Raw SportPesa markets → (normalized per-market dicts, [(match_id, error)]).
+    Pure and module-level so scrapers/parse_pool.py can run it in another process.
+    """
+    match_id = match_stub.get("id") or match_stub.get("match_id")
+    if not match_id:
+        return [], []
+
+    home, away = _teams_from_match(match_stub)
+    comp = (match_stub.get("competition") or {}).get("name", "")
+    start_ts = _kickoff_from_match(match_stub)
+
+    norms: List[dict] = []
+    errors: List[tuple] = []
+    for raw_market in (markets_payload or []):
+        try:
+            raw_name = raw_market.get("name") or ""
+            fixed_name = _resolve_market_name_for_core(raw_name, raw_market.get("id"))
+            spec = normalize_market(fixed_name)
+
+            if not _is_selected_market_key(spec.market_key, only_priority):
+                continue
+
+            odds_dict: Dict[str, float] = {}
+            for odd in (raw_market.get("selections") or raw_market.get("odds") or []):
+                sel = _canon_sel_name(spec.market_key, odd, home, away)
+                if not sel:
+                    continue
+                val = odd.get("odds") if "odds" in odd else odd.get("odd_value")
+                try:
+                    odds_dict[sel] = float(val)
+                except Exception:
+                    try:
+                        odds_dict[sel] = float(str(val))
+                    except Exception:
+                        continue
+
+            if not odds_dict:
+                continue
+
+            norm = build_match_dict(
+                home_team=home,
+                away_team=away,
+                start_time=start_ts,
+                market_key=spec.market_key,
+                odds=odds_dict,
+                bookmaker=ctx["bookmaker"],
+                sport_name="Soccer",
+            )
+
+            norm["match_id"] = int(match_id)
+            norm["competition_name"] = comp
+            norm["category"] = ""
+            norm["bookmaker_url"] = ctx["bookmaker_url"]
+            norm["bookmaker_id"] = ctx["bookmaker_id"]
+            if spec.line is not None:
+                norm["line"] = spec.line
+            if spec.outcomes:
+                norm["outcomes"] = spec.outcomes
+            norms.append(norm)
+        except Exception as e:
+            errors.append((match_id, str(e)))
+    return norms, errors
+
+class _GameBatcher:
+    """
+    Collects detail requests for up to `window_ms` or `size` games, sends ONE
+    games=<id>,<id>,… request and hands each caller its own game's markets.
+    A caller gets None when the batch failed or its game is missing from the
+    response — it then falls back to the single-game request.
+    """
+
+    def __init__(self, scraper: "SportPesaScraper", size: int, window_ms: float):
+        self.scraper = scraper
+        self.size = max(1, size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+
+    async def get(self, game_id: Any) -> Optional[Dict[str, List[dict]]]:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.setdefault(str(game_id), []).append(fut)
+        if len(self._pending) >= self.size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        task = asyncio.get_running_loop().create_task(self._fetch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: Dict[str, List[asyncio.Future]]) -> None:
+        s = self.scraper
+        ids = list(batch)
+        data = None
+        try:
+            url = s.match_api_tpl.format(game_id=",".join(ids))
+            async with s.semaphore:
+                data = await s.try_api(url, cb_key=f"api:batch:{ids[0]}+{len(ids)}",
+                                       headers=s._headers(), timeout=12.0)
+        except Exception as e:
+            s.log("batch_fetch_failed", level="warning", games=len(ids), error=str(e))
+        finally:
+            s.metrics["batch_requests"] = s.metrics.get("batch_requests", 0) + 1
+            for gid, futs in batch.items():
+                markets = s._batched_game_markets(gid, data) if data else None
+                if markets:
+                    s.metrics["batched_games"] = s.metrics.get("batched_games", 0) + 1
+                for fut in futs:
+                    if not fut.done():
+                        fut.set_result({gid: markets} if markets else None)
+
+
+class SportPesaScraper(ListDetailCrawler):
     bookmaker = "SportPesa"
     bookmaker_url = "https://www.ke.sportpesa.com"
     list_api_tpl = (
@@ -161,13 +262,20 @@ class SportPesaScraper(AsyncBaseScraper):
     match_api_tpl = "https://www.ke.sportpesa.com/api/games/markets?games={game_id}&markets=all"
     supports_browser_fallback = False
 
+    # crawler engine tuning (scrapers/crawler.py)
+    detail_retries = MAX_RETRIES
+    detail_retry_delay = RETRY_DELAY
+    tail_retry_concurrency = TAIL_RETRY_CONCURRENCY
+    tail_retry_delay = RETRY_DELAY
+    accept_unknown_kickoff = True   # some list rows omit the kickoff: keep them
+
     def _headers(self) -> Dict[str, str]:
         cookie = os.getenv("SPORTPESA_COOKIE")
         return {
             "Accept": "application/json, text/plain, */*",
-            "Accept-Encoding": "gzip, deflate, br, zstd",
+            # Accept-Encoding/Connection left to httpx: it only advertises codecs it can
+            # decode, and HTTP/2 rejects connection-specific headers
             "Accept-Language": "en-US,en;q=0.9",
-            "Connection": "keep-alive",
             "User-Agent": os.getenv(
                 "SPORTPESA_UA",
                 "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/140.0.0.0 Safari/537.36",
@@ -185,238 +293,146 @@ class SportPesaScraper(AsyncBaseScraper):
     def __init__(self, *args, **kwargs):
         super().__init__(bookmaker=self.bookmaker, base_url=self.bookmaker_url, *args, **kwargs)
         self.soccer_sport_id = "1"
-        self._seen = set()
-        self.semaphore: Optional[asyncio.Semaphore] = None
-        self._failed_details: set[str] = set()
+        self._batcher: Optional[_GameBatcher] = None
+
+    def _markets_to_norms(self, match_stub: dict, markets_payload: List[dict], only_priority: bool) -> List[dict]:
+        """Raw SportPesa markets → normalized per-market dicts (pure; no DB work)."""
+        norms, errors = markets_norms(self.parse_ctx(), match_stub, markets_payload, only_priority)
+        for match_id, err in errors:
+            self.log("parse_market_failed", level="error", error=err, match_id=match_id)
+        return norms
 
     async def _parse_markets_payload(self, match_stub: dict, markets_payload: List[dict], only_priority: bool) -> int:
         match_id = match_stub.get("id") or match_stub.get("match_id")
-        if not match_id:
-            return 0
-
-        home, away = _teams_from_match(match_stub)
-        comp = (match_stub.get("competition") or {}).get("name", "")
-        start_ts = _kickoff_from_match(match_stub)
-
-        stored = 0
-        for raw_market in (markets_payload or []):
+        token = self.payload_changed(match_id, only_priority, match_stub, markets_payload)
+        self.note_refresh(match_id, _ts_to_dt(_kickoff_from_match(match_stub)), changed=token is not None,
+                          stub=match_stub, only_priority=only_priority)
+        if token is None:
+            return 0  # byte-identical to the last stored payload
+
+        stored = failed = 0
+        for norm in await self.offload_norms(markets_norms, match_stub, markets_payload, only_priority):
             try:
-                raw_name = raw_market.get("name") or ""
-                fixed_name = _resolve_market_name_for_core(raw_name, raw_market.get("id"))
-                spec = normalize_market(fixed_name)
-
-                if not _is_selected_market_key(spec.market_key, only_priority):
-                    continue
-
-                odds_dict: Dict[str, float] = {}
-                for odd in (raw_market.get("selections") or raw_market.get("odds") or []):
-                    sel = _canon_sel_name(spec.market_key, odd, home, away)
-                    if not sel:
-                        continue
-                    val = odd.get("odds") if "odds" in odd else odd.get("odd_value")
-                    try:
-                        odds_dict[sel] = float(val)
-                    except Exception:
-                        try:
-                            odds_dict[sel] = float(str(val))
-                        except Exception:
-                            continue
-
-                if not odds_dict:
-                    continue
-
-                norm = build_match_dict(
-                    home_team=home,
-                    away_team=away,
-                    start_time=start_ts,
-                    market_key=spec.market_key,
-                    odds=odds_dict,
-                    bookmaker=self.bookmaker,
-                    sport_name="Soccer",
-                )
-
-                norm["match_id"] = int(match_id)
-                norm["competition_name"] = comp
-                norm["category"] = ""
-                norm["bookmaker_url"] = self.bookmaker_url
-                norm["bookmaker_id"] = self.bookmaker_id
-                if spec.line is not None:
-                    norm["line"] = spec.line
-                if spec.outcomes:
-                    norm["outcomes"] = spec.outcomes
-
                 save_match_odds(norm)
                 stored += 1
             except Exception as e:
-                self.log("parse_market_failed", level="error", error=str(e), match_id=match_id)
+                failed += 1
+                self.log("parse_market_failed", level="error", error=str(e), match_id=norm.get("match_id"))
+        self.payload_stored(token, ok=not failed)
         return stored
 
-    async def parse_and_store(self, match_stub: dict, detail_data: dict, only_priority=False) -> int:
+    @staticmethod
+    def _game_markets(game_id: Any, detail_data: Any) -> Optional[List[dict]]:
         markets: Optional[List[dict]] = None
         if isinstance(detail_data, dict):
             mbg = detail_data.get("marketsByGame")
             if isinstance(mbg, dict):
-                markets = mbg.get(str(match_stub.get("id")))
+                markets = mbg.get(str(game_id))
             if not markets and isinstance(detail_data.get("markets"), list):
                 markets = detail_data.get("markets")
-            if not markets and isinstance(detail_data.get(str(match_stub.get("id"))), list):
-                markets = detail_data.get(str(match_stub.get("id")))
+            if not markets and isinstance(detail_data.get(str(game_id)), list):
+                markets = detail_data.get(str(game_id))
+        return markets or None
+
+    @staticmethod
+    def _batched_game_markets(game_id: Any, detail_data: Any) -> Optional[List[dict]]:
+        """Markets of one game in a multi-game response (only per-game keyed shapes can be split)."""
+        if not isinstance(detail_data, dict):
+            return None
+        mbg = detail_data.get("marketsByGame")
+        if isinstance(mbg, dict) and isinstance(mbg.get(str(game_id)), list):
+            return mbg[str(game_id)] or None
+        markets = detail_data.get(str(game_id))
+        return markets if isinstance(markets, list) and markets else None
+
+    async def parse_and_store(self, match_stub: dict, detail_data: dict, only_priority=False) -> int:
+        markets = self._game_markets(match_stub.get("id"), detail_data)
         if not markets:
             return 0
         return await self._parse_markets_payload(match_stub, markets, only_priority)
 
-    async def fetch_match_details(
-        self,
-        match_stub: dict,
-        only_priority: bool = False,
-        start_dt: Optional[datetime] = None,
-        end_dt: Optional[datetime] = None,
-    ) -> int:
-        sport_id = match_stub.get("sportId") or (match_stub.get("sport") or {}).get("id")
-        if str(sport_id or "1") != str(self.soccer_sport_id):
-            return 0
-
-        start_ts = _kickoff_from_match(match_stub)
-        if start_ts is not None and not _in_window(start_ts, start_dt, end_dt):
-            return 0
-
-        match_id = match_stub.get("id")
-        if not match_id:
-            return 0
+    # ----------------------------
+    # targeted refresh (one games/markets call, no list crawl)
+    # ----------------------------
+    supports_event_refresh = True
+
+    async def fetch_event_payload(self, event_id, **kwargs):
+        url = self.match_api_tpl.format(game_id=event_id)
+        data = await self.try_api(url, cb_key=kwargs.get("cb_key") or f"refresh:{event_id}",
+                                  headers=self._headers(), timeout=12.0, cache_ttl=kwargs.get("cache_ttl"))
+        if data is None:
+            return None  # request failed: the verifier keeps DB prices
+        # any answer (even {} or one without markets) parses to no norms, i.e. "vanished"
+        return data
+
+    def event_norms(self, event_id, payload, stub: Optional[dict] = None) -> List[dict]:
+        stub = stub or {}
+        game = {
+            "id": event_id,
+            "homeTeam": {"name": stub.get("home_team", "")},
+            "awayTeam": {"name": stub.get("away_team", "")},
+            "date": stub.get("start_time"),
+        }
+        return self._markets_to_norms(game, self._game_markets(event_id, payload) or [], only_priority=False)
+
+    # ----------------------------
+    # crawler adapter
+    # ----------------------------
+    async def list_page(self, period, index: int) -> List[dict]:
+        offset = index * PAGE_SIZE  # non-overlapping pag_min windows
+        url = self.list_api_tpl.format(pag_count=PAGE_SIZE, pag_min=offset)
+        r = await self.try_api(url, cb_key=f"api:list:{offset}", headers=self._headers(), timeout=12.0)
+        if DEBUG_LIST and index < 2:
+            if isinstance(r, dict):
+                print(f"[debug:list] page[{index}] keys=", list(r.keys())[:8])
+            elif isinstance(r, list):
+                head = r[0] if r else None
+                head_keys = list(head.keys())[:8] if isinstance(head, dict) else type(head).__name__ if head is not None else None
+                print(f"[debug:list] page[{index}] type=list len={len(r)} head={head_keys}")
+            else:
+                print(f"[debug:list] page[{index}] type=", type(r).__name__)
+        return _flatten_games_from_payload(r)
+
+    def row_kickoff(self, m: dict):
+        return _kickoff_from_match(m)
+
+    def row_eligible(self, m: dict) -> bool:
+        sport_id = m.get("sportId") or (m.get("sport") or {}).get("id")
+        return str(sport_id or "1") == str(self.soccer_sport_id)
+
+    def detail_url(self, match_id) -> str:
+        return self.match_api_tpl.format(game_id=match_id)
+
+    def detail_request_kwargs(self) -> Dict[str, Any]:
+        return {"headers": self._headers(), "timeout": 12.0}
+
+    def retry_stub(self, match_id: str) -> dict:
+        return {"id": int(match_id), "sport": {"id": 1}, "hasMarkets": True, "date": None}
+
+    async def store_inline(self, m: dict, only_priority: bool) -> Optional[int]:
+        # list rows with markets_layout=multiple may already carry the markets
+        if isinstance(m.get("markets"), list) and m["markets"]:
+            return await self._parse_markets_payload(m, m["markets"], only_priority)
+        return None
 
-        async with self.semaphore:
-            url = self.match_api_tpl.format(game_id=match_id)
-            for attempt in range(1, MAX_RETRIES + 1):
-                data = await self.try_api(url, cb_key=f"api:{url}", headers=self._headers(), timeout=12.0)
-                if data:
-                    return await self.parse_and_store(match_stub, data, only_priority=only_priority)
-                if attempt < MAX_RETRIES:
-                    delay = (RETRY_DELAY * (2 ** (attempt - 1))) + random.random() * 0.4
-                    await asyncio.sleep(delay)
-
-        self._failed_details.add(str(match_id))
-        return 0
-
-    async def scrape_phase(
-        self,
-        *,
-        only_priority: bool,
-        concurrency: int,
-        pages_per_batch: int,
-        start_dt: Optional[datetime] = None,
-        end_dt: Optional[datetime] = None,
-    ) -> int:
-        def _fmt(dt):
-            return dt.strftime("%Y-%m-%d %H:%M") if dt else "∞"
-        label_str = f"{_fmt(start_dt)} → {_fmt(end_dt)}" if (start_dt or end_dt) else "All upcoming"
-        phase_name = f"PRIORITY ({label_str})" if only_priority else f"FULL ({label_str})"
-        print(f"\n🚀 Starting phase: {phase_name}")
-
-        self.semaphore = asyncio.Semaphore(concurrency)
-
-        pag_min = 0
-        total_stored = 0
-        pbar = tqdm(desc="Scraping soccer matches", unit="match")
-        print(f"Using PAGE_SIZE={PAGE_SIZE}, pages_per_batch={pages_per_batch}, concurrency={concurrency}")
+    async def batched_detail(self, match_id) -> Optional[Any]:
+        if self._batcher is None:
+            return None
+        data = await self._batcher.get(match_id)
+        if not data:
+            self.metrics["batch_fallbacks"] = self.metrics.get("batch_fallbacks", 0) + 1
+        return data or None
+
+    def on_phase_start(self, windows) -> None:
+        self._batcher = _GameBatcher(self, BATCH_SIZE, BATCH_WINDOW_MS) if BATCH_SIZE > 1 else None
+        print(f"Using PAGE_SIZE={PAGE_SIZE}, concurrency={max(w.concurrency for w in windows)}")
         print(f"List URL template: {self.list_api_tpl}")
 
-        while True:
-            batch_offsets = [pag_min + (i * PAGE_SIZE) for i in range(pages_per_batch)]
-            list_urls = [self.list_api_tpl.format(pag_count=PAGE_SIZE, pag_min=o) for o in batch_offsets]
-
-            results = await asyncio.gather(*[
-                self.try_api(url, cb_key=f"api:list:{o}", headers=self._headers(), timeout=12.0)
-                for o, url in zip(batch_offsets, list_urls)
-            ])
-
-            if DEBUG_LIST:
-                for idx, r in enumerate(results[:2]):
-                    if isinstance(r, dict):
-                        print(f"[debug:list] result[{idx}] keys=", list(r.keys())[:8])
-                    elif isinstance(r, list):
-                        head = r[0] if r else None
-                        head_keys = list(head.keys())[:8] if isinstance(head, dict) else type(head).__name__ if head is not None else None
-                        print(f"[debug:list] result[{idx}] type=list len={len(r)} head={head_keys}")
-                    else:
-                        print(f"[debug:list] result[{idx}] type=", type(r).__name__)
-
-            page_games: List[dict] = []
-            for r in results:
-                page_games.extend(_flatten_games_from_payload(r))
-
-            if not page_games:
-                break
-
-            tasks: List[asyncio.Future] = []
-            for m in page_games:
-                start_field = _kickoff_from_match(m)
-                if start_field is not None and not _in_window(start_field, start_dt, end_dt):
-                    continue
-                mid = str(m.get("id"))
-                if not mid or mid in self._seen:
-                    continue
-                self._seen.add(mid)
-
-                if isinstance(m.get("markets"), list) and m["markets"]:
-                    tasks.append(self._parse_markets_payload(m, m["markets"], only_priority))
-                else:
-                    tasks.append(self.fetch_match_details(m, only_priority=only_priority, start_dt=start_dt, end_dt=end_dt))
-
-            stored = 0
-            for fut in asyncio.as_completed(tasks):
-                try:
-                    res = await fut
-                except Exception as e:
-                    self.log("detail_task_failed", level="error", error=str(e))
-                    res = 0
-                if res:
-                    stored += res
-                    pbar.update(1)
-
-            total_stored += stored
-
-            # 👈 FIX: advance to the next *new* window of pages (avoid overlapping offsets)
-            pag_min += PAGE_SIZE * pages_per_batch
-
-            await asyncio.sleep(0.2 + random.random() * 0.3)
-
-        pbar.close()
-        print(f"✅ Phase complete — stored {total_stored} matches")
-
-        await self.retry_failed_details(only_priority=only_priority, start_dt=start_dt, end_dt=end_dt)
-        return total_stored
-
-    async def retry_failed_details(
-        self,
-        *,
-        only_priority: bool,
-        start_dt: Optional[datetime],
-        end_dt: Optional[datetime],
-    ):
-        if not self._failed_details:
-            return
-        ids = list(self._failed_details)
-        self._failed_details.clear()
-        print(f"🔁 Tail retry for {len(ids)} failed details (slow mode)...")
-
-        old_sem = self.semaphore
-        self.semaphore = asyncio.Semaphore(5)
-
-        recovered = 0
-        for mid in ids:
-            stub = {"id": int(mid), "sport": {"id": 1}, "hasMarkets": True, "date": None}
-            url = self.match_api_tpl.format(game_id=mid)
-            for attempt in range(1, MAX_RETRIES + 2):
-                data = await self.try_api(url, cb_key=f"retry:{mid}", headers=self._headers(), timeout=12.0)
-                if data:
-                    ok = await self.parse_and_store(stub, data, only_priority=only_priority)
-                    recovered += ok
-                    break
-                if attempt < (MAX_RETRIES + 1):
-                    await asyncio.sleep(0.8 * (2 ** (attempt - 1)) + random.random() * 0.5)
-        print(f"🔁 Tail retry complete — recovered {recovered}")
-
-        self.semaphore = old_sem
+    def on_phase_end(self, windows) -> None:
+        self._batcher = None
+        if BATCH_SIZE > 1:
+            print(f"📦 Batched detail requests: {self.metrics.get('batch_requests', 0)} for "
+                  f"{self.metrics.get('batched_games', 0)} games ({self.metrics.get('batch_fallbacks', 0)} single-game fallbacks)")
 
     async def run(self):
         now_utc = datetime.now(timezone.utc)
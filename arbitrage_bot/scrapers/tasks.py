@@ -6,6 +6,7 @@ import inspect
 import json
 import logging
 import os
+import pkgutil
 import random
 import time
 from typing import Optional, List, Dict, Any
@@ -13,11 +14,13 @@ from datetime import datetime, timezone
 
 from bs4 import BeautifulSoup
 import redis
-from celery import chain
-from playwright.sync_api import sync_playwright
+from celery import chain, chord
+from celery.signals import worker_process_init, worker_process_shutdown
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
+from scrapers import browser_pool, http_pool, parse_pool, result_store, run_lock, sharding, worker_runtime
 from scrapers.proxy_pool import ProxyPool
+from scrapers import scheduler as refresh_sched
 
 # ✅ Use the SAME Celery app as orchestrator (no second app, no split registration)
 from scrapers.orchestrator import celery as celery_app
@@ -57,6 +60,8 @@ METRICS_PREFIX = os.environ.get("METRICS_PREFIX", "scraper:metrics")
 # ---------- Helpers ----------
 def safe_async_run(coro):
     """Safely run async code inside Celery worker (avoid asyncio.run conflicts)."""
+    if worker_runtime.PERSISTENT:
+        return worker_runtime.runtime().run(coro)  # the worker's long-lived loop
     try:
         loop = asyncio.get_running_loop()
     except RuntimeError:
@@ -90,6 +95,81 @@ def _record_metric(metric: str, bookmaker: str, value: int = 1):
         }))
 
 
+# ---------- Worker warm-up ----------
+def _scraper_urls() -> List[str]:
+    """Endpoint URLs declared on scraper classes (class attributes containing '://')."""
+    import scrapers
+    from scrapers.async_base_scraper import AsyncBaseScraper
+
+    urls = set()
+    for _, name, is_pkg in pkgutil.iter_modules(scrapers.__path__):
+        if is_pkg or not name.endswith("_scraper") or name in ("base_scraper", "async_base_scraper"):
+            continue
+        try:
+            module = importlib.import_module(f"scrapers.{name}")
+        except Exception:
+            continue
+        for obj in vars(module).values():
+            if inspect.isclass(obj) and issubclass(obj, AsyncBaseScraper) and obj is not AsyncBaseScraper:
+                urls.update(v for v in vars(obj).values() if isinstance(v, str) and "://" in v)
+    return sorted(urls)
+
+
+@worker_process_init.connect
+def _warm_http(**_):
+    """Prime the DNS cache once per worker process so the first scrape skips the lookups."""
+    try:
+        urls = [u for u in os.environ.get("SCRAPER_WARM_URLS", "").split(",") if u] or _scraper_urls()
+        resolved = http_pool.prime_dns(urls)
+        logger.info(json.dumps({"event": "http_warm_up", "hosts": resolved, "http2": http_pool.HTTP2_ENABLED}))
+    except Exception as e:
+        logger.warning(json.dumps({"event": "http_warm_up_failed", "error": str(e)}))
+
+
+@worker_process_init.connect
+def _warm_browser(**_):
+    """Optionally pre-launch Chromium and pre-create SCRAPER_BROWSER_WARM pooled contexts."""
+    count = int(os.environ.get("SCRAPER_BROWSER_WARM", 0))
+    if count <= 0 or not worker_runtime.PERSISTENT:
+        return
+    from scrapers.async_base_scraper import AsyncBaseScraper
+
+    async def _warm():
+        pool = browser_pool.browser_pool(AsyncBaseScraper.CONTEXT_TTL_SEC, AsyncBaseScraper.CONTEXT_CACHE_MAX)
+        return await pool.warm(AsyncBaseScraper.BROWSER_PROFILES[:count], [AsyncBaseScraper.DEFAULT_DIRECT_UA])
+    try:
+        made = worker_runtime.runtime().run(_warm(), timeout=60)
+        logger.info(json.dumps({"event": "browser_warm_up", "contexts": made}))
+    except Exception as e:
+        logger.warning(json.dumps({"event": "browser_warm_up_failed", "error": str(e)}))
+
+
+@worker_process_shutdown.connect
+def _stop_runtime(**_):
+    """Clean up long-lived scrapers, pooled clients and parse processes before the worker process exits."""
+    worker_runtime.runtime().shutdown()
+    parse_pool.shutdown()
+
+
+def _is_persistent(cls) -> bool:
+    from scrapers.async_base_scraper import AsyncBaseScraper
+    if not (worker_runtime.PERSISTENT and inspect.isclass(cls) and issubclass(cls, AsyncBaseScraper)):
+        return False
+    entry = getattr(cls, "run", None) or getattr(cls, "get_multiple_odds", None)
+    return inspect.iscoroutinefunction(entry)
+
+
+async def _run_leased(scraper_module: str, scraper_class: str, proxy: Optional[str], build, mode: Optional[str]):
+    """One run on the worker's long-lived instance; returns (scraper, matches)."""
+    proxies = [proxy] if proxy else None
+    async with worker_runtime.runtime().lease(scraper_module, scraper_class, proxies, build) as scraper:
+        if hasattr(scraper, "run"):
+            run_kwargs = {"mode": mode} if mode and "mode" in inspect.signature(scraper.run).parameters else {}
+            await scraper.run(**run_kwargs)
+            return scraper, []
+        return scraper, await scraper.get_multiple_odds()
+
+
 # ---------- Blacklist ----------
 def prune_expired_blacklist():
     now_ts = int(time.time())
@@ -157,34 +237,22 @@ def run_selenium_task(url: str, user_agent: str, proxy: Optional[str] = None, ti
 
 @celery_app.task(queue="high_priority")
 def run_playwright_task(url: str, user_agent: str, proxy: Optional[str] = None, timeout: int = 30):
-    browser = None
-    try:
-        with sync_playwright() as p:
-            launch_kwargs = {"headless": True}
-            if proxy:
-                launch_kwargs["proxy"] = {"server": proxy}
-            browser = p.chromium.launch(**launch_kwargs)
-
-            context_kwargs = {"user_agent": user_agent}
-            context = browser.new_context(**context_kwargs)
-
-            page = context.new_page()
-            page.goto(url, timeout=timeout * 1000)
-
-            html = page.content()
-            return _wrap_browser_result("OK", html, proxy)
+    """Fetch through the worker's warm browser pool (no Chromium launch per task)."""
+    async def _fetch():
+        pool = browser_pool.browser_pool()
+        pool.retain()
+        try:
+            return await pool.fetch_html(url, user_agent=user_agent, proxy=proxy, timeout=timeout)
+        finally:
+            await pool.release()
 
+    try:
+        html = safe_async_run(_fetch())
+        return _wrap_browser_result("OK" if html is not None else "ERROR", html, proxy)
     except Exception:
         logger.exception("Playwright task failed")
         return _wrap_browser_result("ERROR", None, proxy)
 
-    finally:
-        if browser:
-            try:
-                browser.close()
-            except Exception:
-                pass
-
 
 # ---------- Fallback Processor ----------
 @celery_app.task(queue="default")
@@ -243,8 +311,31 @@ def process_fallback_html(result: dict, scraper_module: str, scraper_class: str,
         }
 
 
+# ---------- Run leases ----------
+def _skip_overlapping(lease: "run_lock.RunLease", scraper_class: str, mode: Optional[str]) -> Dict[str, Any]:
+    """The lease is held by a running crawl: fold this trigger into its rerun request."""
+    first = lease.request_rerun()
+    _record_metric("run_skipped", scraper_class)
+    if not first:
+        _record_metric("run_coalesced", scraper_class)
+    logger.info(json.dumps({
+        "event": "run_skipped_overlap",
+        "scraper_class": scraper_class,
+        "mode": mode,
+        "rerun": "requested" if first else "already_pending",
+    }))
+    return {
+        "status": "SKIPPED",
+        "bookmaker": scraper_class,
+        "matches": [],
+        "reason": "previous run still in progress",
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 # ---------- Main Scraper ----------
-@celery_app.task(bind=True, max_retries=3, default_retry_delay=5, queue="default")
+# Scraper tasks carry no fixed queue: scrapers.queues.route_task sends them to their book's queue
+@celery_app.task(bind=True, max_retries=3, default_retry_delay=5)
 def run_scraper_task(
     self,
     scraper_module: str,
@@ -253,7 +344,7 @@ def run_scraper_task(
     max_retries: int = 3,
     jitter: int = 5,
     fallback_timeout: int = 60,
-    mode: Optional[str] = None,   # allow forcing mode (e.g., BETIKA_MODE)
+    mode: Optional[str] = None,   # allow forcing mode (e.g., BETIKA_MODE / run(mode=...))
 ):
     """
     Celery entrypoint. Supports both:
@@ -264,10 +355,16 @@ def run_scraper_task(
     proxy = None
     start_time = time.time()
 
+    # One run per (scraper_class, mode) at a time: an overlapping trigger becomes a rerun request
+    lease = run_lock.run_lease(scraper_class, mode)
+    if lease is not None and not lease.acquire():
+        return _skip_overlapping(lease, scraper_class, mode)
+    retrying = False
+
     # Track & restore env after run
     prior_mode_env = os.environ.get("BETIKA_MODE")
     if mode:
-        os.environ["BETIKA_MODE"] = mode  # "24" | "48" | "gt48" | "all"
+        os.environ["BETIKA_MODE"] = mode  # "0_48" | "24" | "48" | "gt48" | "all"
 
     try:
         # ---- Rebuild ProxyPool if proxies were passed ----
@@ -285,17 +382,18 @@ def run_scraper_task(
         module = importlib.import_module(scraper_module)
         cls = getattr(module, scraper_class)
 
-        # ---- Smart init logic (prefer proxy_list > proxy > none) ----
-        params = inspect.signature(cls).parameters
-        if "proxy_list" in params and proxy_pool:
-            scraper = cls(proxy_list=[proxy] if proxy else [])
-        elif "proxy" in params:
-            scraper = cls(proxy=proxy)
-        else:
-            scraper = cls()
-        # ------------------------------------------------------------
+        def _build():
+            # ---- Smart init logic (prefer proxy_list > proxy > none) ----
+            params = inspect.signature(cls).parameters
+            if "proxy_list" in params and proxy_pool:
+                return cls(proxy_list=[proxy] if proxy else [])
+            elif "proxy" in params:
+                return cls(proxy=proxy)
+            return cls()
 
-        bookmaker = getattr(scraper, "bookmaker", scraper_class)
+        persistent = _is_persistent(cls)
+        scraper = None if persistent else _build()
+        bookmaker = getattr(scraper or cls, "bookmaker", None) or scraper_class
 
         logger.info(json.dumps({
             "event": "scraper_attempt",
@@ -304,6 +402,7 @@ def run_scraper_task(
             "max_retries": max_retries,
             "proxy": proxy,
             "mode": mode,
+            "persistent": persistent,
         }))
 
         # --- Execute scraper ---
@@ -334,11 +433,20 @@ def run_scraper_task(
                             pass
             return await coro
 
-        if hasattr(scraper, "run"):
+        if persistent:
+            # Long-lived instance on the worker loop: no re-init, no lifecycle teardown
+            scraper, data = safe_async_run(_run_leased(scraper_module, scraper_class, proxy, _build, mode))
+            if not isinstance(data, list):
+                raise ValueError("Invalid scraper result (expected list)")
+            result_matches = data
+
+        elif hasattr(scraper, "run"):
+            # Prefer passing the mode explicitly; the env override above stays for older scrapers
+            run_kwargs = {"mode": mode} if mode and "mode" in inspect.signature(scraper.run).parameters else {}
             if inspect.iscoroutinefunction(scraper.run):
-                safe_async_run(_with_lifecycle(scraper.run()))
+                safe_async_run(_with_lifecycle(scraper.run(**run_kwargs)))
             else:
-                scraper.run()
+                scraper.run(**run_kwargs)
             result_matches = []
 
         else:
@@ -373,13 +481,22 @@ def run_scraper_task(
         except Exception:
             logger.warning(json.dumps({"event": "metrics_snapshot_failed", "bookmaker": bookmaker}))
 
-        return {
+        out = {
             "status": "OK",
             "bookmaker": bookmaker,
             "matches": result_matches,
+            "match_count": len(result_matches),
             "proxy_used": proxy,
             "timestamp": datetime.now(timezone.utc).isoformat(),
         }
+        # Large results go by reference: compressed chunks in the result store, not the backend
+        if result_matches:
+            ref = result_store.put(result_matches, bookmaker)
+            if ref:
+                out["matches"] = []
+                out["matches_ref"] = ref
+                logger.info(json.dumps({"event": "result_stored", "bookmaker": bookmaker, **ref}))
+        return out
 
     except Exception as exc:
         logger.exception(f"[{scraper_class}] Attempt {attempt} failed")
@@ -389,6 +506,7 @@ def run_scraper_task(
 
         if attempt < max_retries:
             delay = max(1, int((2 ** attempt) + random.uniform(0, jitter)))
+            retrying = True
             raise self.retry(exc=exc, countdown=delay)
 
         module = importlib.import_module(scraper_module)
@@ -423,3 +541,316 @@ def run_scraper_task(
                 os.environ.pop("BETIKA_MODE", None)
             else:
                 os.environ["BETIKA_MODE"] = prior_mode_env
+
+        if lease is not None:
+            # A pending rerun waits for the retry (it is the run that finishes this trigger)
+            if lease.release(consume_rerun=not retrying):
+                _record_metric("run_rerun", scraper_class)
+                queue = (self.request.delivery_info or {}).get("routing_key")
+                try:
+                    run_scraper_task.apply_async(
+                        kwargs={
+                            "scraper_module": scraper_module,
+                            "scraper_class": scraper_class,
+                            "proxies": proxies,
+                            "max_retries": max_retries,
+                            "jitter": jitter,
+                            "fallback_timeout": fallback_timeout,
+                            "mode": mode,
+                        },
+                        **({"queue": queue} if queue else {}),
+                    )
+                    logger.info(json.dumps({"event": "rerun_dispatched", "scraper_class": scraper_class, "mode": mode}))
+                except Exception as e:
+                    logger.warning(json.dumps({"event": "rerun_dispatch_failed", "scraper_class": scraper_class, "error": str(e)}))
+            if lease.lost:
+                _record_metric("run_lease_lost", scraper_class)
+
+
+# ---------- Scheduled detail refreshes ----------
+REFRESH_CONCURRENCY = int(os.environ.get("SCRAPER_REFRESH_CONCURRENCY", 16))
+
+
+@celery_app.task(queue="high_priority")
+def dispatch_refresh():
+    """
+    Beat entry: pop due matches from the per-bookmaker refresh queues, cap them at the
+    global request budget and send targeted `refresh_matches` batches.
+    """
+    if not refresh_sched.SCHEDULER_ENABLED:
+        return {"status": "DISABLED", "dispatched": 0}
+
+    client = refresh_sched.scheduler_redis()
+    sources = refresh_sched.scheduled_sources()
+    due = sum(refresh_sched.refresh_scheduler(bm).stats()["due"] for bm in sources)
+    per_tick = max(1, int(refresh_sched.BUDGET_PER_MIN * refresh_sched.DISPATCH_EVERY_SEC / 60))
+    granted = refresh_sched.take_budget(min(due, per_tick), client)
+    if not granted:
+        logger.info(json.dumps({"event": "refresh_dispatch_idle", "due": due}))
+        return {"status": "OK", "dispatched": 0, "due": due}
+
+    plan = refresh_sched.plan_dispatch(granted)
+    dispatched = 0
+    for bookmaker, items in plan.items():
+        source = sources.get(bookmaker) or ""
+        module_name, _, class_name = source.partition(":")
+        if not (module_name and class_name):
+            continue
+        for i in range(0, len(items), refresh_sched.REFRESH_BATCH):
+            batch = items[i:i + refresh_sched.REFRESH_BATCH]
+            refresh_matches.apply_async(args=(module_name, class_name, batch))
+            dispatched += len(batch)
+
+    logger.info(json.dumps({
+        "event": "refresh_dispatched",
+        "due": due,
+        "granted": granted,
+        "dispatched": dispatched,
+        "per_bookmaker": {bm: len(items) for bm, items in plan.items()},
+    }))
+    return {"status": "OK", "dispatched": dispatched, "due": due}
+
+
+@celery_app.task
+def refresh_matches(scraper_module: str, scraper_class: str, items: List[Dict[str, Any]]):
+    """Re-fetch and store a batch of scheduled events (one detail request each, no list crawl)."""
+    module = importlib.import_module(scraper_module)
+    cls = getattr(module, scraper_class)
+    bookmaker = getattr(cls, "bookmaker", None) or scraper_class
+    start_time = time.time()
+
+    async def _refresh_all(scraper):
+        gate = scraper.concurrency_limiter(scraper.base_url, REFRESH_CONCURRENCY)
+
+        async def _one(item):
+            async with gate:
+                return await scraper.refresh_and_store(
+                    item["match_id"], item.get("stub"), only_priority=item.get("only_priority", False),
+                )
+        results = await asyncio.gather(*(_one(it) for it in items), return_exceptions=True)
+        await scraper.flush_refresh_schedule()
+        return results
+
+    async def _run():
+        if _is_persistent(cls):
+            async with worker_runtime.runtime().lease(scraper_module, scraper_class, None, cls) as scraper:
+                return await _refresh_all(scraper)
+        scraper = cls()
+        await scraper.__aenter__()
+        try:
+            return await _refresh_all(scraper)
+        finally:
+            await scraper.cleanup()
+
+    results = safe_async_run(_run())
+    failed = sum(1 for r in results if r is None or isinstance(r, Exception))
+    stored = sum(r for r in results if isinstance(r, int))
+    _record_metric("scheduled_refreshes", bookmaker, len(items))
+    if failed:
+        _record_metric("scheduled_refresh_failed", bookmaker, failed)
+    logger.info(json.dumps({
+        "event": "scheduled_refresh_done",
+        "bookmaker": bookmaker,
+        "events": len(items),
+        "failed": failed,
+        "markets_stored": stored,
+        "latency_ms": int((time.time() - start_time) * 1000),
+    }))
+    return {"status": "OK", "bookmaker": bookmaker, "events": len(items), "failed": failed, "stored": stored}
+
+
+# ---------- Sharded crawls (see scrapers/sharding.py) ----------
+def _instantiate(cls, proxy: Optional[str]):
+    params = inspect.signature(cls).parameters
+    if "proxy_list" in params:
+        return cls(proxy_list=[proxy] if proxy else [])
+    if "proxy" in params:
+        return cls(proxy=proxy)
+    return cls()
+
+
+async def _on_scraper(scraper_module: str, scraper_class: str, proxy: Optional[str], fn):
+    """await fn(scraper) on an entered scraper (the worker's long-lived one when persistent)."""
+    cls = getattr(importlib.import_module(scraper_module), scraper_class)
+    if _is_persistent(cls):
+        proxies = [proxy] if proxy else None
+        async with worker_runtime.runtime().lease(scraper_module, scraper_class, proxies,
+                                                  lambda: _instantiate(cls, proxy)) as scraper:
+            return await fn(scraper)
+    scraper = _instantiate(cls, proxy)
+    await scraper.__aenter__()
+    try:
+        return await fn(scraper)
+    finally:
+        await scraper.cleanup()
+
+
+@celery_app.task(bind=True)
+def shard_crawl(
+    self,
+    scraper_module: str,
+    scraper_class: str,
+    mode: Optional[str] = None,
+    shards: Optional[int] = None,
+    proxies: Optional[list] = None,
+):
+    """
+    Coordinator: list-crawl every pass of the book's crawl plan, partition the rows over
+    a consistent-hash ring and fan them out as fetch_shard subtasks; merge_shards sums up.
+    """
+    start_time = time.time()
+    shards = max(1, int(shards or sharding.SHARD_COUNT or 1))
+    trigger = {"scraper_module": scraper_module, "scraper_class": scraper_class,
+               "mode": mode, "shards": shards, "proxies": proxies}
+
+    lease = run_lock.run_lease(scraper_class, mode)
+    if lease is not None and not lease.acquire():
+        return _skip_overlapping(lease, scraper_class, mode)
+
+    async def _plan(scraper):
+        await scraper.prepare_run()
+        planned = []
+        for crawl_pass in scraper.crawl_plan(mode):
+            rows = await scraper.collect_rows(crawl_pass)
+            scraper.pass_done(crawl_pass)
+            planned.append((crawl_pass, rows))
+        return scraper, planned
+
+    try:
+        pool = available_proxies(proxies) if proxies else []
+        # The list crawl goes out on the first proxy; each shard gets its own below
+        scraper, planned = safe_async_run(_on_scraper(scraper_module, scraper_class, sharding.shard_proxy(pool, 0), _plan))
+    except NotImplementedError as e:
+        if lease is not None:
+            lease.release(consume_rerun=False)
+        logger.warning(json.dumps({"event": "shard_unsupported", "scraper_class": scraper_class, "error": str(e)}))
+        run_scraper_task.apply_async(kwargs={"scraper_module": scraper_module, "scraper_class": scraper_class,
+                                             "proxies": proxies, "mode": mode})
+        return {"status": "NOT_SHARDABLE", "bookmaker": scraper_class, "matches": []}
+    except Exception:
+        if lease is not None:
+            lease.release(consume_rerun=False)
+        raise
+
+    bookmaker = getattr(scraper, "bookmaker", None) or scraper_class
+    names = sharding.shard_names(shards)
+    ring = sharding.HashRing(names)
+    own_proxy = len(set(pool)) >= shards
+
+    header = []
+    for crawl_pass, rows_by_window in planned:
+        for w in crawl_pass.windows:
+            parts = ring.partition(rows_by_window.get(w.name, []), scraper.row_key)
+            concurrency = sharding.shard_concurrency(w.concurrency, shards, own_proxy)
+            rate_share = sharding.shard_rate_share(shards, own_proxy)
+            for i, name in enumerate(names):
+                if parts[name]:
+                    header.append(fetch_shard.s(
+                        scraper_module, scraper_class, parts[name], w.only_priority, concurrency,
+                        sharding.shard_proxy(pool, i), f"{w.name}/{name}", rate_share,
+                    ))
+
+    owner = lease.hand_off(sharding.SHARD_LEASE_SEC) if lease is not None else None
+    list_ms = int((time.time() - start_time) * 1000)
+    merge = merge_shards.s(bookmaker, trigger, owner, start_time)
+    if header:
+        chord(header)(merge)
+    else:
+        merge.delay([])
+
+    logger.info(json.dumps({
+        "event": "shard_crawl_dispatched",
+        "bookmaker": bookmaker,
+        "mode": mode,
+        "shards": shards,
+        "subtasks": len(header),
+        "rows": sum(len(r) for _, by_w in planned for r in by_w.values()),
+        "list_ms": list_ms,
+    }))
+    _record_metric("shard_list_ms", bookmaker, list_ms)
+    return {"status": "DISPATCHED", "bookmaker": bookmaker, "matches": [], "subtasks": len(header)}
+
+
+@celery_app.task(bind=True, max_retries=2, default_retry_delay=5)
+def fetch_shard(
+    self,
+    scraper_module: str,
+    scraper_class: str,
+    rows: List[Dict[str, Any]],
+    only_priority: bool,
+    concurrency: int,
+    proxy: Optional[str] = None,
+    shard: str = "",
+    rate_share: float = 1.0,
+):
+    """
+    Fetch + store the details of one shard of list rows (the normal parse_and_store writer),
+    spending `rate_share` of the per-host request rate.
+    """
+    start_time = time.time()
+
+    async def _fetch(scraper):
+        await scraper.prepare_run()
+        return await scraper.fetch_rows(rows, only_priority=only_priority, concurrency=concurrency,
+                                        rate_share=rate_share)
+
+    try:
+        stored = safe_async_run(_on_scraper(scraper_module, scraper_class, proxy, _fetch))
+    except Exception as exc:
+        logger.exception(f"[{scraper_class}] shard {shard} failed")
+        if proxy:
+            blacklist_proxy(proxy)
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=exc)
+        # A result (not an exception) so the chord callback still runs
+        return {"status": "FAILED", "shard": shard, "rows": len(rows), "stored": 0, "error": str(exc)}
+
+    return {
+        "status": "OK",
+        "shard": shard,
+        "rows": len(rows),
+        "stored": stored,
+        "latency_ms": int((time.time() - start_time) * 1000),
+    }
+
+
+@celery_app.task(queue="high_priority")
+def merge_shards(results, bookmaker: str, trigger: Dict[str, Any], owner: Optional[str], started_at: float):
+    """Chord callback: sum the shard results, record metrics, release the run lease (and rerun if asked)."""
+    results = [r for r in (results or []) if isinstance(r, dict)]
+    failed = [r["shard"] for r in results if r.get("status") != "OK"]
+    stored = sum(int(r.get("stored") or 0) for r in results)
+    latency = time.time() - started_at
+
+    if failed:
+        _record_metric("failure", bookmaker)
+    else:
+        # latency only with success (as run_scraper_task), so latency_ms / success stays a mean
+        _record_metric("success", bookmaker)
+        _record_metric("latency_ms", bookmaker, int(latency * 1000))
+    _record_metric("shard_subtasks", bookmaker, len(results))
+    if failed:
+        _record_metric("shard_failed", bookmaker, len(failed))
+
+    lease = run_lock.run_lease(trigger["scraper_class"], trigger.get("mode"), owner=owner) if owner else None
+    if lease is not None and lease.release():
+        _record_metric("run_rerun", trigger["scraper_class"])
+        shard_crawl.apply_async(kwargs=trigger)
+
+    logger.info(json.dumps({
+        "event": "shard_crawl_done",
+        "bookmaker": bookmaker,
+        "mode": trigger.get("mode"),
+        "subtasks": len(results),
+        "failed": failed,
+        "markets_stored": stored,
+        "latency_ms": int(latency * 1000),
+    }))
+    return {
+        "status": "OK" if not failed else "PARTIAL",
+        "bookmaker": bookmaker,
+        "matches": [],
+        "match_count": stored,
+        "failed_shards": failed,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
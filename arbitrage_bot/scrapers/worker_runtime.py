@@ -0,0 +1,205 @@
+# scrapers/worker_runtime.py
+"""
+Per-worker-process runtime: one persistent event loop + long-lived scraper instances.
+
+Without it every Celery task re-imports/inspects the scraper class, re-resolves the
+bookmaker id (DB round trip), enters the lifecycle (pooled httpx client, maybe
+Playwright), tears it all down again and runs on a brand-new `asyncio.run` loop.
+
+Here the loop lives in a daemon thread for the life of the worker process; tasks
+submit coroutines to it. Scrapers are built once per (module, class, proxies),
+entered once and reused. Between runs `reset_run_state()` clears per-run state
+(seen sets, metrics). An instance is recycled (cleaned up and rebuilt) when:
+  • it served SCRAPER_RECYCLE_RUNS runs or is older than SCRAPER_RECYCLE_SEC
+  • its health check fails (client closed, browser disconnected)
+  • it failed SCRAPER_RECYCLE_FAILURES runs in a row
+
+Enabled by default in Celery workers (SCRAPER_PERSISTENT=0 restores per-task setup).
+"""
+import asyncio
+import contextlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from core.logger import get_logger
+from scrapers import browser_pool, http_pool
+
+logger = get_logger(__name__)
+
+PERSISTENT = os.getenv("SCRAPER_PERSISTENT", "1") != "0"
+RECYCLE_RUNS = int(os.getenv("SCRAPER_RECYCLE_RUNS", "200"))
+RECYCLE_SEC = float(os.getenv("SCRAPER_RECYCLE_SEC", "3600"))
+RECYCLE_FAILURES = int(os.getenv("SCRAPER_RECYCLE_FAILURES", "3"))
+
+
+class _Entry:
+    __slots__ = ("scraper", "created", "runs", "failures", "busy")
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.created = time.monotonic()
+        self.runs = 0
+        self.failures = 0
+        self.busy = False
+
+
+class WorkerRuntime:
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._scrapers: Dict[Tuple, _Entry] = {}
+        self.stats = {"built": 0, "reused": 0, "recycled": 0, "transient": 0}
+
+    # --------------------
+    # event loop
+    # --------------------
+    def start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _serve():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_serve, name="scraper-loop", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            http_pool.set_linger(True)        # pooled clients stay warm between tasks on this loop
+            browser_pool.set_keep_warm(True)  # …and so does the browser pool
+            logger.info("🔁 Scraper worker runtime started (persistent loop).")
+            return loop
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """Run `coro` on the persistent loop and block the calling (task) thread for its result."""
+        loop = self.start()
+        fut = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return fut.result(timeout)
+        except BaseException:
+            fut.cancel()
+            raise
+
+    # --------------------
+    # scraper registry
+    # --------------------
+    @staticmethod
+    def _key(module: str, cls: str, proxies: Optional[list]) -> Tuple:
+        return (module, cls, tuple(proxies or ()))
+
+    def _expired(self, entry: _Entry) -> Optional[str]:
+        if entry.runs >= RECYCLE_RUNS:
+            return "runs"
+        if time.monotonic() - entry.created >= RECYCLE_SEC:
+            return "age"
+        if entry.failures >= RECYCLE_FAILURES:
+            return "failures"
+        healthy = getattr(entry.scraper, "healthy", None)
+        if callable(healthy) and not healthy():
+            return "unhealthy"
+        return None
+
+    async def _enter(self, scraper) -> None:
+        enter = getattr(scraper, "__aenter__", None)
+        if enter is not None:
+            await enter()
+
+    async def _dispose(self, scraper, reason: str) -> None:
+        try:
+            cleanup = getattr(scraper, "cleanup", None)
+            if cleanup is not None:
+                await cleanup()
+        except Exception as e:
+            logger.warning(f"⚠️ runtime: cleanup of {type(scraper).__name__} failed: {e}")
+        logger.info(f"♻️ Recycled {type(scraper).__name__} ({reason}).")
+
+    @contextlib.asynccontextmanager
+    async def lease(self, module: str, cls: str, proxies: Optional[list], factory: Callable[[], Any]):
+        """
+        Yield an entered scraper for one run (must be used on the runtime loop).
+        A busy instance (overlapping task threads) gets a one-off sibling instead.
+        """
+        key = self._key(module, cls, proxies)
+        entry = self._scrapers.get(key)
+        if entry is not None and not entry.busy:
+            reason = self._expired(entry)
+            if reason:
+                self._scrapers.pop(key, None)
+                self.stats["recycled"] += 1
+                await self._dispose(entry.scraper, reason)
+                entry = None
+
+        if entry is not None and entry.busy:
+            self.stats["transient"] += 1
+            scraper = factory()
+            await self._enter(scraper)
+            try:
+                yield scraper
+            finally:
+                await self._dispose(scraper, "transient")
+            return
+
+        if entry is None:
+            scraper = factory()
+            await self._enter(scraper)
+            entry = self._scrapers[key] = _Entry(scraper)
+            self.stats["built"] += 1
+        else:
+            self.stats["reused"] += 1
+            reset = getattr(entry.scraper, "reset_run_state", None)
+            if reset is not None:
+                reset()
+
+        entry.busy = True
+        try:
+            yield entry.scraper
+        except BaseException:
+            entry.failures += 1
+            raise
+        else:
+            entry.failures = 0
+        finally:
+            entry.busy = False
+            entry.runs += 1
+
+    # --------------------
+    # shutdown
+    # --------------------
+    async def _close_all(self) -> None:
+        entries, self._scrapers = list(self._scrapers.values()), {}
+        for entry in entries:
+            await self._dispose(entry.scraper, "shutdown")
+        await browser_pool.close_pool()
+        await http_pool.close_all()
+
+    def shutdown(self, timeout: float = 30.0) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout)
+        except Exception as e:
+            logger.warning(f"⚠️ runtime: shutdown cleanup failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout)
+        loop.close()
+        http_pool.set_linger(False)
+        browser_pool.set_keep_warm(False)
+        logger.info(f"🛑 Scraper worker runtime stopped ({self.stats}).")
+
+
+_RUNTIME = WorkerRuntime()
+
+
+def runtime() -> WorkerRuntime:
+    return _RUNTIME
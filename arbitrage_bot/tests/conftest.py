@@ -0,0 +1,6 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+# run from anywhere: `python -m pytest arbitrage_bot/tests` or `pytest` inside arbitrage_bot/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
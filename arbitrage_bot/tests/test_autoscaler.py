@@ -0,0 +1,78 @@
+# tests/test_autoscaler.py
+import types
+
+import pytest
+
+from scrapers import autoscaler
+from scrapers.autoscaler import Autoscaler, LocalBroker, LocalPool
+from scrapers.queues import QueueSpec
+
+BETIKA = QueueSpec("scrape.betika", "Betika", "BetikaScraper", max_concurrency=8, min_concurrency=2)
+SPORTPESA = QueueSpec("scrape.sportpesa", "SportPesa", "SportPesaScraper", max_concurrency=2)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(autoscaler, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _actions(decisions):
+    return {d.queue: (d.action, d.target) for d in decisions}
+
+
+def test_grows_to_drain_backlog_within_window(clock):
+    broker, pool = LocalBroker(), LocalPool({"scrape.betika": 2})
+    scaler = Autoscaler([BETIKA], broker, pool, drain_sec=60, cooldown_sec=120)
+    broker.publish("scrape.betika", count=20)
+    broker.record_latency("Betika", 12_000)  # 20 × 12s / 60s → 4 processes
+    assert _actions(scaler.tick()) == {"scrape.betika": ("grow", 4)}
+    assert pool.sizes["scrape.betika"] == 4
+
+
+def test_growth_is_capped_per_book(clock):
+    broker, pool = LocalBroker(), LocalPool({"scrape.sportpesa": 1})
+    scaler = Autoscaler([SPORTPESA], broker, pool, drain_sec=60)
+    broker.publish("scrape.sportpesa", count=500)
+    broker.record_latency("SportPesa", 30_000)
+    assert _actions(scaler.tick()) == {"scrape.sportpesa": ("grow", 2)}
+
+
+def test_shrinks_one_step_per_tick_after_cooldown_down_to_min(clock):
+    broker, pool = LocalBroker(), LocalPool({"scrape.betika": 2})
+    scaler = Autoscaler([BETIKA], broker, pool, drain_sec=60, cooldown_sec=120)
+    broker.publish("scrape.betika", count=20)
+    broker.record_latency("Betika", 12_000)
+    scaler.tick()
+    for _ in range(20):
+        broker.consume("scrape.betika")
+    assert broker.depth("scrape.betika") == 0
+
+    clock[0] = 60  # queue empty but still cooling down
+    assert _actions(scaler.tick()) == {"scrape.betika": ("hold", 4)}
+
+    clock[0] = 121
+    assert _actions(scaler.tick()) == {"scrape.betika": ("shrink", 3)}
+    assert _actions(scaler.tick()) == {"scrape.betika": ("shrink", 2)}
+    assert _actions(scaler.tick()) == {"scrape.betika": ("hold", 2)}  # min_concurrency
+    assert [(q, old, new) for q, old, new in pool.resizes] == [
+        ("scrape.betika", 2, 4), ("scrape.betika", 4, 3), ("scrape.betika", 3, 2),
+    ]
+
+
+def test_no_shrink_while_backlog_remains(clock):
+    broker, pool = LocalBroker(), LocalPool({"scrape.betika": 6})
+    scaler = Autoscaler([BETIKA], broker, pool, drain_sec=60, cooldown_sec=0)
+    broker.publish("scrape.betika", count=1)
+    broker.record_latency("Betika", 1_000)
+    assert _actions(scaler.tick()) == {"scrape.betika": ("hold", 6)}
+
+
+def test_queue_without_worker_and_dry_run(clock):
+    broker, pool = LocalBroker(), LocalPool({"scrape.betika": 2})
+    scaler = Autoscaler([BETIKA, SPORTPESA], broker, pool, drain_sec=60, dry_run=True)
+    broker.publish("scrape.betika", count=20)
+    broker.record_latency("Betika", 12_000)
+    assert _actions(scaler.tick()) == {"scrape.betika": ("grow", 4), "scrape.sportpesa": ("no_worker", None)}
+    assert pool.sizes["scrape.betika"] == 2 and not pool.resizes
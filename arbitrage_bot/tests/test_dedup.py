@@ -0,0 +1,31 @@
+# tests/test_dedup.py
+import pytest
+
+dedup = pytest.importorskip("core.dedup")  # core.config needs python-dotenv
+
+
+def test_half_implemented_backend_fails_at_construction():
+    class ClaimOnly(dedup.DedupStore):
+        def claim(self, key, ttl):
+            return True
+
+    with pytest.raises(TypeError):
+        ClaimOnly()
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp: dedup.MemoryDedupStore(),
+    lambda tmp: dedup.SqliteDedupStore(tmp / "claims.sqlite"),
+])
+def test_claim_is_exclusive_until_released(make, tmp_path):
+    store = make(tmp_path)
+    assert store.claim("k", 60)
+    assert not store.claim("k", 60)
+    store.release("k")
+    assert store.claim("k", 60)
+
+
+def test_expired_claims_can_be_taken_again():
+    store = dedup.MemoryDedupStore()
+    assert store.claim("k", -1)
+    assert store.claim("k", 60)
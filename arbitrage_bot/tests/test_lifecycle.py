@@ -0,0 +1,61 @@
+# tests/test_lifecycle.py
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("core.db")  # needs the DB drivers (pymysql, sqlalchemy)
+
+from core.lifecycle import CLOSED, OPENED, UPDATED, ArbObservation, OpportunityLifecycle
+
+T0 = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+KEY = ("1:20260101T150000Z", "1X2", None)
+OTHER = ("2:20260101T150000Z", "1X2", None)
+
+
+def _obs(legs="a", pct=2.0, event=1):
+    return ArbObservation(arb_event_id=event, legs_hash=legs, profit_pct=pct)
+
+
+def _kinds(transitions):
+    return [(t.kind, t.key) for t in transitions]
+
+
+def test_sync_opens_updates_and_closes():
+    lc = OpportunityLifecycle(persist=False)
+    assert _kinds(lc.sync({KEY: _obs()}, now=T0)) == [(OPENED, KEY)]
+    assert lc.sync({KEY: _obs()}, now=T0 + timedelta(seconds=30)) == []            # unchanged
+    assert _kinds(lc.sync({KEY: _obs(pct=2.5)}, now=T0 + timedelta(seconds=60))) == [(UPDATED, KEY)]
+    [closed] = lc.sync({}, now=T0 + timedelta(seconds=90))
+    assert (closed.kind, closed.lifespan_sec, closed.flaps) == (CLOSED, 90.0, 0)
+    st = lc.stats()
+    assert (st["open"], st["opened"], st["updated"], st["closed"]) == (0, 1, 1, 1)
+    assert st["lifespan_p50_sec"] == 90.0
+
+
+def test_reopening_within_the_window_is_a_flap():
+    lc = OpportunityLifecycle(persist=False, flap_window_sec=300)
+    lc.sync({KEY: _obs()}, now=T0)
+    lc.sync({}, now=T0 + timedelta(seconds=10))
+    [again] = lc.sync({KEY: _obs()}, now=T0 + timedelta(seconds=60))
+    assert (again.kind, again.flaps) == (OPENED, 1)
+    lc.sync({}, now=T0 + timedelta(seconds=70))
+    [late] = lc.sync({KEY: _obs()}, now=T0 + timedelta(seconds=70 + 301))
+    assert late.flaps == 0
+    assert lc.stats()["flaps"] == 1
+
+
+def test_apply_only_touches_the_changed_keys():
+    lc = OpportunityLifecycle(persist=False)
+    lc.sync({KEY: _obs(), OTHER: _obs(event=2)}, now=T0)
+    out = lc.apply({KEY: None, OTHER: _obs(legs="b", event=2)}, now=T0 + timedelta(seconds=5))
+    assert _kinds(out) == [(CLOSED, KEY), (UPDATED, OTHER)]
+    assert lc.apply({KEY: None}, now=T0 + timedelta(seconds=6)) == []   # already closed
+    assert lc.stats()["open"] == 1
+
+
+def test_flush_batches_without_persistence():
+    lc = OpportunityLifecycle(persist=False, batch_size=2, flush_interval_sec=3600)
+    lc.sync({KEY: _obs()}, now=T0)
+    assert lc.flush() == 0 and lc.stats()["pending_writes"] == 1
+    lc.sync({}, now=T0 + timedelta(seconds=1))
+    assert lc.flush() == 2 and lc.stats()["pending_writes"] == 0
@@ -0,0 +1,97 @@
+# tests/test_limiters.py
+import pytest
+
+from scrapers import limiters
+from scrapers.limiters import AdaptiveLimiter, TokenBucket
+
+
+def _limiter(**kw):
+    kw.setdefault("cooldown_sec", 0.0)
+    return AdaptiveLimiter("example.test", initial=10, min_limit=2, max_limit=20, **kw)
+
+
+def test_additive_increase_about_one_slot_per_limit_successes():
+    lim = _limiter()
+    for _ in range(10):
+        lim.on_success(0.1)
+    assert 10 < lim.limit < 11
+    for _ in range(5):
+        lim.on_success(0.1)
+    assert int(lim.limit) == 11
+    assert lim.counters["increases"] == 1
+
+
+def test_increase_stops_at_max_limit():
+    lim = AdaptiveLimiter("example.test", initial=19, max_limit=20)
+    for _ in range(200):
+        lim.on_success(0.1)
+    assert lim.limit == 20
+
+
+def test_throttle_halves_and_respects_floor():
+    lim = _limiter()
+    lim.on_throttle(429)
+    assert lim.limit == 5
+    assert lim.last_decrease_reason == "status_429"
+    for _ in range(5):
+        lim.on_throttle(503)
+    assert lim.limit == 2
+
+
+def test_decreases_are_rate_limited_by_cooldown():
+    lim = _limiter(cooldown_sec=60.0)
+    lim.on_throttle(429)
+    lim.on_throttle(429)
+    assert lim.limit == 5
+    assert lim.counters["decreases"] == 1
+    assert lim.counters["throttles"] == 2
+
+
+def test_retry_after_pauses_new_acquisitions():
+    lim = _limiter()
+    lim.on_throttle(429, retry_after=30)
+    assert lim.stats()["paused_for_sec"] > 29
+
+
+def test_latency_spike_decreases():
+    lim = _limiter()
+    lim.on_success(0.1)
+    for _ in range(5):
+        lim.on_success(1.0)
+    assert lim.limit < 10
+    assert lim.last_decrease_reason == "latency_spike"
+
+
+def test_transport_errors_only_back_off_once_they_dominate():
+    lim = _limiter()
+    for _ in range(9):
+        lim.on_error()
+    assert lim.limit == 10  # fewer than 10 outcomes: no verdict yet
+    lim.on_error()
+    assert lim.limit == 5
+    assert lim.last_decrease_reason == "error_rate"
+
+
+def test_token_bucket_burst_then_waits_at_rate():
+    b = TokenBucket(rate=10.0, burst=2)
+    assert b.reserve() == 0.0
+    assert b.reserve() == 0.0
+    assert b.reserve() == pytest.approx(0.1, abs=0.01)
+    assert b.delayed == 1
+
+
+def test_token_bucket_refund_returns_the_token():
+    b = TokenBucket(rate=10.0, burst=1)
+    assert b.reserve() == 0.0
+    wait = b.reserve()
+    assert wait == pytest.approx(0.1, abs=0.01)
+    b.refund()  # the waiter was cancelled
+    assert b.reserve() == pytest.approx(0.1, abs=0.01)
+
+
+def test_share_bucket_scales_rate_and_is_shared_per_process(monkeypatch):
+    monkeypatch.setattr(limiters, "_BUCKETS", {})
+    b = limiters.share_bucket("https://api.example.test/x", rate=8.0, burst=4, share=0.25)
+    assert (b.rate, b.burst) == (2.0, 1)
+    assert limiters.share_bucket("api.example.test", 8.0, 4, 0.25) is b
+    assert limiters.share_bucket("api.example.test", 8.0, 4, 1.0).rate == 8.0
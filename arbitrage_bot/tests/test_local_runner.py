@@ -0,0 +1,39 @@
+# tests/test_local_runner.py
+import asyncio
+
+import pytest
+
+local_runner = pytest.importorskip("scrapers.local_runner")  # needs httpx/playwright/DB drivers
+from scrapers.async_base_scraper import AsyncBaseScraper
+
+
+class _Fake(AsyncBaseScraper):
+    def __init__(self, bookmaker, entries, fail=False):
+        self.bookmaker = bookmaker
+        self.entries = entries
+        self.fail = fail
+        self.metrics = {"payloads_processed": entries}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def run(self):
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("boom")
+        return None
+
+
+class _FakeLive(_Fake):
+    pass
+
+
+def test_two_scrapers_of_one_book_keep_separate_results():
+    out = local_runner.run_local([_Fake("Book", 3), _FakeLive("Book", 4, fail=True), _Fake("Book", 5)], timeout=0)
+    assert set(out["results"]) == {"Book:_Fake", "Book:_FakeLive", "Book:_Fake#2"}
+    assert out["results"]["Book:_FakeLive"]["status"] == "FAILED"
+    assert out["entries"] == 8
+    assert out["bookmakers_run"] == ["Book"]
@@ -0,0 +1,65 @@
+# tests/test_payload_cache.py
+import types
+
+import pytest
+
+from scrapers import payload_cache
+from scrapers.payload_cache import PayloadHashCache, payload_digest
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(payload_cache, "time", types.SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_digest_ignores_key_order():
+    assert payload_digest({"a": 1, "b": 2}) == payload_digest({"b": 2, "a": 1})
+    assert payload_digest({"a": 1}) != payload_digest({"a": 2})
+
+
+def test_unchanged_only_after_remember_with_same_digest(tmp_path, clock):
+    c = PayloadHashCache("Book", ttl=60, path=tmp_path / "h.json")
+    assert not c.unchanged("m1:f", "d1")
+    c.remember("m1:f", "d1")
+    assert c.unchanged("m1:f", "d1")
+    assert not c.unchanged("m1:f", "d2")
+    assert (c.skipped, c.processed) == (1, 2)
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    c = PayloadHashCache("Book", ttl=60, path=tmp_path / "h.json")
+    c.remember("m1:f", "d1")
+    clock[0] += 59
+    assert c.unchanged("m1:f", "d1")
+    clock[0] += 2
+    assert not c.unchanged("m1:f", "d1")
+
+
+def test_lru_evicts_least_recently_used(tmp_path, clock):
+    c = PayloadHashCache("Book", ttl=60, max_entries=2, path=tmp_path / "h.json")
+    c.remember("a", "1")
+    c.remember("b", "2")
+    assert c.unchanged("a", "1")  # touch a → b is now oldest
+    c.remember("c", "3")
+    assert c.unchanged("a", "1")
+    assert not c.unchanged("b", "2")
+    assert c.unchanged("c", "3")
+
+
+def test_flush_and_reload_keeps_live_entries(tmp_path, clock):
+    path = tmp_path / "h.json"
+    c = PayloadHashCache("Book", ttl=60, path=path)
+    c.remember("old", "1")
+    clock[0] += 50
+    c.remember("new", "2")
+    c.flush()
+    clock[0] += 20  # "old" is now past its TTL
+    again = PayloadHashCache("Book", ttl=60, path=path)
+    assert again.unchanged("new", "2")
+    assert not again.unchanged("old", "1")
+
+
+def test_ttl_zero_disables():
+    assert not PayloadHashCache("Book", ttl=0).enabled
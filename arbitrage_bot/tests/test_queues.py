@@ -0,0 +1,61 @@
+# tests/test_queues.py
+import pytest
+
+from scrapers import queues
+from scrapers.queues import QueueSpec, queue_name, route_task
+
+
+@pytest.fixture
+def plan(monkeypatch):
+    specs = {
+        "BetikaScraper": QueueSpec(queue_name("Betika"), "Betika", "BetikaScraper", 8),
+        "SportPesaScraper": QueueSpec(queue_name("SportPesa"), "SportPesa", "SportPesaScraper", 2),
+    }
+    monkeypatch.setattr(queues, "queue_plan", lambda: specs)
+    monkeypatch.setattr(queues, "BOOK_QUEUES", True)
+    return specs
+
+
+def test_queue_name_is_a_safe_slug():
+    assert queue_name("Betika") == "scrape.betika"
+    assert queue_name("Odi Bets!") == "scrape.odi_bets"
+
+
+def test_per_book_parsing(monkeypatch):
+    monkeypatch.setenv("SCRAPER_QUEUE_CONCURRENCY", "Betika=8, SportPesa=2,bad=x,=3")
+    assert queues._per_book("SCRAPER_QUEUE_CONCURRENCY") == {"betika": 8, "sportpesa": 2}
+
+
+def test_scraper_tasks_go_to_their_book_queue(plan):
+    assert route_task("scrapers.tasks.run_scraper_task", [], {"scraper_class": "BetikaScraper"}, {}) == \
+        {"queue": "scrape.betika", "routing_key": "scrape.betika"}
+    # positional scraper_class (index 1)
+    assert route_task("scrapers.tasks.fetch_shard", ["scrapers.sportpesa_scraper", "SportPesaScraper"], {}, {}) == \
+        {"queue": "scrape.sportpesa", "routing_key": "scrape.sportpesa"}
+
+
+def test_unknown_scraper_falls_back_to_legacy_queue(plan):
+    assert route_task("scrapers.tasks.fetch_shard", [], {"scraper_class": "Nope"}, {})["queue"] == "default"
+    assert route_task("scrapers.tasks.run_scraper_task", [], {}, {})["queue"] == "high_priority"
+
+
+def test_control_tasks_are_not_routed(plan):
+    assert route_task("scrapers.tasks.merge_shards", [], {}, {}) is None
+
+
+def test_book_queues_off_uses_legacy_routing(plan, monkeypatch):
+    monkeypatch.setattr(queues, "BOOK_QUEUES", False)
+    assert route_task("scrapers.tasks.run_scraper_task", [], {"scraper_class": "BetikaScraper"}, {})["queue"] == \
+        "high_priority"
+
+
+def test_worker_command_carries_caps():
+    cmd = QueueSpec("scrape.betika", "Betika", "BetikaScraper", 8, prefetch=1).worker_command()
+    assert "-Q scrape.betika" in cmd and "--concurrency 8" in cmd and "--prefetch-multiplier 1" in cmd
+
+
+def test_book_queues_are_declared_once_per_book(plan, monkeypatch):
+    plan["BetikaLiveScraper"] = QueueSpec(queue_name("Betika"), "Betika", "BetikaLiveScraper", 4)
+    assert queues.book_queues() == ["scrape.betika", "scrape.sportpesa"]
+    monkeypatch.setattr(queues, "BOOK_QUEUES", False)
+    assert queues.book_queues() == []
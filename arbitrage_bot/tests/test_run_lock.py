@@ -0,0 +1,89 @@
+# tests/test_run_lock.py
+import json
+
+import pytest
+
+from scrapers import run_lock
+from scrapers.run_lock import RunLease
+
+
+@pytest.fixture(autouse=True)
+def file_backend(tmp_path, monkeypatch):
+    """Force the file backend under a temp dir (no Redis)."""
+    monkeypatch.setattr(run_lock, "_redis", None)
+    monkeypatch.setattr(run_lock, "_redis_tried", True)
+    monkeypatch.setattr(run_lock, "RUN_LOCK_DIR", tmp_path)
+    return tmp_path
+
+
+def _expire(lease: RunLease) -> None:
+    state = json.loads(lease._path.read_text())
+    state["expires_at"] = 0
+    lease._path.write_text(json.dumps(state))
+
+
+def test_second_acquire_fails_until_release():
+    a, b = RunLease("Book:full"), RunLease("Book:full")
+    assert a.acquire()
+    try:
+        assert not b.acquire()
+    finally:
+        a.release()
+    assert b.acquire()
+    b.release()
+
+
+def test_leases_are_per_name():
+    a, b = RunLease("Book:full"), RunLease("Book:priority")
+    assert a.acquire() and b.acquire()
+    a.release()
+    b.release()
+
+
+def test_overlapping_triggers_coalesce_into_one_rerun():
+    holder = RunLease("Book:full")
+    assert holder.acquire()
+    assert RunLease("Book:full").request_rerun()
+    assert not RunLease("Book:full").request_rerun()  # already pending
+    assert holder.release() is True                   # consumed
+    again = RunLease("Book:full")
+    assert again.acquire()
+    assert again.release() is False
+
+
+def test_release_without_consuming_keeps_the_rerun():
+    holder = RunLease("Book:full")
+    assert holder.acquire()
+    RunLease("Book:full").request_rerun()
+    assert holder.release(consume_rerun=False) is False
+    nxt = RunLease("Book:full")
+    assert nxt.acquire()
+    assert nxt.release() is True
+
+
+def test_expired_lease_is_taken_over_and_old_holder_cannot_renew():
+    a = RunLease("Book:full")
+    assert a.acquire()
+    a._stop.set()  # crashed holder: no more renewals
+    _expire(a)
+    b = RunLease("Book:full")
+    assert b.acquire()
+    assert not a.renew()
+    a.release()        # must not free b's lease
+    assert not RunLease("Book:full").acquire()
+    b.release()
+
+
+def test_hand_off_lets_another_task_release():
+    a = RunLease("Book:full")
+    assert a.acquire()
+    RunLease("Book:full").request_rerun()
+    owner = a.hand_off(ttl=900)
+    assert not a.held
+    assert not RunLease("Book:full").acquire()  # still held for the follow-up task
+    adopted = run_lock.run_lease("Book", "full", owner=owner)
+    assert adopted.held
+    assert adopted.release() is True
+    fresh = RunLease("Book:full")
+    assert fresh.acquire()
+    fresh.release()
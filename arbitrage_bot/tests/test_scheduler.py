@@ -0,0 +1,135 @@
+# tests/test_scheduler.py
+import json
+import time
+
+import pytest
+
+from scrapers import scheduler
+from scrapers.scheduler import refresh_interval
+
+
+@pytest.fixture(autouse=True)
+def bounds(monkeypatch):
+    monkeypatch.setattr(scheduler, "MIN_INTERVAL", 60.0)
+    monkeypatch.setattr(scheduler, "MAX_INTERVAL", 3600.0)
+
+
+@pytest.mark.parametrize("to_kickoff, expected", [
+    (10 * 60, 60),
+    (2 * 3600, 120),
+    (5 * 3600, 300),
+    (12 * 3600, 600),
+    (36 * 3600, 1800),
+    (5 * 86400, 3600),
+    (None, 3600),
+])
+def test_kickoff_ladder_at_neutral_volatility(to_kickoff, expected):
+    assert refresh_interval(to_kickoff, 0.5) == expected
+
+
+def test_volatility_halves_or_doubles_the_interval():
+    assert refresh_interval(12 * 3600, 1.0) == 300
+    assert refresh_interval(12 * 3600, 0.0) == 1200
+
+
+def test_interval_is_clamped():
+    assert refresh_interval(10 * 60, 1.0) == 60      # 30s → MIN
+    assert refresh_interval(36 * 3600, 0.0) == 3600  # 3600s stays at MAX
+    assert refresh_interval(None, 0.0) == 3600
+    assert refresh_interval(12 * 3600, 7.0) == 300   # rate clamped to 1
+
+
+def test_in_process_queue_stays_bounded_without_a_dispatcher():
+    sched = scheduler.RefreshScheduler("Book")
+    kickoff = time.time() + 86400
+    for _ in range(50):
+        for mid in range(2000):
+            sched.observe(mid, kickoff, changed=False)
+    assert sched.size() == 2000
+    assert len(sched._heap) <= 2 * 2000 + scheduler._COMPACT_SLACK
+
+
+def test_kicked_off_matches_are_dropped():
+    sched = scheduler.RefreshScheduler("Book")
+    assert sched.observe("m1", time.time() + 3600, changed=True) is not None
+    assert sched.observe("m1", time.time() - 1, changed=True) is None
+    assert sched.size() == 0 and "m1" not in sched._meta
+    assert sched.observe("m2", time.time() - 60, changed=False) is None
+    assert sched.size() == 0
+
+
+def test_feed_can_be_switched_off(monkeypatch):
+    monkeypatch.setattr(scheduler, "_FEED", scheduler._FEED)
+    scheduler.set_feed(False)
+    assert not scheduler.feed_enabled()
+
+
+class _Pipe:
+    def __init__(self, ops):
+        self.ops = ops
+        self.queued = []
+
+    def __getattr__(self, name):
+        return lambda *a, **kw: self.queued.append((name, a, kw))
+
+    def execute(self):
+        self.ops.append(self.queued)
+        return []
+
+
+class _Redis:
+    """Records pipelines; only what the buffered Redis path touches."""
+
+    def __init__(self):
+        self.pipelines = []
+        self.direct = []
+        self.meta = {}
+
+    def register_script(self, lua):
+        def call(keys, args, client):
+            client.queued.append(("observe", tuple(keys), tuple(args)))
+        return call
+
+    def pipeline(self, transaction=True):
+        return _Pipe(self.pipelines)
+
+    def hmget(self, key, ids):
+        self.direct.append("hmget")
+        return [self.meta.get(i) for i in ids]
+
+
+def test_redis_observations_are_buffered_and_flushed_in_one_pipeline(monkeypatch):
+    client = _Redis()
+    sched = scheduler.RefreshScheduler("Book", client)
+    monkeypatch.setattr(scheduler, "scheduler_redis", lambda: client)
+    monkeypatch.setattr(scheduler, "_SCHEDULERS", {"Book": sched})
+    monkeypatch.setattr(scheduler, "_SOURCES", {})
+    monkeypatch.setattr(scheduler, "_PENDING_SOURCES", {})
+
+    scheduler.register_source("Book", "scrapers.x:BookScraper")
+    for mid in range(3):
+        assert sched.observe(mid, time.time() + 3600, changed=True, stub={"home_team": "A"}) is None
+    assert client.pipelines == [] and client.direct == []   # nothing hit the network yet
+    assert scheduler.observations_pending() == 4
+
+    assert scheduler.flush_observations() == 3
+    [ops] = client.pipelines
+    assert ops[0][0] == "hset" and ops[0][2]["mapping"] == {"Book": "scrapers.x:BookScraper"}
+    assert [op[0] for op in ops[1:]] == ["observe"] * 3
+    assert ops[1][1] == ("sched:Book:meta", "sched:Book:due")
+    assert scheduler.observations_pending() == 0
+    assert scheduler.flush_observations() == 0 and len(client.pipelines) == 1
+
+
+def test_redis_claim_only_moves_the_due_time():
+    client = _Redis()
+    client.meta = {"m1": json.dumps({"kickoff": time.time() + 3600, "stub": {"x": 1}}),
+                   "m2": json.dumps({"kickoff": time.time() - 60})}
+    sched = scheduler.RefreshScheduler("Book", client)
+    items = sched.claim(["m1", "m2", "m3"], now=time.time())
+    assert [it["match_id"] for it in items] == ["m1"]
+    [ops] = client.pipelines
+    names = [op[0] for op in ops]
+    assert names == ["hdel", "zrem", "zadd"]
+    assert ops[0][1][1:] == ("m2", "m3")
+    assert ops[2][2] == {"xx": True}
@@ -0,0 +1,31 @@
+# tests/test_sharding.py
+from scrapers.sharding import HashRing, shard_concurrency, shard_names, shard_rate_share
+
+IDS = [str(i) for i in range(5000)]
+
+
+def test_ring_is_deterministic_and_partitions_everything():
+    ring = HashRing(shard_names(4))
+    parts = ring.partition(IDS, key=lambda x: x)
+    assert sorted(x for p in parts.values() for x in p) == sorted(IDS)
+    assert HashRing(shard_names(4)).partition(IDS, key=lambda x: x) == parts
+    assert all(len(p) > len(IDS) / 4 * 0.6 for p in parts.values())  # roughly balanced
+
+
+def test_growing_the_ring_moves_only_about_one_nth():
+    before, after = HashRing(shard_names(4)), HashRing(shard_names(5))
+    moved = [x for x in IDS if before.node_for(x) != after.node_for(x)]
+    assert 0.1 < len(moved) / len(IDS) < 0.3
+    assert all(after.node_for(x) == "shard-4" for x in moved)  # only onto the new shard
+
+
+def test_shrinking_the_ring_only_moves_the_removed_shards_ids():
+    before, after = HashRing(shard_names(5)), HashRing(shard_names(4))
+    assert all(before.node_for(x) == "shard-4" for x in IDS if before.node_for(x) != after.node_for(x))
+
+
+def test_shards_sharing_an_egress_split_rate_and_concurrency():
+    assert shard_rate_share(4, own_proxy=False) == 0.25
+    assert shard_rate_share(4, own_proxy=True) == 1.0
+    assert shard_concurrency(40, 4, own_proxy=False) == 10
+    assert shard_concurrency(40, 4, own_proxy=True) == 40
@@ -0,0 +1,121 @@
+# tools/bench_parse_offload.py
+"""
+Benchmark: detail-payload parsing on the event loop vs. in the parse process pool.
+
+Feeds synthetic Betika detail payloads through the same pure parser the scraper
+uses (betika_scraper.detail_norms) via parse_pool.offload, with a fake per-match
+I/O wait, while a probe task measures event-loop lag (how late a short sleep wakes
+up). Prints throughput and lag percentiles for inline parsing and each pool size.
+
+    python -m tools.bench_parse_offload --matches 400 --markets 60 --processes 2,4
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from scrapers import parse_pool
+from scrapers.betika_scraper import detail_norms
+
+CTX = {"bookmaker": "Betika", "bookmaker_url": "https://www.betika.com", "bookmaker_id": 1}
+TEAMS = ["Arsenal", "Chelsea", "Man Utd", "Liverpool FC", "Barcelona", "Real Madrid", "Bayern", "PSG",
+         "Juventus", "Kenya", "Gor Mahia", "AFC Leopards", "Tusker FC", "Inter Milan", "Ajax", "Porto"]
+
+
+def _payload(i: int, markets: int) -> tuple[dict, dict]:
+    stub = {
+        "match_id": 100_000 + i,
+        "parent_match_id": 100_000 + i,
+        "home_team": TEAMS[i % len(TEAMS)],
+        "away_team": TEAMS[(i * 7 + 3) % len(TEAMS)],
+        "start_time": f"2030-01-{1 + i % 28:02d} {i % 24:02d}:00:00",
+        "competition_name": "Premier League",
+        "category": "England",
+        "sport_name": "Soccer",
+        "side_bets": 1,
+    }
+    data = [
+        {"name": "1X2", "odds": [{"odd_key": k, "odd_value": str(1.5 + j)} for j, k in enumerate(("1", "X", "2"))]},
+        {"name": "Double Chance", "odds": [{"odd_key": k, "odd_value": "1.30"} for k in ("1X", "12", "X2")]},
+        {"name": "Both Teams To Score", "odds": [{"odd_key": k, "odd_value": "1.85"} for k in ("Yes", "No")]},
+    ]
+    m = 0
+    while len(data) < markets:
+        line = 0.5 + (m % 10)
+        data.append({"name": f"Total {line}", "odds": [{"odd_key": f"over {line}", "odd_value": "1.9"},
+                                                       {"odd_key": f"under {line}", "odd_value": "1.9"}]})
+        data.append({"name": f"Asian Handicap {-1.5 + (m % 6) * 0.5}",
+                     "odds": [{"odd_key": "1", "odd_value": "1.95"}, {"odd_key": "2", "odd_value": "1.95"}]})
+        m += 1
+    return stub, {"data": data[:markets]}
+
+
+async def _probe(samples: list, interval: float, stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, time.perf_counter() - t0 - interval))
+
+
+async def _run(payloads: list, concurrency: int, io_ms: float, interval: float) -> dict:
+    if parse_pool.parse_executor() is not None:
+        await parse_pool.offload(detail_norms, CTX, *payloads[0], False)  # start the workers first
+
+    lag: list = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(lag, interval, stop))
+    sem = asyncio.Semaphore(concurrency)
+    norms = 0
+
+    async def _one(stub: dict, data: dict) -> None:
+        nonlocal norms
+        async with sem:
+            await asyncio.sleep(io_ms / 1000.0)  # stands in for the detail request
+            out, _ = await parse_pool.offload(detail_norms, CTX, stub, data, False)
+            norms += len(out)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_one(s, d) for s, d in payloads))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+
+    lag_ms = sorted(x * 1000 for x in lag) or [0.0]
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "matches_per_s": round(len(payloads) / elapsed, 1),
+        "norms_per_s": round(norms / elapsed, 1),
+        "lag_p50_ms": round(statistics.median(lag_ms), 2),
+        "lag_p95_ms": round(lag_ms[int(0.95 * (len(lag_ms) - 1))], 2),
+        "lag_max_ms": round(lag_ms[-1], 2),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--matches", type=int, default=400)
+    ap.add_argument("--markets", type=int, default=60, help="markets per detail payload")
+    ap.add_argument("--processes", default="2,4", help="comma-separated pool sizes to compare with inline")
+    ap.add_argument("--concurrency", type=int, default=32, help="detail fetches in flight")
+    ap.add_argument("--io-ms", type=float, default=20.0, help="simulated request latency per match")
+    ap.add_argument("--probe-ms", type=float, default=5.0, help="lag probe interval")
+    args = ap.parse_args()
+
+    payloads = [_payload(i, args.markets) for i in range(args.matches)]
+    modes = [0] + [int(p) for p in args.processes.split(",") if p.strip()]
+
+    print(f"{args.matches} matches × {args.markets} markets, concurrency {args.concurrency}, io {args.io_ms}ms")
+    print(f"{'mode':>10} {'elapsed_s':>10} {'matches/s':>10} {'norms/s':>10} {'lag p50':>9} {'lag p95':>9} {'lag max':>9}")
+    for n in modes:
+        parse_pool.set_processes(n)
+        r = asyncio.run(_run(payloads, args.concurrency, args.io_ms, args.probe_ms / 1000.0))
+        name = "inline" if n == 0 else f"{n} procs"
+        print(f"{name:>10} {r['elapsed_s']:>10} {r['matches_per_s']:>10} {r['norms_per_s']:>10} "
+              f"{r['lag_p50_ms']:>8}ms {r['lag_p95_ms']:>8}ms {r['lag_max_ms']:>8}ms")
+    parse_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,13 @@ def cleanup_db(retain_events_days=RETAIN_EVENTS_DAYS,
             (retain_opps_days,),
         )
 
+        # 1b) Lifecycle transitions share the opportunities retention
+        cur.execute(
+            "DELETE FROM opportunity_lifecycle "
+            "WHERE recorded_at < UTC_TIMESTAMP() - INTERVAL %s DAY",
+            (retain_opps_days,),
+        )
+
         # 2) Trim odds_history (if you keep long-running events)
         cur.execute(
             "DELETE FROM odds_history "